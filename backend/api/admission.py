@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import math
+import time
+
+from services.instrumentation import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a chat turn cannot be admitted; maps to a 429 or 503 response."""
+
+    def __init__(self, status_code: int, retry_after: int, reason: str):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class Ticket:
+    """An admitted chat turn. Releasing it is idempotent."""
+
+    def __init__(
+        self, controller: "AdmissionController", session_id: str, degraded: bool
+    ):
+        self._controller = controller
+        self.session_id = session_id
+        # Admitted while other turns were queued: expensive stages may be skipped
+        self.degraded = degraded
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._controller._release(self.session_id)
+
+
+class AdmissionController:
+    """
+    Bounds the number of chat turns running at once (globally and per session), with a
+    bounded wait queue. Meant to be used from the event loop thread only.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 8,
+        max_queue: int = 16,
+        queue_timeout: float = 10.0,
+        max_per_session: int = 1,
+    ):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.max_per_session = max_per_session
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._in_flight = 0
+        self._waiting = 0
+        self._sessions: dict[str, int] = {}
+
+    @property
+    def saturated(self) -> bool:
+        return self._in_flight >= self.max_in_flight
+
+    async def acquire(self, session_id: str) -> Ticket:
+        """Waits for a slot, or raises AdmissionRejected when the limits are exceeded."""
+        if self._sessions.get(session_id, 0) >= self.max_per_session:
+            self._reject("session_busy")
+            raise AdmissionRejected(
+                429, 1, "A previous message of this session is still being answered."
+            )
+
+        if self.saturated and self._waiting >= self.max_queue:
+            self._reject("queue_full")
+            raise AdmissionRejected(
+                503, self._retry_after(), "The server is busy, please retry shortly."
+            )
+
+        # Counted before waiting, so concurrent turns of one session are rejected
+        self._sessions[session_id] = self._sessions.get(session_id, 0) + 1
+        queued = self.saturated
+        start = time.perf_counter()
+        self._waiting += 1
+        self._publish()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._leave_session(session_id)
+            self._reject("queue_timeout")
+            raise AdmissionRejected(
+                503, self._retry_after(), "The server is busy, please retry shortly."
+            )
+        except BaseException:
+            self._leave_session(session_id)
+            raise
+        finally:
+            self._waiting -= 1
+            self._publish()
+
+        self._in_flight += 1
+        self._publish()
+        metrics.observe(
+            "admission_queue_seconds",
+            time.perf_counter() - start,
+            description="Time chat turns waited for an execution slot.",
+        )
+        return Ticket(self, session_id, degraded=queued)
+
+    def _release(self, session_id: str):
+        self._in_flight -= 1
+        self._leave_session(session_id)
+        self._slots.release()
+        self._publish()
+
+    def _leave_session(self, session_id: str):
+        count = self._sessions.get(session_id, 0) - 1
+        if count > 0:
+            self._sessions[session_id] = count
+        else:
+            self._sessions.pop(session_id, None)
+
+    def _retry_after(self) -> int:
+        return max(1, math.ceil(self.queue_timeout / 2))
+
+    def _reject(self, reason: str):
+        logger.warning(f"Chat turn rejected ({reason}).")
+        metrics.increment(
+            "admission_rejected_total",
+            description="Chat turns rejected by admission control.",
+            reason=reason,
+        )
+
+    def _publish(self):
+        metrics.set_gauge(
+            "chat_turns_in_flight",
+            self._in_flight,
+            description="Chat turns currently running.",
+        )
+        metrics.set_gauge(
+            "chat_turns_queued",
+            self._waiting,
+            description="Chat turns waiting for an execution slot.",
+        )
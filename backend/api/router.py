@@ -2,12 +2,21 @@ import logging
 import uuid
 from functools import lru_cache
 
-from fastapi import APIRouter, Depends
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import UUID4, BaseModel
-
+from starlette.background import BackgroundTask
+
+from api.admission import AdmissionController, AdmissionRejected
+from api.streaming import (
+    coalesce_events,
+    format_event,
+    select_media_type,
+)
 from services.chat_service import ChatService
 from services.config_service import ConfigService
+from services.instrumentation import metrics, timed
+from services.rag_tool import skip_rerank
 
 logger = logging.getLogger(__name__)
 
@@ -17,7 +26,22 @@ router = APIRouter(prefix="/api")
 @lru_cache()
 def get_chat_service():
     config = ConfigService()
-    return ChatService(config=config)
+    chat_service = ChatService(config=config)
+    if config.metrics_enabled:
+        metrics.enable()
+        metrics.add_collector(chat_service.database.publish_metrics)
+    return chat_service
+
+
+@lru_cache()
+def get_admission_controller():
+    config = ConfigService()
+    return AdmissionController(
+        max_in_flight=config.max_in_flight_turns,
+        max_queue=config.max_queued_turns,
+        queue_timeout=config.queue_timeout,
+        max_per_session=config.max_turns_per_session,
+    )
 
 
 class ChatRequest(BaseModel):
@@ -34,23 +58,64 @@ class RecipeResponse(BaseModel):
 
 @router.post("/chat")
 async def chat_endpoint(
-    request: ChatRequest, chat_service: ChatService = Depends(get_chat_service)
+    request: ChatRequest,
+    chat_service: ChatService = Depends(get_chat_service),
+    admission: AdmissionController = Depends(get_admission_controller),
+    accept: str | None = Header(default=None),
 ):
     """
     Streaming chat endpoint for the RAG-on-Tap AI.
+    Sends typed events as SSE (Accept: text/event-stream) or NDJSON
+    (Accept: application/x-ndjson), and the answer as plain text otherwise.
     """
     # Langchain-Postgres requires UUIDs for session_ids
     session_id = request.session_id
+    media_type = select_media_type(accept)
 
-    async def event_generator():
-        for chunk in chat_service.astream_chat(
-            request.message, session_id=str(session_id)
-        ):
-            yield chunk
+    try:
+        ticket = await admission.acquire(str(session_id))
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=e.reason,
+            headers={"Retry-After": str(e.retry_after)},
+        )
 
-    return StreamingResponse(event_generator(), media_type="text/plain")
+    async def event_generator():
+        try:
+            if ticket.degraded and chat_service.config.skip_rerank_when_overloaded:
+                # Propagates to the agent run through the copied context
+                skip_rerank.set(True)
+            with timed("request", route="chat"):
+                events = chat_service.stream_events(
+                    request.message, session_id=str(session_id)
+                )
+                async for event in coalesce_events(events):
+                    frame = format_event(event, media_type)
+                    if frame is not None:
+                        yield frame
+        finally:
+            ticket.release()
+
+    # Disable proxy buffering so frames reach the client as they are produced
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    # The background task releases the slot if the stream never started
+    return StreamingResponse(
+        event_generator(),
+        media_type=media_type,
+        headers=headers,
+        background=BackgroundTask(ticket.release),
+    )
 
 
 @router.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Prometheus scrape endpoint with per-stage latency histograms."""
+    return PlainTextResponse(
+        metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
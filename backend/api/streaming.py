@@ -0,0 +1,126 @@
+import asyncio
+import contextvars
+import json
+import logging
+from typing import AsyncIterator, Iterator
+
+logger = logging.getLogger(__name__)
+
+SSE_MEDIA_TYPE = "text/event-stream"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+TEXT_MEDIA_TYPE = "text/plain"
+
+_END = object()
+
+
+async def coalesce_events(
+    events: Iterator[dict],
+    max_chars: int = 64,
+    max_delay: float = 0.05,
+    heartbeat_interval: float = 15.0,
+) -> AsyncIterator[dict]:
+    """
+    Pulls events from a blocking generator in the threadpool and re-yields them
+    asynchronously. Consecutive token events are merged into one frame until
+    `max_chars` is reached or `max_delay` seconds passed since the first buffered
+    token; a heartbeat event is emitted after `heartbeat_interval` seconds of silence.
+
+    The generator only advances when the consumer asks for the next frame, so a slow
+    client pauses the agent (backpressure). When the consumer stops early (client
+    disconnect), the generator is closed, which stops the agent run.
+    """
+    loop = asyncio.get_running_loop()
+    # Every step runs in the same context, so context variables set by the
+    # generator (e.g. the request trace) survive across threadpool workers
+    context = contextvars.copy_context()
+    pending = None
+    buffer: list[str] = []
+    buffered_chars = 0
+    flush_at = None
+
+    def flush() -> dict:
+        nonlocal buffer, buffered_chars, flush_at
+        frame = {"type": "token", "text": "".join(buffer)}
+        buffer, buffered_chars, flush_at = [], 0, None
+        return frame
+
+    try:
+        while True:
+            if pending is None:
+                pending = loop.run_in_executor(None, context.run, next, events, _END)
+
+            timeout = heartbeat_interval if flush_at is None else flush_at - loop.time()
+            done, _ = await asyncio.wait({pending}, timeout=max(timeout, 0))
+            if not done:
+                yield flush() if buffer else {"type": "heartbeat"}
+                continue
+
+            event = pending.result()
+            pending = None
+            if event is _END:
+                break
+
+            if event["type"] == "token":
+                buffer.append(event["text"])
+                buffered_chars += len(event["text"])
+                if flush_at is None:
+                    flush_at = loop.time() + max_delay
+                if buffered_chars >= max_chars:
+                    yield flush()
+                continue
+
+            if buffer:
+                yield flush()
+            yield event
+
+        if buffer:
+            yield flush()
+    finally:
+        _close_when_idle(loop, pending, context, events)
+
+
+def _close_when_idle(loop, pending, context, events):
+    """Closes the generator once no step is running in the threadpool."""
+
+    close_events = getattr(events, "close", None)
+    if close_events is None:
+        return
+
+    def close(_=None):
+        loop.run_in_executor(None, context.run, close_events)
+
+    if pending is not None and not pending.done():
+        logger.info("Client stopped reading, cancelling the agent run.")
+        pending.add_done_callback(close)
+    else:
+        close()
+
+
+def select_media_type(accept: str | None) -> str:
+    """Picks the stream format from the Accept header (plain text by default)."""
+    accept = accept or ""
+    if SSE_MEDIA_TYPE in accept:
+        return SSE_MEDIA_TYPE
+    if NDJSON_MEDIA_TYPE in accept:
+        return NDJSON_MEDIA_TYPE
+    return TEXT_MEDIA_TYPE
+
+
+def format_event(event: dict, media_type: str) -> str | None:
+    """Serializes an event for the wire format (None when it has no representation)."""
+    event_type = event["type"]
+    if media_type == SSE_MEDIA_TYPE:
+        if event_type == "heartbeat":
+            return ": heartbeat\n\n"
+        data = {key: value for key, value in event.items() if key != "type"}
+        return f"event: {event_type}\ndata: {json.dumps(data, default=str)}\n\n"
+
+    if media_type == NDJSON_MEDIA_TYPE:
+        return json.dumps(event, default=str) + "\n"
+
+    # Plain text keeps the original protocol: answer text and inline errors only
+    if event_type == "token":
+        return event["text"]
+    if event_type == "error":
+        return f"\n[{event['message']}]"
+    return None
@@ -0,0 +1,168 @@
+import logging
+import time
+from contextlib import contextmanager
+
+import psycopg
+from psycopg.rows import tuple_row
+from psycopg_pool import ConnectionPool
+
+from services.collection_alias_service import CollectionAliasService
+from services.config_service import ConfigService
+
+logger = logging.getLogger(__name__)
+
+
+class AnswerCacheService:
+    """
+    Semantic cache of whole answers to first-turn questions, stored in Postgres with
+    pgvector. Entries are scoped to a collection version: rebuilding the collection
+    (a new PGVector collection uuid), switching its alias to another version or
+    calling invalidate() makes them unreachable.
+    """
+
+    TABLE_NAME = "answer_cache"
+
+    def __init__(
+        self,
+        config: ConfigService,
+        collection_name: str = "beer_recipes",
+        threshold: float = 0.95,
+        ttl_hours: float = 24.0,
+        pool: ConnectionPool | None = None,
+        version_check_interval: float = 60.0,
+        aliases: CollectionAliasService | None = None,
+    ):
+        self.collection_name = collection_name
+        self.aliases = aliases
+        self.connection_string = config.psycopg_connection_string
+        self.threshold = threshold
+        self.ttl_hours = ttl_hours
+        self.pool = pool
+        self.version_check_interval = version_check_interval
+        self._version: str | None = None
+        self._version_checked_at = 0.0
+
+    @contextmanager
+    def _connect(self):
+        if self.pool is not None:
+            with self.pool.connection() as conn:
+                yield conn
+        else:
+            with psycopg.connect(self.connection_string) as conn:
+                yield conn
+
+    def setup(self):
+        """Creates the cache table if it does not exist."""
+        with self._connect() as conn:
+            conn.execute("CREATE EXTENSION IF NOT EXISTS vector")
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {self.TABLE_NAME} (
+                    id BIGSERIAL PRIMARY KEY,
+                    collection_name TEXT NOT NULL,
+                    collection_version TEXT NOT NULL,
+                    question TEXT NOT NULL,
+                    embedding vector NOT NULL,
+                    answer TEXT NOT NULL,
+                    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+                )
+                """)
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {self.TABLE_NAME}_collection_idx "
+                f"ON {self.TABLE_NAME} (collection_name, collection_version, created_at)"
+            )
+
+    def collection_version(self) -> str | None:
+        """Uuid of the current PGVector collection, re-read at most once per interval."""
+        now = time.monotonic()
+        if now - self._version_checked_at >= self.version_check_interval:
+            name = self.collection_name
+            if self.aliases is not None:
+                name = self.aliases.resolve(name)
+            with self._connect() as conn:
+                row = (
+                    conn.cursor(row_factory=tuple_row)
+                    .execute(
+                        "SELECT uuid FROM langchain_pg_collection WHERE name = %s",
+                        (name,),
+                    )
+                    .fetchone()
+                )
+            self._version = str(row[0]) if row else None
+            self._version_checked_at = now
+        return self._version
+
+    def lookup(self, embedding: list[float]) -> tuple[str, float] | None:
+        """Returns (answer, similarity) of the nearest live entry above the threshold."""
+        version = self.collection_version()
+        if version is None:
+            return None
+
+        with self._connect() as conn:
+            row = (
+                conn.cursor(row_factory=tuple_row)
+                .execute(
+                    f"""
+                    SELECT answer, 1 - (embedding <=> %(embedding)s::vector) AS similarity
+                    FROM {self.TABLE_NAME}
+                    WHERE collection_name = %(collection)s
+                      AND collection_version = %(version)s
+                      AND created_at > NOW() - %(ttl)s * INTERVAL '1 hour'
+                    ORDER BY embedding <=> %(embedding)s::vector
+                    LIMIT 1
+                    """,
+                    {
+                        "embedding": str(list(embedding)),
+                        "collection": self.collection_name,
+                        "version": version,
+                        "ttl": self.ttl_hours,
+                    },
+                )
+                .fetchone()
+            )
+
+        if row is None or row[1] < self.threshold:
+            return None
+        return row[0], row[1]
+
+    def store(self, question: str, embedding: list[float], answer: str):
+        """Caches the answer to a first-turn question."""
+        version = self.collection_version()
+        if version is None:
+            return
+        with self._connect() as conn:
+            conn.execute(
+                f"""
+                INSERT INTO {self.TABLE_NAME}
+                    (collection_name, collection_version, question, embedding, answer)
+                VALUES (%s, %s, %s, %s::vector, %s)
+                """,
+                (self.collection_name, version, question, str(list(embedding)), answer),
+            )
+
+    def invalidate(self) -> int:
+        """Drops all cached answers of the collection (e.g. after re-ingestion)."""
+        with self._connect() as conn:
+            deleted = conn.execute(
+                f"DELETE FROM {self.TABLE_NAME} WHERE collection_name = %s",
+                (self.collection_name,),
+            ).rowcount
+        self._version_checked_at = 0.0
+        logger.info(
+            f"Invalidated {deleted} cached answers for '{self.collection_name}'."
+        )
+        return deleted
+
+    def purge_expired(self) -> int:
+        """Deletes expired entries and entries of older collection versions."""
+        version = self.collection_version()
+        with self._connect() as conn:
+            deleted = conn.execute(
+                f"""
+                DELETE FROM {self.TABLE_NAME}
+                WHERE collection_name = %s
+                  AND (created_at < NOW() - %s * INTERVAL '1 hour'
+                       OR collection_version IS DISTINCT FROM %s)
+                """,
+                (self.collection_name, self.ttl_hours, version),
+            ).rowcount
+        return deleted
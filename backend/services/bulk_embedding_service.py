@@ -0,0 +1,201 @@
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+# Model of a pool worker process, loaded once by _init_worker
+_worker_embeddings = None
+
+
+class EmbeddingStats:
+    def __init__(self, texts: int = 0):
+        self.texts = texts
+        # Real tokens, and tokens including the padding of each batch
+        self.tokens = 0
+        self.padded_tokens = 0
+        self.seconds = 0.0
+
+    @property
+    def tokens_per_second(self) -> float:
+        return self.tokens / self.seconds if self.seconds else 0.0
+
+    @property
+    def padding_waste(self) -> float:
+        """Share of the computed positions that were padding."""
+        return 1 - self.tokens / self.padded_tokens if self.padded_tokens else 0.0
+
+
+def plan_batches(
+    lengths: list[int], batch_tokens: int = 8192, max_batch_size: int = 32
+) -> list[list[int]]:
+    """
+    Groups text indices into batches of similar token length: the texts are sorted by
+    length and cut so that a batch's padded size (rows x longest text) stays within
+    batch_tokens. Longest batches come first so workers finish together.
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i], reverse=True)
+    batches, batch = [], []
+    for i in order:
+        # Sorted descending: the first text of a batch is its longest
+        longest = lengths[batch[0]] if batch else lengths[i]
+        if batch and (
+            len(batch) >= max_batch_size or longest * (len(batch) + 1) > batch_tokens
+        ):
+            batches.append(batch)
+            batch = []
+        batch.append(i)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def padding_stats(lengths: list[int], batches: list[list[int]]) -> EmbeddingStats:
+    """Real and padded token counts of a batching of texts."""
+    stats = EmbeddingStats(texts=len(lengths))
+    for batch in batches:
+        batch_lengths = [lengths[i] for i in batch]
+        stats.tokens += sum(batch_lengths)
+        stats.padded_tokens += max(batch_lengths, default=0) * len(batch_lengths)
+    return stats
+
+
+def _init_worker(model_name: str, num_threads: int, batch_size: int):
+    global _worker_embeddings
+    from services.vector_store_service import load_embedding_model
+
+    # Batches are already bucketed: encode each one as a single forward pass
+    _worker_embeddings = load_embedding_model(
+        model_name, num_threads=num_threads, encode_kwargs={"batch_size": batch_size}
+    )
+
+
+def _embed_batch(batch_id: int, texts: list[str]) -> tuple[int, np.ndarray]:
+    vectors = _worker_embeddings.embed_documents(texts)
+    return batch_id, np.asarray(vectors, dtype=np.float32)
+
+
+class BulkEmbeddingService(Embeddings):
+    """
+    Embedder for bulk ingestion: texts are bucketed by token length to minimize
+    padding and the buckets are embedded by a pool of processes, each with its own
+    copy of the model and a few torch threads. Texts are sent to the pool
+    window_size at a time, and results come back in input order.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        workers: int | None = None,
+        threads_per_worker: int = 2,
+        batch_tokens: int = 8192,
+        max_batch_size: int = 32,
+        tokenizer=None,
+        window_size: int = 4096,
+    ):
+        self.model_name = model_name
+        self.threads_per_worker = threads_per_worker
+        self.workers = workers or max(1, (os.cpu_count() or 1) // threads_per_worker)
+        self.batch_tokens = batch_tokens
+        self.max_batch_size = max_batch_size
+        self.window_size = window_size
+        if tokenizer is None:
+            from transformers import AutoTokenizer
+
+            tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.tokenizer = tokenizer
+        # Of the last embed_array call
+        self.stats = EmbeddingStats()
+        self._executor: ProcessPoolExecutor | None = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            logger.info(
+                f"Starting {self.workers} embedding workers "
+                f"({self.threads_per_worker} threads each)..."
+            )
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                # Forking a process that already initialized torch is unsafe
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(
+                    self.model_name,
+                    self.threads_per_worker,
+                    self.max_batch_size,
+                ),
+            )
+        return self._executor
+
+    def token_lengths(self, texts: list[str]) -> list[int]:
+        return [len(ids) for ids in self.tokenizer(texts)["input_ids"]]
+
+    def embed_array(self, texts: list[str]) -> np.ndarray:
+        """Vectors of texts as a float32 matrix, in input order."""
+        start = time.perf_counter()
+        # Same preprocessing as HuggingFaceEmbeddings, so lengths match the model input
+        texts = [text.replace("\n", " ") for text in texts]
+        stats = EmbeddingStats(texts=len(texts))
+        matrix = np.empty((0, 0), dtype=np.float32)
+        # Bucketing is per window, so only window_size texts are in flight at once
+        for offset in range(0, len(texts), self.window_size):
+            window = texts[offset : offset + self.window_size]
+            lengths = self.token_lengths(window)
+            batches = plan_batches(lengths, self.batch_tokens, self.max_batch_size)
+            vectors = self._embed_window(window, batches)
+            if offset == 0:
+                matrix = np.empty((len(texts), vectors.shape[1]), dtype=np.float32)
+            matrix[offset : offset + len(window)] = vectors
+            window_stats = padding_stats(lengths, batches)
+            stats.tokens += window_stats.tokens
+            stats.padded_tokens += window_stats.padded_tokens
+
+        self.stats = stats
+        self.stats.seconds = time.perf_counter() - start
+        logger.info(
+            f"Embedded {len(texts)} texts in {self.stats.seconds:.1f}s: "
+            f"{self.stats.tokens_per_second:.0f} tokens/s, "
+            f"{self.stats.padding_waste:.1%} padding."
+        )
+        return matrix
+
+    def _embed_window(self, texts: list[str], batches: list[list[int]]) -> np.ndarray:
+        vectors: list[np.ndarray | None] = [None] * len(texts)
+        if self.workers == 1:
+            if _worker_embeddings is None:
+                _init_worker(
+                    self.model_name, self.threads_per_worker, self.max_batch_size
+                )
+            results = (
+                _embed_batch(batch_id, [texts[i] for i in batch])
+                for batch_id, batch in enumerate(batches)
+            )
+        else:
+            pool = self._pool()
+            futures = [
+                pool.submit(_embed_batch, batch_id, [texts[i] for i in batch])
+                for batch_id, batch in enumerate(batches)
+            ]
+            results = (future.result() for future in as_completed(futures))
+        for batch_id, batch_vectors in results:
+            for i, vector in zip(batches[batch_id], batch_vectors):
+                vectors[i] = vector
+        return np.stack(vectors)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        if not texts:
+            return []
+        return self.embed_array(texts).tolist()
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
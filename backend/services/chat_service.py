@@ -1,22 +1,43 @@
 import logging
+import re
+import time
 import uuid
+from functools import wraps
 
-import psycopg
 from langchain.agents import create_agent
-from langchain.agents.middleware import before_model
-from langchain_core.messages import RemoveMessage, trim_messages
+from langchain.agents.middleware import before_model, wrap_model_call, wrap_tool_call
+from langchain_core.messages import (
+    AIMessage,
+    HumanMessage,
+    RemoveMessage,
+    trim_messages,
+)
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_openai import ChatOpenAI
 from langgraph.checkpoint.postgres import PostgresSaver
 from langgraph.graph.message import REMOVE_ALL_MESSAGES
-from psycopg.rows import dict_row
-from psycopg_pool import ConnectionPool
 
+from services.answer_cache_service import AnswerCacheService
+from services.collection_alias_service import CollectionAliasService
 from services.config_service import ConfigService, LLMProvider
+from services.database_service import DatabaseService
+from services.instrumentation import metrics, timed
 from services.rag_tool import BeerRAGTool
+from services.tracing_service import TracingService, current_trace
 
 logger = logging.getLogger(__name__)
 
+TOKENS_PER_SECOND_BUCKETS = (1, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+def _timed_method(method, stage: str):
+    @wraps(method)
+    def wrapper(*args, **kwargs):
+        with timed(stage):
+            return method(*args, **kwargs)
+
+    return wrapper
+
 
 class ChatService:
     def __init__(
@@ -54,12 +75,20 @@ class ChatService:
             llm_kwargs["api_key"] = config.google_api_key
             self.llm = ChatGoogleGenerativeAI(**llm_kwargs)
 
-        # 2. Initialize RAG Tool
+        # 2. Initialize RAG Tool, sharing the connection pools with the checkpointer
+        self.database = DatabaseService(config)
+        self.aliases = None
+        if config.collection_aliases:
+            self.aliases = CollectionAliasService(
+                config, pool=self.database.pool, cache_ttl=config.alias_cache_ttl
+            )
         self.rag_tool = BeerRAGTool(
             config=config,
             model_name=embedding_model,
             collection_name=collection_name,
             rerank_model=rerank_model,
+            database=self.database,
+            aliases=self.aliases,
         )
         self.tools = [self.rag_tool]
 
@@ -82,30 +111,72 @@ class ChatService:
 
             return {"messages": [RemoveMessage(id=REMOVE_ALL_MESSAGES), *trimmed]}
 
-        # 4. Initialize Database Pool and Checkpointer
-        self.psycopg_conn_str = config.connection_string.replace(
-            "postgresql+psycopg://", "postgresql://"
+        @wrap_model_call
+        def time_model_call(request, handler):
+            with timed("llm"):
+                return handler(request)
+
+        @wrap_tool_call
+        def trace_tool_call(request, handler):
+            name = request.tool_call["name"]
+            start = time.perf_counter()
+            with timed("tool", tool=name):
+                result = handler(request)
+            trace = current_trace()
+            if trace is not None:
+                trace.add_tool_call(
+                    name,
+                    request.tool_call["args"],
+                    len(str(getattr(result, "content", result))),
+                    time.perf_counter() - start,
+                )
+            return result
+
+        # Sampled request tracing with profiles of slow turns
+        self.tracing = TracingService(
+            sample_rate=config.trace_sample_rate,
+            slow_threshold=config.slow_turn_threshold,
+            output_dir=config.trace_dir,
+            profile=config.trace_profile,
         )
 
+        # 4. Initialize Database Pool and Checkpointer
+        self.pool = self.database.pool
+
         # Run setup with autocommit=True to allow CREATE INDEX CONCURRENTLY
         try:
-            with psycopg.connect(self.psycopg_conn_str, autocommit=True) as conn:
-                setup_saver = PostgresSaver(conn)
-                setup_saver.setup()
+            with self.pool.connection() as conn:
+                conn.autocommit = True
+                try:
+                    PostgresSaver(conn).setup()
+                finally:
+                    conn.autocommit = False
             logger.info("Checkpointer tables verified/created.")
         except Exception as e:
             logger.error(f"Failed to setup checkpointer tables: {e}")
 
-        # Use a synchronous connection pool
-        self.pool = ConnectionPool(
-            self.psycopg_conn_str,
-            min_size=1,
-            max_size=10,
-            kwargs={"row_factory": dict_row},
-        )
-
-        # Use synchronous PostgresSaver
+        # Use synchronous PostgresSaver, timing checkpoint reads and writes
         self.saver = PostgresSaver(self.pool)
+        self.saver.get_tuple = _timed_method(self.saver.get_tuple, "checkpoint_load")
+        self.saver.put = _timed_method(self.saver.put, "checkpoint_save")
+        self.saver.put_writes = _timed_method(self.saver.put_writes, "checkpoint_save")
+
+        # Optional semantic cache of answers to first-turn questions
+        self.answer_cache = None
+        if config.answer_cache_enabled:
+            self.answer_cache = AnswerCacheService(
+                config,
+                collection_name=collection_name,
+                threshold=config.answer_cache_threshold,
+                ttl_hours=config.answer_cache_ttl_hours,
+                pool=self.pool,
+                aliases=self.aliases,
+            )
+            try:
+                self.answer_cache.setup()
+            except Exception as e:
+                logger.error(f"Failed to setup answer cache, disabling it: {e}")
+                self.answer_cache = None
 
         # 5. Initialize and compile the Managed Agent once
         self.agent = create_agent(
@@ -115,6 +186,7 @@ class ChatService:
                 "You are RAG-on-Tap, an expert beer sommelier and master brewer. "
                 "Your goal is to provide accurate, technical, and inspiring brewing advice. "
                 "Use the provided 'search_beer_recipes' tool to find specific data whenever needed. "
+                "When a question needs several independent searches, request them together in a single turn. "
                 "\n\nFORMATTING RULES:\n"
                 "1. Use Markdown to structure your responses. Use headings (###) for sections.\n"
                 "2. Use bullet points or numbered lists for ingredients, steps, or features.\n"
@@ -124,7 +196,7 @@ class ChatService:
                 "6. Add relevant emojis to make the sommelier personality engaging (e.g., 🍻, 🌾, 🌡️, 📦).\n"
                 "\nBe professional, encouraging, and highly structured in your advice."
             ),
-            middleware=[trim_history],
+            middleware=[trim_history, time_model_call, trace_tool_call],
             checkpointer=self.saver,
         )
         logger.info(
@@ -168,24 +240,172 @@ class ChatService:
         except Exception as e:
             logger.error(f"Error during checkpoint cleanup: {e}")
 
-    def astream_chat(self, user_input: str, session_id: str):
-        """Streams the agent response using a synchronous generator."""
+        if self.answer_cache is not None:
+            try:
+                deleted = self.answer_cache.purge_expired()
+                logger.info(f"Removed {deleted} expired cached answers.")
+            except Exception as e:
+                logger.error(f"Error during answer cache cleanup: {e}")
+
+    def _lookup_cached_answer(self, user_input: str, session_id: str):
+        """
+        Returns (embedding, answer) for a first-turn question, with answer None on a
+        cache miss, or None when the cache does not apply (later turns, errors).
+        """
+        if self.answer_cache is None:
+            return None
         try:
-            for msg, metadata in self.agent.stream(
-                {"messages": [{"role": "user", "content": user_input}]},
-                config={"configurable": {"thread_id": session_id}},
-                stream_mode="messages",
-            ):
-                logger.debug(
-                    f"Stream yielded: type={msg.type} content_type={type(msg.content)}"
-                )
+            thread = {"configurable": {"thread_id": session_id}}
+            if self.saver.get_tuple(thread) is not None:
+                return None
+            with timed("answer_cache"):
+                embedding = self.rag_tool.embed_query(user_input)
+                hit = self.answer_cache.lookup(embedding)
+        except Exception:
+            logger.exception("Answer cache lookup failed, falling through to the agent")
+            return None
 
-                # Check for AI message type case-insensitively
-                msg_type = str(msg.type).lower()
-                if (msg_type == "ai" or msg_type == "aimessagechunk") and msg.content:
-                    if isinstance(msg.content, str):
-                        yield msg.content
+        if hit is None:
+            return embedding, None
+        answer, similarity = hit
+        logger.info(f"Answer cache hit (similarity {similarity:.3f}) for {session_id}")
+        return embedding, answer
+
+    def _replay_cached_answer(self, user_input: str, answer: str, session_id: str):
+        """Streams a cached answer as token events and records the turn in the history."""
+        # Stream a few words at a time, keeping the original whitespace
+        words = re.findall(r"\S+\s*|\s+", answer)
+        for i in range(0, len(words), 8):
+            yield {"type": "token", "text": "".join(words[i : i + 8])}
+
+        try:
+            self.agent.update_state(
+                {"configurable": {"thread_id": session_id}},
+                {"messages": [HumanMessage(user_input), AIMessage(answer)]},
+                as_node="model",
+            )
+        except Exception:
+            logger.exception(f"Failed to record cached answer for {session_id}")
+        yield {"type": "done", "cached": True}
+
+    def stream_events(self, user_input: str, session_id: str):
+        """
+        Streams the agent turn as typed events (synchronous generator):
+        {"type": "token", "text"}, {"type": "tool_start", "name", "args"},
+        {"type": "tool_end", "name", "result_chars"}, {"type": "error", "message"}
+        and a final {"type": "done"}. Closing the generator stops the agent.
+        """
+        cached = self._lookup_cached_answer(user_input, session_id)
+        if cached is not None and cached[1] is not None:
+            yield from self._replay_cached_answer(user_input, cached[1], session_id)
+            return
+
+        # Retrieval for the raw message overlaps with the LLM's tool-call decision
+        self.rag_tool.speculate(user_input)
+
+        start = time.perf_counter()
+        first_token_at = None
+        chunks = 0
+        output_tokens = 0
+        # Content of the final model message, without any text sent before tool calls
+        answer = None
+        failed = False
+        try:
+            with self.tracing.trace(session_id):
+                for mode, payload in self.agent.stream(
+                    {"messages": [{"role": "user", "content": user_input}]},
+                    config={"configurable": {"thread_id": session_id}},
+                    stream_mode=["messages", "updates"],
+                ):
+                    if mode == "updates":
+                        answer = _final_answer(payload) or answer
+                        yield from self._tool_events(payload)
+                        continue
+
+                    msg, metadata = payload
+                    logger.debug(
+                        f"Stream yielded: type={msg.type} content_type={type(msg.content)}"
+                    )
+
+                    # Check for AI message type case-insensitively
+                    msg_type = str(msg.type).lower()
+                    if (
+                        msg_type == "ai" or msg_type == "aimessagechunk"
+                    ) and msg.content:
+                        if isinstance(msg.content, str):
+                            if first_token_at is None:
+                                first_token_at = time.perf_counter()
+                                metrics.observe(
+                                    "time_to_first_token_seconds",
+                                    first_token_at - start,
+                                    description="Time from request to the first streamed token.",
+                                )
+                            chunks += 1
+                            usage = getattr(msg, "usage_metadata", None) or {}
+                            output_tokens += usage.get("output_tokens", 0)
+                            yield {"type": "token", "text": msg.content}
 
         except Exception:
             logger.exception(f"Error in streaming ChatService ({session_id})")
-            yield "\n[I encountered an error processing your request.]"
+            failed = True
+            yield {
+                "type": "error",
+                "message": "I encountered an error processing your request.",
+            }
+
+        # Cache misses on first turns store the completed answer
+        if cached is not None and answer and not failed:
+            try:
+                self.answer_cache.store(user_input, cached[0], answer)
+            except Exception:
+                logger.exception("Failed to store answer in the cache")
+
+        if first_token_at is not None:
+            elapsed = time.perf_counter() - first_token_at
+            # Providers report usage on some chunks only; fall back to chunk count
+            tokens = output_tokens or chunks
+            if elapsed > 0:
+                metrics.observe(
+                    "stream_tokens_per_second",
+                    tokens / elapsed,
+                    description="Output tokens per second after the first token.",
+                    buckets=TOKENS_PER_SECOND_BUCKETS,
+                )
+
+        if not failed:
+            yield {"type": "done"}
+
+    def _tool_events(self, update: dict):
+        """Converts graph node updates into tool_start / tool_end events."""
+        for node, values in update.items():
+            for msg in (values or {}).get("messages", []):
+                if node == "model":
+                    for call in getattr(msg, "tool_calls", None) or []:
+                        yield {
+                            "type": "tool_start",
+                            "name": call["name"],
+                            "args": call["args"],
+                        }
+                elif node == "tools" and msg.type == "tool":
+                    yield {
+                        "type": "tool_end",
+                        "name": msg.name,
+                        "result_chars": len(str(msg.content)),
+                    }
+
+    def astream_chat(self, user_input: str, session_id: str):
+        """Streams the agent response as plain text using a synchronous generator."""
+        for event in self.stream_events(user_input, session_id):
+            if event["type"] == "token":
+                yield event["text"]
+            elif event["type"] == "error":
+                yield f"\n[{event['message']}]"
+
+
+def _final_answer(update: dict) -> str | None:
+    """Text of a model message without tool calls in a graph update, if any."""
+    answer = None
+    for msg in (update.get("model") or {}).get("messages", []):
+        if not getattr(msg, "tool_calls", None) and isinstance(msg.content, str):
+            answer = msg.content or answer
+    return answer
@@ -8,9 +8,27 @@ logger = logging.getLogger(__name__)
 class ChunkingService:
     """Handles splitting structured documents into smaller chunks with contextual headers."""
 
-    def __init__(self):
-        """Initializes the service. Logic is strictly based on document structure (\n\n)."""
-        pass
+    # Chunk-level metadata kept in compact storage: the recipe reference, the chunk
+    # position and the fields used by search filters
+    COMPACT_METADATA_FIELDS = (
+        "beer_id",
+        "section",
+        "start_index",
+        "style",
+        "abv",
+        "ibu",
+    )
+
+    def __init__(self, tokenizer=None, max_chunk_tokens: int | None = None):
+        """
+        Initializes the service. Logic is strictly based on document structure (\n\n).
+        When a tokenizer and max_chunk_tokens are given, the section text of each chunk is
+        truncated so that header + text fit in max_chunk_tokens (embedding-time budget).
+        """
+        if max_chunk_tokens is not None and tokenizer is None:
+            raise ValueError("max_chunk_tokens requires a tokenizer.")
+        self.tokenizer = tokenizer
+        self.max_chunk_tokens = max_chunk_tokens
 
     def _split_section_and_content(self, text: str) -> tuple[str, str]:
         """Splits the text into (section_name, actual_content)."""
@@ -21,11 +39,104 @@ class ChunkingService:
 
     def _create_contextual_content(self, section_text: str, metadata: dict) -> str:
         """Prepends a contextual header and cleans the section text."""
+        section, clean_content = self._split_section_and_content(section_text)
+        return self._format_contextual_content(section, clean_content, metadata)
+
+    def _format_contextual_content(
+        self, section: str, clean_content: str, metadata: dict
+    ) -> str:
+        """Formats the contextual header followed by the clean section text."""
+        return f"{self._format_header(section, metadata)} | Text: {clean_content}"
+
+    def _format_header(self, section: str, metadata: dict) -> str:
+        """Formats the embedding-time contextual header of a chunk."""
         name = metadata.get("name", "Unknown Recipe")
         style = metadata.get("style", "Unknown Style")
-        section, clean_content = self._split_section_and_content(section_text)
 
-        return f"Recipe: {name} | Style: {style} | Section: {section} | Text: {clean_content}"
+        return f"Recipe: {name} | Style: {style} | Section: {section}"
+
+    def split_contextual_content(self, page_content: str) -> tuple[str, str]:
+        """Splits a contextual chunk into (header, clean_content). Header is empty if absent."""
+        header, sep, clean_content = page_content.partition(" | Text: ")
+        if not sep:
+            return "", page_content
+        return header, clean_content
+
+    def compact_chunk(self, chunk: Document) -> Document:
+        """
+        Strips a contextual chunk down to its section text and the metadata needed for
+        filtering. Recipe-level metadata is stored once per recipe and re-attached by
+        expand_chunk on read.
+        """
+        _, clean_content = self.split_contextual_content(chunk.page_content)
+        metadata = {
+            key: chunk.metadata[key]
+            for key in self.COMPACT_METADATA_FIELDS
+            if key in chunk.metadata
+        }
+        return Document(page_content=clean_content, metadata=metadata)
+
+    def expand_chunk(self, chunk: Document, recipe_metadata: dict) -> Document:
+        """Rebuilds the full contextual chunk from a compact chunk and its recipe metadata."""
+        metadata = {**recipe_metadata, **chunk.metadata}
+        page_content = self._format_contextual_content(
+            metadata.get("section", "General"), chunk.page_content, metadata
+        )
+        return Document(id=chunk.id, page_content=page_content, metadata=metadata)
+
+    def _section_and_text(self, chunk: Document) -> tuple[str | None, str]:
+        """Returns (section name, clean section text) for a full contextual chunk."""
+        _, clean_content = self.split_contextual_content(chunk.page_content)
+        return chunk.metadata.get("section"), clean_content
+
+    def format_for_rerank(self, chunk: Document, max_tokens: int | None = None) -> str:
+        """
+        Short cross-encoder representation: `Name (Style) | Section: text`. With
+        max_tokens, the section text is cut so the passage fits; the header is kept.
+        """
+        section, clean_content = self._section_and_text(chunk)
+        name = chunk.metadata.get("name")
+        if not name or not section:
+            return self._truncate_to_budget("", chunk.page_content, max_tokens)
+        style = chunk.metadata.get("style", "Unknown Style")
+        prefix = f"{name} ({style}) | {section}: "
+        return prefix + self._truncate_to_budget(prefix, clean_content, max_tokens)
+
+    def format_for_display(self, chunk: Document) -> str:
+        """Compact LLM representation, meant to be grouped under a recipe heading."""
+        section, clean_content = self._section_and_text(chunk)
+        if not section:
+            return clean_content
+        return f"{section}: {clean_content}"
+
+    def _truncate_to_budget(
+        self, prefix: str, clean_content: str, max_tokens: int | None
+    ) -> str:
+        """Cuts the section text so prefix + text fit in max_tokens tokens."""
+        if max_tokens is None:
+            return clean_content
+        if self.tokenizer is None:
+            raise ValueError("A token budget requires a tokenizer.")
+
+        prefix_tokens = len(
+            self.tokenizer(prefix, add_special_tokens=False)["input_ids"]
+        )
+        budget = max(max_tokens - prefix_tokens, 0)
+        encoding = self.tokenizer(
+            clean_content, add_special_tokens=False, return_offsets_mapping=True
+        )
+        if len(encoding["input_ids"]) <= budget:
+            return clean_content
+        if budget == 0:
+            return ""
+        # Cut on the character offset of the last token that fits
+        end = encoding["offset_mapping"][budget - 1][1]
+        return clean_content[:end].rstrip()
+
+    @staticmethod
+    def is_compact(chunk: Document) -> bool:
+        """Compact chunks reference their recipe by beer_id but carry no recipe name."""
+        return "beer_id" in chunk.metadata and "name" not in chunk.metadata
 
     def split_documents(self, documents: list[Document]) -> list[Document]:
         """Splits a list of documents strictly at every double newline and adds context headers."""
@@ -35,6 +146,7 @@ class ChunkingService:
         logger.info(f"Splitting {len(documents)} documents into contextual chunks...")
 
         split_docs = []
+        truncated = 0
         for doc in documents:
             sections = doc.page_content.split("\n\n")
 
@@ -45,8 +157,17 @@ class ChunkingService:
                     continue
 
                 # Prepend the contextual header and clean content
-                contextual_content = self._create_contextual_content(
-                    section, doc.metadata
+                section_name, clean_content = self._split_section_and_content(section)
+                if self.max_chunk_tokens is not None:
+                    header = self._format_header(section_name, doc.metadata)
+                    budgeted = self._truncate_to_budget(
+                        f"{header} | Text: ", clean_content, self.max_chunk_tokens
+                    )
+                    if budgeted != clean_content:
+                        truncated += 1
+                        clean_content = budgeted
+                contextual_content = self._format_contextual_content(
+                    section_name, clean_content, doc.metadata
                 )
 
                 new_doc = Document(
@@ -54,11 +175,51 @@ class ChunkingService:
                 )
                 # start_index refers to the location in the ORIGINAL raw story
                 new_doc.metadata["start_index"] = current_offset
-                # Store the raw section text in metadata for clean UI display if needed
-                new_doc.metadata["raw_content"] = section.strip()
+                # The section text is already in page_content, only its name is kept
+                new_doc.metadata["section"] = section_name
 
                 split_docs.append(new_doc)
                 current_offset += len(section) + 2
 
+        if truncated:
+            logger.info(
+                f"Truncated {truncated} chunks to {self.max_chunk_tokens} tokens."
+            )
         logger.info(f"Created {len(split_docs)} contextual chunks.")
         return split_docs
+
+    def create_recipe_summaries(
+        self, documents: list[Document], max_chars: int = 1500
+    ) -> list[Document]:
+        """Builds one summary document per recipe for the coarse (recipe-level) index.
+
+        Overall sections are put first since they describe the beer as a whole, then the
+        remaining sections are appended until the character budget is reached.
+        """
+        if not documents:
+            return []
+
+        summaries = []
+        for doc in documents:
+            sections = [s.strip() for s in doc.page_content.split("\n\n") if s.strip()]
+            overall = [s for s in sections if s.lower().startswith("overall")]
+            others = [s for s in sections if not s.lower().startswith("overall")]
+
+            parts = []
+            budget = max_chars
+            for section in overall + others:
+                _, clean_content = self._split_section_and_content(section)
+                if len(clean_content) > budget:
+                    break
+                parts.append(clean_content)
+                budget -= len(clean_content)
+
+            name = doc.metadata.get("name", "Unknown Recipe")
+            style = doc.metadata.get("style", "Unknown Style")
+            summary = f"Recipe: {name} | Style: {style} | Summary: {' '.join(parts)}"
+            summaries.append(
+                Document(page_content=summary, metadata=doc.metadata.copy())
+            )
+
+        logger.info(f"Created {len(summaries)} recipe summaries.")
+        return summaries
@@ -0,0 +1,294 @@
+import logging
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg
+from psycopg_pool import ConnectionPool
+
+from services.config_service import ConfigService
+from services.recipe_store_service import RecipeStoreService
+
+logger = logging.getLogger(__name__)
+
+VERSION_PATTERN = re.compile(r"^(?P<alias>.+)@v(?P<version>\d+)$")
+
+# Status of a collection version
+BUILDING = "building"
+READY = "ready"
+FAILED = "failed"
+
+
+def versioned_name(alias: str, version: int) -> str:
+    """Collection name of a version, e.g. beer_recipes@v42."""
+    return f"{alias}@v{version}"
+
+
+def parse_versioned_name(name: str) -> tuple[str, int | None]:
+    """beer_recipes@v42 -> ("beer_recipes", 42); unversioned names have no version."""
+    match = VERSION_PATTERN.match(name)
+    if not match:
+        return name, None
+    return match["alias"], int(match["version"])
+
+
+def versions_to_collect(
+    versions: list[tuple[int, str]], live: int | None, keep: int = 1
+) -> list[int]:
+    """
+    Versions (version, status) that garbage collection may drop: failed builds, and
+    those older than the live version except the `keep` newest ready ones (rollback
+    targets). Nothing is dropped without a live version, and builds newer than it
+    are only dropped once they failed.
+    """
+    if live is None:
+        return []
+    older = sorted((v for v in versions if v[0] < live), reverse=True)
+    kept = [version for version, status in older if status == READY][:keep]
+    return sorted(
+        (
+            version
+            for version, status in versions
+            if version != live
+            and (status == FAILED or (version < live and version not in kept))
+        ),
+        reverse=True,
+    )
+
+
+class CollectionAliasService:
+    """
+    Blue/green versions of a PGVector collection. Ingestion builds a new version
+    (beer_recipes@v42) next to the live one, then publish() moves the alias to it in
+    a single-row update, so queries switch atomically. Queries resolve the alias
+    through resolve(), cached for cache_ttl seconds per process.
+    """
+
+    VERSIONS_TABLE = "collection_versions"
+    ALIASES_TABLE = "collection_aliases"
+
+    def __init__(
+        self,
+        config: ConfigService,
+        pool: ConnectionPool | None = None,
+        cache_ttl: float = 5.0,
+    ):
+        self.connection_string = config.psycopg_connection_string
+        self.pool = pool
+        self.cache_ttl = cache_ttl
+        self._lock = threading.Lock()
+        # alias -> (collection name, resolved at)
+        self._resolved: dict[str, tuple[str, float]] = {}
+        self._tables_ready = False
+
+    @contextmanager
+    def _connect(self):
+        if self.pool is not None:
+            with self.pool.connection() as conn:
+                yield conn
+        else:
+            with psycopg.connect(self.connection_string) as conn:
+                yield conn
+
+    def setup(self):
+        """Creates the version and alias tables if they do not exist."""
+        if self._tables_ready:
+            return
+        with self._connect() as conn:
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {self.VERSIONS_TABLE} (
+                    alias TEXT NOT NULL,
+                    version INTEGER NOT NULL,
+                    status TEXT NOT NULL DEFAULT '{BUILDING}',
+                    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                    PRIMARY KEY (alias, version)
+                )
+                """)
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {self.ALIASES_TABLE} (
+                    alias TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL,
+                    switched_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+                )
+                """)
+        self._tables_ready = True
+
+    def create_version(self, alias: str) -> str:
+        """Reserves the next version of an alias and returns its collection name."""
+        self.setup()
+        with self._connect() as conn:
+            with conn.transaction():
+                # Serializes concurrent ingestions of the same alias
+                conn.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (alias,))
+                version = conn.execute(
+                    f"""
+                    INSERT INTO {self.VERSIONS_TABLE} (alias, version)
+                    SELECT %s, COALESCE(MAX(version), 0) + 1
+                    FROM {self.VERSIONS_TABLE} WHERE alias = %s
+                    RETURNING version
+                    """,
+                    (alias, alias),
+                ).fetchone()[0]
+        name = versioned_name(alias, version)
+        logger.info(f"Building collection version '{name}'.")
+        return name
+
+    def mark_failed(self, name: str):
+        """Flags an abandoned build, so that garbage collection drops it."""
+        alias, version = parse_versioned_name(name)
+        with self._connect() as conn:
+            conn.execute(
+                f"UPDATE {self.VERSIONS_TABLE} SET status = %s "
+                "WHERE alias = %s AND version = %s",
+                (FAILED, alias, version),
+            )
+
+    def publish(self, name: str, switch: bool = True):
+        """Marks a finished build as ready and, with switch, points its alias at it."""
+        alias, version = parse_versioned_name(name)
+        if version is None:
+            raise ValueError(f"'{name}' is not a versioned collection name.")
+        with self._connect() as conn:
+            with conn.transaction():
+                conn.execute(
+                    f"UPDATE {self.VERSIONS_TABLE} SET status = %s "
+                    "WHERE alias = %s AND version = %s",
+                    (READY, alias, version),
+                )
+                if switch:
+                    self._point(conn, alias, version)
+        if switch:
+            logger.info(f"Alias '{alias}' now points to '{name}'.")
+
+    def switch(self, alias: str, version: int):
+        """Points the alias at an existing ready version."""
+        self.setup()
+        with self._connect() as conn:
+            with conn.transaction():
+                row = conn.execute(
+                    f"SELECT status FROM {self.VERSIONS_TABLE} "
+                    "WHERE alias = %s AND version = %s",
+                    (alias, version),
+                ).fetchone()
+                if row is None or row[0] != READY:
+                    raise ValueError(
+                        f"'{versioned_name(alias, version)}' is not a ready version."
+                    )
+                self._point(conn, alias, version)
+        logger.info(
+            f"Alias '{alias}' now points to '{versioned_name(alias, version)}'."
+        )
+
+    def _point(self, conn, alias: str, version: int):
+        conn.execute(
+            f"""
+            INSERT INTO {self.ALIASES_TABLE} (alias, version) VALUES (%s, %s)
+            ON CONFLICT (alias)
+            DO UPDATE SET version = EXCLUDED.version, switched_at = NOW()
+            """,
+            (alias, version),
+        )
+        with self._lock:
+            self._resolved.pop(alias, None)
+
+    def live_version(self, alias: str) -> int | None:
+        self.setup()
+        with self._connect() as conn:
+            row = conn.execute(
+                f"SELECT version FROM {self.ALIASES_TABLE} WHERE alias = %s", (alias,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def versions(self, alias: str) -> list[tuple[int, str]]:
+        """(version, status) of every version of the alias, oldest first."""
+        self.setup()
+        with self._connect() as conn:
+            return conn.execute(
+                f"SELECT version, status FROM {self.VERSIONS_TABLE} "
+                "WHERE alias = %s ORDER BY version",
+                (alias,),
+            ).fetchall()
+
+    def rollback(self, alias: str) -> str:
+        """Points the alias back at the newest ready version older than the live one."""
+        live = self.live_version(alias)
+        if live is None:
+            raise ValueError(f"Alias '{alias}' does not point to any version.")
+        previous = [
+            version
+            for version, status in self.versions(alias)
+            if version < live and status == READY
+        ]
+        if not previous:
+            raise ValueError(f"No ready version of '{alias}' older than v{live}.")
+        self.switch(alias, previous[-1])
+        return versioned_name(alias, previous[-1])
+
+    def resolve(self, alias: str) -> str:
+        """
+        Collection name the alias points to, or the alias itself when it has no
+        versions (collections populated without aliases keep working). If the
+        database is unreachable, the last resolved name keeps being served.
+        """
+        now = time.monotonic()
+        with self._lock:
+            cached = self._resolved.get(alias)
+        if cached is not None and now - cached[1] < self.cache_ttl:
+            return cached[0]
+
+        try:
+            version = self.live_version(alias)
+        except psycopg.Error as e:
+            if cached is None:
+                raise
+            logger.warning(f"Could not resolve alias '{alias}', keeping it: {e}")
+            return cached[0]
+
+        name = alias if version is None else versioned_name(alias, version)
+        with self._lock:
+            self._resolved[alias] = (name, now)
+        return name
+
+    def garbage_collect(
+        self, alias: str, keep: int = 1, dry_run: bool = False
+    ) -> list[str]:
+        """
+        Drops failed and old versions (chunks, recipe summaries and recipe metadata),
+        keeping the live version, builds newer than it and `keep` older ready versions.
+        """
+        names = [
+            versioned_name(alias, version)
+            for version in versions_to_collect(
+                self.versions(alias), self.live_version(alias), keep
+            )
+        ]
+        if dry_run:
+            return names
+
+        for name in names:
+            _, version = parse_versioned_name(name)
+            collections = [name, f"{name}_recipes"]
+            with self._connect() as conn:
+                with conn.transaction():
+                    conn.execute(
+                        "DELETE FROM langchain_pg_embedding WHERE collection_id IN "
+                        "(SELECT uuid FROM langchain_pg_collection WHERE name = ANY(%s))",
+                        (collections,),
+                    )
+                    conn.execute(
+                        "DELETE FROM langchain_pg_collection WHERE name = ANY(%s)",
+                        (collections,),
+                    )
+                    table = RecipeStoreService.TABLE_NAME
+                    if conn.execute("SELECT to_regclass(%s)", (table,)).fetchone()[0]:
+                        conn.execute(
+                            f"DELETE FROM {table} WHERE collection_name = %s", (name,)
+                        )
+                    conn.execute(
+                        f"DELETE FROM {self.VERSIONS_TABLE} "
+                        "WHERE alias = %s AND version = %s",
+                        (alias, version),
+                    )
+            logger.info(f"Dropped collection version '{name}'.")
+        return names
@@ -11,6 +11,11 @@ class LLMProvider(str, Enum):
     OPENROUTER = "openrouter"
 
 
+class VectorBackend(str, Enum):
+    PGVECTOR = "pgvector"
+    MMAP = "mmap"
+
+
 class ConfigService(BaseSettings):
     """Centralized configuration service using Pydantic Settings."""
 
@@ -30,6 +35,78 @@ class ConfigService(BaseSettings):
         alias="OPENROUTER_MODEL",
     )
 
+    # Database connection pools (per process: one psycopg pool, one PGVector engine)
+    db_pool_min_size: int = Field(default=1, alias="DB_POOL_MIN_SIZE")
+    db_pool_max_size: int = Field(default=10, alias="DB_POOL_MAX_SIZE")
+    # Share of DB_POOL_MAX_SIZE given to the SQLAlchemy engine (default: half)
+    db_engine_pool_size: int | None = Field(default=None, alias="DB_ENGINE_POOL_SIZE")
+    db_pool_timeout: float = Field(default=30.0, alias="DB_POOL_TIMEOUT")
+    db_statement_timeout_ms: int = Field(default=30000, alias="DB_STATEMENT_TIMEOUT_MS")
+    db_prepared_statements: bool = Field(default=True, alias="DB_PREPARED_STATEMENTS")
+    db_prepare_threshold: int = Field(default=5, alias="DB_PREPARE_THRESHOLD")
+
+    # Retrieval
+    two_tier_retrieval: bool = Field(default=False, alias="TWO_TIER_RETRIEVAL")
+    coarse_recipe_k: int = Field(default=20, alias="COARSE_RECIPE_K")
+    mmr_enabled: bool = Field(default=False, alias="MMR_ENABLED")
+    mmr_lambda: float = Field(default=0.5, alias="MMR_LAMBDA")
+    mmr_fetch_k: int = Field(default=30, alias="MMR_FETCH_K")
+    max_chunks_per_recipe: int = Field(default=2, alias="MAX_CHUNKS_PER_RECIPE")
+    native_search: bool = Field(default=False, alias="NATIVE_SEARCH")
+    # Cross-encoder input: query + passage tokens, and pairs per forward pass
+    rerank_max_length: int | None = Field(default=512, alias="RERANK_MAX_LENGTH")
+    rerank_batch_size: int = Field(default=16, alias="RERANK_BATCH_SIZE")
+    # Candidates retrieved for reranking, and an optional cheap first stage ("lexical"
+    # or a small cross-encoder) keeping RERANK_CASCADE_KEEP of them for the model
+    rerank_candidates: int = Field(default=10, alias="RERANK_CANDIDATES")
+    rerank_cascade: str | None = Field(default=None, alias="RERANK_CASCADE")
+    rerank_cascade_keep: int = Field(default=10, alias="RERANK_CASCADE_KEEP")
+    speculative_retrieval: bool = Field(default=False, alias="SPECULATIVE_RETRIEVAL")
+    speculative_similarity: float = Field(default=0.85, alias="SPECULATIVE_SIMILARITY")
+
+    # Vector index: "pgvector", or "mmap" for snapshots exported by export_index.py
+    vector_backend: VectorBackend = Field(
+        default=VectorBackend.PGVECTOR, alias="VECTOR_BACKEND"
+    )
+    mmap_index_dir: str = Field(default="index", alias="MMAP_INDEX_DIR")
+    mmap_reload_interval: float = Field(default=5.0, alias="MMAP_RELOAD_INTERVAL")
+    # Candidates per result rescored with the stored vectors after a quantized prefilter
+    mmap_rescore_factor: int = Field(default=10, alias="MMAP_RESCORE_FACTOR")
+    # Matryoshka truncation of PGVector embeddings (None: the model's full size)
+    embedding_dimensions: int | None = Field(default=None, alias="EMBEDDING_DIMENSIONS")
+    # Resolve the collection name as an alias of its live version (beer_recipes@v42),
+    # re-read at most every ALIAS_CACHE_TTL seconds
+    collection_aliases: bool = Field(default=False, alias="COLLECTION_ALIASES")
+    alias_cache_ttl: float = Field(default=5.0, alias="ALIAS_CACHE_TTL")
+
+    # Semantic answer cache for first-turn questions
+    answer_cache_enabled: bool = Field(default=False, alias="ANSWER_CACHE_ENABLED")
+    answer_cache_threshold: float = Field(default=0.95, alias="ANSWER_CACHE_THRESHOLD")
+    answer_cache_ttl_hours: float = Field(default=24.0, alias="ANSWER_CACHE_TTL_HOURS")
+
+    # Shared inference server (one copy of the models for all API workers)
+    inference_socket: str | None = Field(default=None, alias="INFERENCE_SOCKET")
+    # Shared secret of the server and its clients; required to use the server
+    inference_authkey: str | None = Field(default=None, alias="INFERENCE_AUTHKEY")
+
+    # Admission control for /api/chat
+    max_in_flight_turns: int = Field(default=8, alias="MAX_IN_FLIGHT_TURNS")
+    max_queued_turns: int = Field(default=16, alias="MAX_QUEUED_TURNS")
+    queue_timeout: float = Field(default=10.0, alias="QUEUE_TIMEOUT")
+    max_turns_per_session: int = Field(default=1, alias="MAX_TURNS_PER_SESSION")
+    skip_rerank_when_overloaded: bool = Field(
+        default=False, alias="SKIP_RERANK_WHEN_OVERLOADED"
+    )
+
+    # Observability
+    metrics_enabled: bool = Field(default=True, alias="METRICS_ENABLED")
+    trace_sample_rate: float = Field(default=0.0, alias="TRACE_SAMPLE_RATE")
+    slow_turn_threshold: float = Field(default=10.0, alias="SLOW_TURN_THRESHOLD")
+    trace_dir: str = Field(default="traces", alias="TRACE_DIR")
+    # cProfile sampled turns. Profiles cover the whole process (every thread), so
+    # enable it on a single worker serving one turn at a time
+    trace_profile: bool = Field(default=False, alias="TRACE_PROFILE")
+
     model_config = SettingsConfigDict(
         env_file=find_dotenv(),
         env_file_encoding="utf-8",
@@ -56,3 +133,21 @@ class ConfigService(BaseSettings):
             f"postgresql+psycopg://{self.postgres_user}:{self.postgres_password}@"
             f"{self.postgres_host}:{self.postgres_port}/{self.postgres_db}"
         )
+
+    @property
+    def psycopg_connection_string(self) -> str:
+        """Constructs the libpq connection string used by psycopg directly."""
+        return self.connection_string.replace("postgresql+psycopg://", "postgresql://")
+
+
+class InferenceSettings(BaseSettings):
+    """
+    Settings of the inference server, a subset of ConfigService read from the same
+    environment. The server needs no database or LLM credentials.
+    """
+
+    inference_socket: str | None = Field(default=None, alias="INFERENCE_SOCKET")
+    inference_authkey: str | None = Field(default=None, alias="INFERENCE_AUTHKEY")
+    rerank_max_length: int | None = Field(default=512, alias="RERANK_MAX_LENGTH")
+
+    model_config = ConfigService.model_config
@@ -1,28 +1,173 @@
 import logging
+import os
+from typing import Iterator
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
 
 logger = logging.getLogger(__name__)
 
+CSV = "csv"
+PARQUET = "parquet"
+ARROW = "arrow"
+FORMATS = {
+    ".csv": CSV,
+    ".parquet": PARQUET,
+    ".pq": PARQUET,
+    ".arrow": ARROW,
+    ".feather": ARROW,
+}
+
+# Typed on load and save, so every format yields the same schema
+NUMERIC_COLUMNS = ("ABV", "IBU")
+ID_COLUMN = "BeerID"
+
+
+def apply_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """ABV and IBU as floats (missing: NaN) and BeerID as a string."""
+    for column in NUMERIC_COLUMNS:
+        if column in df.columns:
+            df[column] = pd.to_numeric(df[column], errors="coerce").astype("float64")
+    if ID_COLUMN in df.columns:
+        df[ID_COLUMN] = df[ID_COLUMN].astype("string")
+    return df
+
 
 class DataService:
-    """Handles reading and writing of recipe data in CSV format."""
+    """
+    Handles reading and writing of recipe data. The format follows the file
+    extension: CSV, Parquet (.parquet, .pq) or Arrow IPC (.arrow, .feather). Columnar
+    files are compressed, read only the requested columns and stream by row group.
+    """
 
-    def __init__(self, file_path: str):
+    def __init__(
+        self,
+        file_path: str,
+        compression: str = "zstd",
+        row_group_size: int = 10_000,
+    ):
         self.file_path = file_path
+        self.compression = compression
+        self.row_group_size = row_group_size
+        extension = os.path.splitext(file_path)[1].lower()
+        self.format = FORMATS.get(extension, CSV)
 
-    def load(self, encoding: str = "utf-8") -> pd.DataFrame:
-        """Loads the CSV file into a pandas DataFrame with encoding fallback."""
-        try:
-            return pd.read_csv(self.file_path, encoding=encoding)
-        except FileNotFoundError:
+    def _columns(self, columns: list[str] | None) -> list[str] | None:
+        """Requested columns present in a columnar file; absent ones are skipped."""
+        if columns is None:
+            return None
+        if self.format == PARQUET:
+            names = pq.read_schema(self.file_path).names
+        else:
+            with pa.memory_map(self.file_path) as source:
+                names = ipc.open_file(source).schema.names
+        return [column for column in columns if column in names]
+
+    def load(
+        self, encoding: str = "utf-8", columns: list[str] | None = None
+    ) -> pd.DataFrame:
+        """
+        Loads the file into a pandas DataFrame, with only `columns` if given. CSV
+        files fall back to latin-1 on decoding errors.
+        """
+        if not os.path.exists(self.file_path):
             return pd.DataFrame()
+        if self.format == PARQUET:
+            df = pq.read_table(
+                self.file_path, columns=self._columns(columns)
+            ).to_pandas()
+        elif self.format == ARROW:
+            df = feather.read_table(
+                self.file_path, columns=self._columns(columns), memory_map=True
+            ).to_pandas()
+        else:
+            df = self._read_csv(encoding, columns)
+        return apply_schema(df)
+
+    def _read_csv(self, encoding: str, columns: list[str] | None, **kwargs):
+        usecols = None if columns is None else (lambda column: column in columns)
+        try:
+            return pd.read_csv(
+                self.file_path, encoding=encoding, usecols=usecols, **kwargs
+            )
         except UnicodeDecodeError:
             logger.warning(
                 f"UnicodeDecodeError for {self.file_path}, falling back to latin-1."
             )
-            return pd.read_csv(self.file_path, encoding="latin-1")
+            return pd.read_csv(
+                self.file_path, encoding="latin-1", usecols=usecols, **kwargs
+            )
+
+    def iter_batches(
+        self, columns: list[str] | None = None, batch_size: int = 10_000
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Yields the file in DataFrames of at most batch_size rows, so that large files
+        are never held in memory at once. Parquet is read one row group at a time.
+        """
+        if not os.path.exists(self.file_path):
+            return
+        if self.format == PARQUET:
+            batches = pq.ParquetFile(self.file_path).iter_batches(
+                batch_size=batch_size, columns=self._columns(columns)
+            )
+            for batch in batches:
+                yield apply_schema(batch.to_pandas())
+        elif self.format == ARROW:
+            yield from self._iter_arrow(self._columns(columns), batch_size)
+        else:
+            yield from self._iter_csv(columns, batch_size)
+
+    def _iter_arrow(self, columns: list[str] | None, batch_size: int):
+        # Record batches are decompressed one at a time from the memory-mapped file
+        with pa.memory_map(self.file_path) as source:
+            reader = ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                batch = reader.get_batch(i)
+                if columns is not None:
+                    batch = batch.select(columns)
+                for offset in range(0, batch.num_rows, batch_size):
+                    yield apply_schema(batch.slice(offset, batch_size).to_pandas())
+
+    def _iter_csv(self, columns: list[str] | None, batch_size: int):
+        rows = 0
+        try:
+            for chunk in self._read_csv("utf-8", columns, chunksize=batch_size):
+                rows += len(chunk)
+                yield apply_schema(chunk)
+            return
+        except UnicodeDecodeError:
+            logger.warning(
+                f"UnicodeDecodeError for {self.file_path}, falling back to latin-1."
+            )
+        # Rows already yielded are decoded again and skipped
+        for chunk in self._read_csv("latin-1", columns, chunksize=batch_size):
+            if rows >= len(chunk):
+                rows -= len(chunk)
+                continue
+            yield apply_schema(chunk.iloc[rows:])
+            rows = 0
 
     def save(self, df: pd.DataFrame):
-        """Saves the DataFrame to the CSV file path."""
-        df.to_csv(self.file_path, index=False)
+        """Saves the DataFrame to the file path, in the format of its extension."""
+        if self.format == CSV:
+            df.to_csv(self.file_path, index=False)
+            return
+        table = pa.Table.from_pandas(apply_schema(df.copy()), preserve_index=False)
+        if self.format == PARQUET:
+            pq.write_table(
+                table,
+                self.file_path,
+                compression=self.compression,
+                row_group_size=self.row_group_size,
+            )
+        else:
+            feather.write_feather(
+                table,
+                self.file_path,
+                compression=self.compression,
+                chunksize=self.row_group_size,
+            )
@@ -0,0 +1,151 @@
+import logging
+import threading
+
+from psycopg_pool import ConnectionPool
+from sqlalchemy import Engine, create_engine
+
+from services.config_service import ConfigService
+from services.instrumentation import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class DatabaseService:
+    """
+    Owns the Postgres connections of a process, sized and tuned from ConfigService:
+    a psycopg pool for the checkpointer, caches and recipe metadata, and a SQLAlchemy
+    engine for PGVector. Both are created on first use and share one connection
+    budget (see pool_sizes).
+    """
+
+    def __init__(self, config: ConfigService):
+        self.config = config
+        self._lock = threading.Lock()
+        self._pool: ConnectionPool | None = None
+        self._engine: Engine | None = None
+
+    def pool_sizes(self) -> tuple[int, int]:
+        """
+        DB_POOL_MAX_SIZE split into (psycopg pool, SQLAlchemy engine) sizes, so the
+        process opens at most that many connections (but at least one per pool).
+        The engine gets DB_ENGINE_POOL_SIZE, by default half.
+        """
+        total = self.config.db_pool_max_size
+        engine = self.config.db_engine_pool_size
+        if engine is None:
+            engine = total // 2
+        engine = min(max(1, engine), max(1, total - 1))
+        return max(1, total - engine), engine
+
+    def connect_kwargs(self) -> dict:
+        """Session settings applied to every connection of both pools."""
+        config = self.config
+        kwargs = {
+            # None disables server-side prepared statements (e.g. behind PgBouncer)
+            "prepare_threshold": (
+                config.db_prepare_threshold if config.db_prepared_statements else None
+            )
+        }
+        if config.db_statement_timeout_ms > 0:
+            kwargs["options"] = f"-c statement_timeout={config.db_statement_timeout_ms}"
+        return kwargs
+
+    @property
+    def pool(self) -> ConnectionPool:
+        with self._lock:
+            if self._pool is None:
+                max_size = self.pool_sizes()[0]
+                min_size = min(self.config.db_pool_min_size, max_size)
+                logger.info(
+                    f"Opening connection pool ({min_size}-{max_size} connections)..."
+                )
+                self._pool = ConnectionPool(
+                    self.config.psycopg_connection_string,
+                    min_size=min_size,
+                    max_size=max_size,
+                    timeout=self.config.db_pool_timeout,
+                    kwargs=self.connect_kwargs(),
+                    name="psycopg",
+                    open=True,
+                )
+            return self._pool
+
+    @property
+    def engine(self) -> Engine:
+        with self._lock:
+            if self._engine is None:
+                self._engine = create_engine(
+                    self.config.connection_string,
+                    pool_size=self.pool_sizes()[1],
+                    max_overflow=0,
+                    pool_timeout=self.config.db_pool_timeout,
+                    pool_pre_ping=True,
+                    connect_args=self.connect_kwargs(),
+                )
+            return self._engine
+
+    def publish_metrics(self):
+        """Exports pool saturation (meant to be registered as a metrics collector)."""
+        if self._pool is not None:
+            # pop_stats resets the counters, so they are added as deltas
+            stats = self._pool.pop_stats()
+            self._publish_usage(
+                "psycopg",
+                in_use=stats.get("pool_size", 0) - stats.get("pool_available", 0),
+                max_size=stats.get("pool_max", self.pool_sizes()[0]),
+                waiting=stats.get("requests_waiting", 0),
+            )
+            metrics.increment(
+                "db_pool_wait_seconds_total",
+                stats.get("requests_wait_ms", 0) / 1000,
+                description="Time spent waiting for a pooled connection.",
+                pool="psycopg",
+            )
+            metrics.increment(
+                "db_pool_timeouts_total",
+                stats.get("requests_errors", 0),
+                description="Connection requests that timed out or failed.",
+                pool="psycopg",
+            )
+
+        if self._engine is not None:
+            pool = self._engine.pool
+            self._publish_usage(
+                "sqlalchemy",
+                in_use=pool.checkedout(),
+                max_size=pool.size(),
+            )
+
+    def _publish_usage(
+        self, pool: str, in_use: int, max_size: int, waiting: int | None = None
+    ):
+        metrics.set_gauge(
+            "db_pool_connections_in_use",
+            in_use,
+            description="Connections checked out of the pool.",
+            pool=pool,
+        )
+        metrics.set_gauge(
+            "db_pool_max_connections",
+            max_size,
+            description="Maximum size of the pool.",
+            pool=pool,
+        )
+        if waiting is None:
+            # SQLAlchemy does not expose its waiters
+            return
+        metrics.set_gauge(
+            "db_pool_requests_waiting",
+            waiting,
+            description="Requests waiting for a pooled connection.",
+            pool=pool,
+        )
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.close()
+                self._pool = None
+            if self._engine is not None:
+                self._engine.dispose()
+                self._engine = None
@@ -0,0 +1,73 @@
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class DiversityService:
+    """Selects a diverse candidate set (MMR + per-recipe cap) before reranking."""
+
+    def __init__(self, lambda_mult: float = 0.5, max_per_recipe: int = 0):
+        """
+        lambda_mult: 1.0 ranks purely by relevance, 0.0 purely by diversity.
+        max_per_recipe: maximum number of chunks kept per beer_id (0 disables the cap).
+        """
+        if not 0.0 <= lambda_mult <= 1.0:
+            raise ValueError("lambda_mult must be between 0 and 1.")
+        self.lambda_mult = lambda_mult
+        self.max_per_recipe = max_per_recipe
+
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def select(self, query_embedding, candidates: list, k: int = 10) -> list:
+        """
+        Greedily picks up to k of the (Document, score, embedding) candidates.
+        Returns (Document, score) tuples, the same shape as similarity_search.
+        """
+        if not candidates:
+            return []
+
+        query = self._normalize(np.asarray(query_embedding, dtype=np.float32))
+        embeddings = self._normalize(
+            np.asarray([c[2] for c in candidates], dtype=np.float32)
+        )
+
+        relevance = embeddings @ query
+        pairwise = embeddings @ embeddings.T
+
+        beer_ids = [c[0].metadata.get("beer_id") for c in candidates]
+        per_recipe: dict[str, int] = {}
+
+        available = np.ones(len(candidates), dtype=bool)
+        # Max similarity of each candidate to the already selected set
+        redundancy = np.full(len(candidates), -np.inf, dtype=np.float32)
+        selected: list[int] = []
+
+        while len(selected) < k and available.any():
+            if selected:
+                mmr = self.lambda_mult * relevance - (1 - self.lambda_mult) * redundancy
+            else:
+                mmr = relevance.copy()
+            mmr[~available] = -np.inf
+            best = int(np.argmax(mmr))
+            available[best] = False
+
+            bid = beer_ids[best]
+            if self.max_per_recipe and bid is not None:
+                if per_recipe.get(bid, 0) >= self.max_per_recipe:
+                    continue
+                per_recipe[bid] = per_recipe.get(bid, 0) + 1
+
+            selected.append(best)
+            redundancy = np.maximum(redundancy, pairwise[best])
+
+        logger.debug(
+            f"Diversity selection kept {len(selected)}/{len(candidates)} candidates "
+            f"from {len({beer_ids[i] for i in selected})} recipes."
+        )
+        return [(candidates[i][0], candidates[i][1]) for i in selected]
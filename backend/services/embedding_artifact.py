@@ -0,0 +1,238 @@
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from services.storage_service import StorageService
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_FORMAT = 1
+MANIFEST_FILE = "manifest.json"
+# Chunks, and the recipe summaries of two-tier retrieval
+INDEXES = ("chunks", "recipes")
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _replace(path: str, write):
+    """Writes a file through a temporary name, so readers never see it half-written."""
+    with open(path + ".tmp", "wb") as f:
+        write(f)
+    os.replace(path + ".tmp", path)
+
+
+def write_artifact(
+    path: str,
+    model_name: str,
+    documents: list[Document],
+    vectors,
+    recipe_documents: list[Document] | None = None,
+    recipe_vectors=None,
+    dimensions: int | None = None,
+) -> str:
+    """
+    Writes documents and their vectors to the artifact directory: ids, content
+    hashes, texts and metadata to `<index>.parquet`, vectors to `<index>.npy` (float32,
+    row-aligned), and the embedding model and its Matryoshka truncation (None: full
+    size) to `manifest.json`, written last.
+    """
+    os.makedirs(path, exist_ok=True)
+    counts = {}
+    dim = None
+    for index, docs, index_vectors in (
+        ("chunks", documents, vectors),
+        ("recipes", recipe_documents, recipe_vectors),
+    ):
+        if not docs:
+            continue
+        matrix = np.asarray(index_vectors, dtype=np.float32)
+        if matrix.ndim != 2 or len(matrix) != len(docs):
+            raise ValueError(
+                f"{len(docs)} {index} documents but vectors of shape {matrix.shape}."
+            )
+        table = pa.table(
+            {
+                # Stable ids make reloading the same artifact an upsert
+                "id": [doc.id or str(uuid.uuid4()) for doc in docs],
+                "content_hash": [content_hash(doc.page_content) for doc in docs],
+                "page_content": [doc.page_content for doc in docs],
+                "metadata": [json.dumps(doc.metadata) for doc in docs],
+            }
+        )
+        _replace(
+            os.path.join(path, f"{index}.parquet"),
+            lambda f: pq.write_table(table, f, compression="zstd"),
+        )
+        _replace(os.path.join(path, f"{index}.npy"), lambda f: np.save(f, matrix))
+        counts[index] = len(docs)
+        dim = matrix.shape[1]
+
+    manifest = {
+        "format": ARTIFACT_FORMAT,
+        "model": model_name,
+        "dimensions": dimensions,
+        "dim": dim,
+        "counts": counts,
+        "created_at": time.time(),
+    }
+    _replace(
+        os.path.join(path, MANIFEST_FILE),
+        lambda f: f.write(json.dumps(manifest, indent=2).encode("utf-8")),
+    )
+    logger.info(f"Wrote embedding artifact {path} ({counts}, {model_name}).")
+    return path
+
+
+class EmbeddingArtifact:
+    """Documents and vectors of an artifact written by write_artifact."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("format") != ARTIFACT_FORMAT:
+            raise ValueError(
+                f"Unsupported artifact format {manifest.get('format')} in {path}."
+            )
+        self.model_name: str = manifest["model"]
+        self.dimensions: int | None = manifest["dimensions"]
+        self.dim: int | None = manifest["dim"]
+        self.counts: dict[str, int] = manifest["counts"]
+
+    def _table(self, index: str, columns: list[str] | None = None) -> pa.Table:
+        table = pq.read_table(
+            os.path.join(self.path, f"{index}.parquet"), columns=columns
+        )
+        if table.num_rows != self.counts[index]:
+            raise ValueError(
+                f"{self.path}: {table.num_rows} {index} rows, "
+                f"{self.counts[index]} in the manifest."
+            )
+        return table
+
+    def documents(self, index: str = "chunks") -> list[Document]:
+        if index not in self.counts:
+            return []
+        columns = self._table(index).to_pydict()
+        return [
+            Document(id=doc_id, page_content=content, metadata=json.loads(metadata))
+            for doc_id, content, metadata in zip(
+                columns["id"], columns["page_content"], columns["metadata"]
+            )
+        ]
+
+    def vectors(self, index: str = "chunks") -> np.ndarray:
+        """Memory-mapped (rows, dim) float32 matrix, row-aligned with documents()."""
+        if index not in self.counts:
+            return np.empty((0, self.dim or 0), dtype=np.float32)
+        return np.load(os.path.join(self.path, f"{index}.npy"), mmap_mode="r")
+
+    def hashes(self, index: str = "chunks") -> list[str]:
+        if index not in self.counts:
+            return []
+        return self._table(index, columns=["content_hash"])["content_hash"].to_pylist()
+
+
+class ArtifactEmbeddings(Embeddings):
+    """
+    Embeddings served from artifacts by content hash. Texts not found are embedded by
+    the fallback model; without one they are an error. Vectors of a model must only
+    be served in place of the same model, which callers check on artifact.model_name.
+    """
+
+    def __init__(
+        self, artifacts: list[EmbeddingArtifact], fallback: Embeddings | None = None
+    ):
+        self.fallback = fallback
+        # Content hash -> (artifact vectors, row)
+        self._rows: dict[str, tuple[np.ndarray, int]] = {}
+        for artifact in artifacts:
+            for index in INDEXES:
+                vectors = artifact.vectors(index)
+                for row, digest in enumerate(artifact.hashes(index)):
+                    self._rows.setdefault(digest, (vectors, row))
+        self.hits = 0
+        self.misses = 0
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        vectors: list = [None] * len(texts)
+        missing = []
+        for i, text in enumerate(texts):
+            found = self._rows.get(content_hash(text))
+            if found is None:
+                missing.append(i)
+            else:
+                vectors[i] = found[0][found[1]].tolist()
+        if missing:
+            if self.fallback is None:
+                raise KeyError(f"{len(missing)} texts are not in the artifact.")
+            embedded = self.fallback.embed_documents([texts[i] for i in missing])
+            for i, vector in zip(missing, embedded):
+                vectors[i] = list(vector)
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+        return vectors
+
+    def embed_query(self, text: str) -> list[float]:
+        if self.fallback is None:
+            raise KeyError("Queries need a fallback embedding model.")
+        return self.fallback.embed_query(text)
+
+
+def reuse_artifact(
+    path: str, model_name: str, dimensions: int | None, embeddings: Embeddings
+) -> Embeddings:
+    """
+    Embeddings that take the vectors of unchanged texts from the artifact at path, if
+    it was written by the same model (and truncation), and embed the others.
+    """
+    try:
+        artifact = EmbeddingArtifact(path)
+    except FileNotFoundError:
+        return embeddings
+    if (artifact.model_name, artifact.dimensions) != (model_name, dimensions):
+        logger.info(
+            f"Not reusing {path}: written by {artifact.model_name} "
+            f"({artifact.dimensions or 'full'} dimensions)."
+        )
+        return embeddings
+    return ArtifactEmbeddings([artifact], fallback=embeddings)
+
+
+def load_artifact(
+    path: str,
+    storage_service: StorageService,
+    batch_size: int = 500,
+    model_name: str | None = None,
+):
+    """
+    Bulk-loads an artifact into a storage service without running the model. Recipe
+    summaries are loaded into services built for two-tier retrieval.
+    """
+    artifact = EmbeddingArtifact(path)
+    if model_name is not None and artifact.model_name != model_name:
+        raise ValueError(
+            f"{path} holds vectors of {artifact.model_name}, not {model_name}."
+        )
+    logger.info(f"Loading {artifact.counts} from {path} ({artifact.model_name})...")
+    storage_service.add_embeddings(
+        artifact.documents("chunks"), artifact.vectors("chunks"), batch_size=batch_size
+    )
+    if artifact.counts.get("recipes") and getattr(storage_service, "two_tier", False):
+        storage_service.add_recipe_summaries(
+            artifact.documents("recipes"),
+            batch_size=batch_size,
+            vectors=artifact.vectors("recipes"),
+        )
+    return artifact
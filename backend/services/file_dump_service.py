@@ -1,27 +1,246 @@
+import gzip
+import hashlib
+import io
 import json
 import logging
+import os
+import time
+from typing import Iterator
 
+import numpy as np
+import orjson
+import zstandard
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
 
 from services.storage_service import StorageService
 
 logger = logging.getLogger(__name__)
 
+DUMP_FORMAT = 1
+GZIP = "gzip"
+ZSTD = "zstd"
+COMPRESSIONS = {".gz": GZIP, ".zst": ZSTD}
+
+
+def infer_compression(path: str) -> str | None:
+    """gzip for .gz, zstd for .zst, otherwise uncompressed."""
+    return COMPRESSIONS.get(os.path.splitext(path)[1].lower())
+
+
+def manifest_path(output_path: str) -> str:
+    """chunks.jsonl.zst -> chunks.manifest.json"""
+    directory, name = os.path.split(output_path)
+    return os.path.join(directory, name.partition(".")[0] + ".manifest.json")
+
+
+def shard_path(output_path: str, shard: int) -> str:
+    """chunks.jsonl.zst -> chunks-00003.jsonl.zst"""
+    directory, name = os.path.split(output_path)
+    stem, dot, suffixes = name.partition(".")
+    return os.path.join(directory, f"{stem}-{shard:05d}{dot}{suffixes}")
+
+
+def _compress(block: bytes, compression: str | None) -> bytes:
+    # Each block is a complete gzip member or zstd frame, so appends stay readable
+    if compression == GZIP:
+        return gzip.compress(block, compresslevel=1)
+    if compression == ZSTD:
+        return zstandard.ZstdCompressor(level=3).compress(block)
+    return block
+
 
 class FileDumpService(StorageService):
-    """Service that dumps documents to a file instead of a vector store."""
+    """
+    Service that dumps documents to JSONL files instead of a vector store. With
+    embeddings, each line also carries the document's vector. Batches are appended
+    as they arrive, compressed by the extension of output_path (.gz, .zst), and with
+    shard_size the output is split into shards of at most that many uncompressed
+    bytes. A manifest with per-shard counts and checksums is rewritten after every
+    call; read dumps back with FileDump.
+    """
 
-    def __init__(self, output_path: str):
+    def __init__(
+        self,
+        output_path: str,
+        embeddings: Embeddings | None = None,
+        compression: str | None = None,
+        shard_size: int | None = None,
+    ):
         self.output_path = output_path
+        self.embeddings = embeddings
+        self.compression = compression or infer_compression(output_path)
+        self.shard_size = shard_size
+        # Per shard: path, documents, uncompressed and written bytes, checksum
+        self._shards: list[dict] = []
 
     def add_documents(self, documents: list[Document], batch_size: int = 500):
-        """Dumps documents to a JSONL file."""
-        logger.info(f"Dumping {len(documents)} documents to {self.output_path}...")
+        """Dumps documents, embedding them batch by batch if the service has a model."""
+        self._start(len(documents))
+        for i in range(0, len(documents), batch_size):
+            batch = documents[i : i + batch_size]
+            vectors = None
+            if self.embeddings is not None:
+                vectors = self.embeddings.embed_documents(
+                    [d.page_content for d in batch]
+                )
+            self._write(batch, vectors)
+        self._finish()
 
-        with open(self.output_path, "w", encoding="utf-8") as f:
-            for doc in documents:
-                # Convert Document to a serializable dictionary
-                dump_data = {"page_content": doc.page_content, "metadata": doc.metadata}
-                f.write(json.dumps(dump_data) + "\n")
+    def add_embeddings(self, documents: list[Document], vectors, batch_size: int = 500):
+        """Dumps documents and their precomputed vectors."""
+        self._start(len(documents))
+        for i in range(0, len(documents), batch_size):
+            self._write(documents[i : i + batch_size], vectors[i : i + batch_size])
+        self._finish()
 
+    def _start(self, count: int):
+        logger.info(f"Dumping {count} documents to {self.output_path}...")
+        if not self._shards:
+            self._open_shard()
+
+    def _finish(self):
+        self._write_manifest()
         logger.info(f"Successfully dumped documents to {self.output_path}")
+
+    def _open_shard(self):
+        if self.shard_size is None:
+            path = self.output_path
+        else:
+            path = shard_path(self.output_path, len(self._shards))
+        # Truncates what a previous run left at this path
+        open(path, "wb").close()
+        self._shards.append(
+            {"path": path, "documents": 0, "raw_bytes": 0, "sha256": hashlib.sha256()}
+        )
+
+    def _write(self, documents: list[Document], vectors=None):
+        lines = []
+        pending = 0
+        for i, doc in enumerate(documents):
+            dump_data = {"page_content": doc.page_content, "metadata": doc.metadata}
+            if vectors is not None:
+                dump_data["embedding"] = np.asarray(vectors[i], dtype=np.float32)
+            line = orjson.dumps(
+                dump_data,
+                option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_APPEND_NEWLINE,
+            )
+            shard = self._shards[-1]
+            # A shard holds at least one document, however large
+            if (
+                self.shard_size is not None
+                and shard["documents"] + len(lines) > 0
+                and shard["raw_bytes"] + pending + len(line) > self.shard_size
+            ):
+                self._append(lines)
+                lines, pending = [], 0
+                self._open_shard()
+            lines.append(line)
+            pending += len(line)
+        self._append(lines)
+
+    def _append(self, lines: list[bytes]):
+        if not lines:
+            return
+        shard = self._shards[-1]
+        block = b"".join(lines)
+        data = _compress(block, self.compression)
+        with open(shard["path"], "ab") as f:
+            f.write(data)
+        shard["sha256"].update(data)
+        shard["documents"] += len(lines)
+        shard["raw_bytes"] += len(block)
+
+    def _write_manifest(self):
+        manifest = {
+            "format": DUMP_FORMAT,
+            "compression": self.compression,
+            "documents": sum(shard["documents"] for shard in self._shards),
+            "shards": [
+                {
+                    "path": os.path.basename(shard["path"]),
+                    "documents": shard["documents"],
+                    "bytes": os.path.getsize(shard["path"]),
+                    "sha256": shard["sha256"].hexdigest(),
+                }
+                for shard in self._shards
+            ],
+            "created_at": time.time(),
+        }
+        path = manifest_path(self.output_path)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(path + ".tmp", path)
+
+
+class FileDump:
+    """
+    Reads a dump written by FileDumpService lazily, shard by shard. Dumps without a
+    manifest are read as a single file.
+    """
+
+    def __init__(self, output_path: str):
+        self.output_path = output_path
+        directory = os.path.dirname(output_path)
+        try:
+            with open(manifest_path(output_path), "r", encoding="utf-8") as f:
+                self.manifest = json.load(f)
+        except FileNotFoundError:
+            self.manifest = None
+        if self.manifest is None:
+            self.compression = infer_compression(output_path)
+            self.shards = [{"path": output_path, "sha256": None}]
+        else:
+            if self.manifest.get("format") != DUMP_FORMAT:
+                raise ValueError(
+                    f"Unsupported dump format {self.manifest.get('format')} "
+                    f"for {output_path}."
+                )
+            self.compression = self.manifest["compression"]
+            self.shards = [
+                dict(shard, path=os.path.join(directory, shard["path"]))
+                for shard in self.manifest["shards"]
+            ]
+
+    def __len__(self) -> int:
+        if self.manifest is None:
+            return sum(1 for _ in self.records())
+        return self.manifest["documents"]
+
+    def _open(self, path: str):
+        if self.compression == GZIP:
+            return gzip.open(path, "rb")
+        if self.compression == ZSTD:
+            reader = zstandard.ZstdDecompressor().stream_reader(
+                open(path, "rb"), read_across_frames=True, closefd=True
+            )
+            return io.BufferedReader(reader)
+        return open(path, "rb")
+
+    def records(self) -> Iterator[dict]:
+        """Dumped lines as dicts, with "embedding" if the dump has vectors."""
+        for shard in self.shards:
+            with self._open(shard["path"]) as f:
+                for line in f:
+                    yield orjson.loads(line)
+
+    def documents(self) -> Iterator[Document]:
+        for record in self.records():
+            yield Document(
+                page_content=record["page_content"], metadata=record["metadata"]
+            )
+
+    def verify(self):
+        """Checks every shard against the size and checksum in the manifest."""
+        if self.manifest is None:
+            raise ValueError(f"{self.output_path} has no manifest to verify against.")
+        for shard in self.shards:
+            digest = hashlib.sha256()
+            with open(shard["path"], "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+            if (
+                os.path.getsize(shard["path"]) != shard["bytes"]
+                or digest.hexdigest() != shard["sha256"]
+            ):
+                raise ValueError(f"{shard['path']} does not match the manifest.")
@@ -0,0 +1,78 @@
+from enum import Enum
+
+import numpy as np
+
+# Comparison operators of PGVector-style filters, on scalars or NumPy columns alike
+COMPARISONS = {
+    "$eq": lambda a, b: a == b,
+    "$ne": lambda a, b: a != b,
+    "$lt": lambda a, b: a < b,
+    "$lte": lambda a, b: a <= b,
+    "$gt": lambda a, b: a > b,
+    "$gte": lambda a, b: a >= b,
+}
+
+
+def text_value(value) -> str:
+    """Text of a filter value. str() of a str-based Enum member is its qualified name."""
+    return value.value if isinstance(value, Enum) else str(value)
+
+
+def parse_condition(value) -> tuple[str, object]:
+    """Condition on a field as (operator, operand); a bare value means $eq."""
+    return next(iter(value.items())) if isinstance(value, dict) else ("$eq", value)
+
+
+def filter_mask(filter: dict, count: int, field_mask) -> np.ndarray:
+    """
+    Evaluates a PGVector-style filter on count rows. $and and $or are combined here;
+    field_mask(field, operator, operand) returns the boolean mask of one condition.
+    """
+    mask = np.ones(count, dtype=bool)
+    for key, value in filter.items():
+        if key == "$and":
+            for clause in value:
+                mask &= filter_mask(clause, count, field_mask)
+        elif key == "$or":
+            matched = np.zeros(count, dtype=bool)
+            for clause in value:
+                matched |= filter_mask(clause, count, field_mask)
+            mask &= matched
+        else:
+            mask &= field_mask(key, *parse_condition(value))
+    return mask
+
+
+def matches_condition(field, operator: str, operand) -> bool:
+    """
+    Evaluates one condition on a metadata value. Like PGVector's jsonb_path_match,
+    comparisons between values of different types (e.g. an empty ABV string) are false.
+    """
+    if operator == "$in":
+        return field is not None and text_value(field) in map(text_value, operand)
+    if operator == "$nin":
+        return field is None or text_value(field) not in map(text_value, operand)
+    if isinstance(operand, Enum):
+        # e.g. a StyleEnum member compares as its value
+        operand = operand.value
+    if operator in COMPARISONS:
+        numeric = (int, float)
+        same_type = (isinstance(field, numeric) and isinstance(operand, numeric)) or (
+            isinstance(field, str) and isinstance(operand, str)
+        )
+        return same_type and bool(COMPARISONS[operator](field, operand))
+    raise ValueError(f"Unsupported filter operator: {operator}")
+
+
+def matches_filter(metadata: dict, filter: dict | None) -> bool:
+    """Evaluates a PGVector-style metadata filter on one document's metadata."""
+    if not filter:
+        return True
+    mask = filter_mask(
+        filter,
+        1,
+        lambda field, operator, operand: matches_condition(
+            metadata.get(field), operator, operand
+        ),
+    )
+    return bool(mask[0])
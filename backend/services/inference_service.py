@@ -0,0 +1,169 @@
+import logging
+import os
+import threading
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Connection, Listener
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from services.instrumentation import timed
+
+logger = logging.getLogger(__name__)
+
+
+def default_socket_path() -> str:
+    """Socket in a private runtime directory ($XDG_RUNTIME_DIR, else the home)."""
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(runtime_dir, "rag_on_tap", "inference.sock")
+
+
+def _authkey(authkey: str | None) -> bytes:
+    # Requests are pickles: only peers that share the key may connect
+    if not authkey:
+        raise ValueError("The inference server requires INFERENCE_AUTHKEY to be set.")
+    return authkey.encode("utf-8")
+
+
+class InferenceServer:
+    """
+    Serves the embedding and reranker models of one process to any number of API
+    workers over a Unix socket, so the weights are loaded once per host. Clients
+    must authenticate with the shared authkey, and the socket is only accessible
+    to its owner.
+    """
+
+    def __init__(
+        self,
+        socket_path: str,
+        embeddings: Embeddings,
+        cross_encoder,
+        authkey: str | None = None,
+    ):
+        self.socket_path = socket_path
+        self.authkey = _authkey(authkey)
+        self.embeddings = embeddings
+        self.cross_encoder = cross_encoder
+        # One lock per model: embedding and reranking can overlap, but each model
+        # runs one batch at a time instead of oversubscribing the CPU threads
+        self._embedding_lock = threading.Lock()
+        self._rerank_lock = threading.Lock()
+        self._listener: Listener | None = None
+
+    def handle(self, method: str, args: tuple):
+        if method == "embed_documents":
+            with self._embedding_lock, timed("embed", source="inference_server"):
+                return np.asarray(self.embeddings.embed_documents(*args), np.float32)
+        if method == "embed_query":
+            with self._embedding_lock, timed("embed", source="inference_server"):
+                return np.asarray(self.embeddings.embed_query(*args), np.float32)
+        if method == "rerank":
+            pairs, *options = args
+            # Optional batch size, chosen by the client
+            kwargs = {"batch_size": options[0]} if options else {}
+            with self._rerank_lock, timed("rerank", source="inference_server"):
+                return np.asarray(
+                    self.cross_encoder.predict(pairs, **kwargs), np.float32
+                )
+        raise ValueError(f"Unknown inference method '{method}'")
+
+    def serve_forever(self):
+        """Accepts connections until close() is called, one thread per connection."""
+        directory = os.path.dirname(self.socket_path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory, mode=0o700)
+        if os.path.exists(self.socket_path):
+            # Stale socket of a previous run
+            os.remove(self.socket_path)
+        listener = Listener(
+            self.socket_path, family="AF_UNIX", backlog=64, authkey=self.authkey
+        )
+        os.chmod(self.socket_path, 0o600)
+        self._listener = listener
+        logger.info(f"Inference server listening on {self.socket_path}")
+        try:
+            while True:
+                try:
+                    conn = self._listener.accept()
+                except AuthenticationError:
+                    logger.warning("Rejected an inference client with a wrong authkey.")
+                    continue
+                except EOFError:
+                    # Client left during the handshake
+                    continue
+                except OSError:
+                    break
+                threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+        finally:
+            self.close()
+
+    def _serve(self, conn: Connection):
+        with conn:
+            while True:
+                try:
+                    method, args = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    conn.send(("ok", self.handle(method, args)))
+                except Exception as e:
+                    logger.exception(f"Inference request '{method}' failed")
+                    conn.send(("error", str(e)))
+
+    def close(self):
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+
+class InferenceClient:
+    """Calls an InferenceServer, with one connection per calling thread."""
+
+    def __init__(self, socket_path: str, authkey: str | None = None):
+        self.socket_path = socket_path
+        self.authkey = _authkey(authkey)
+        self._local = threading.local()
+
+    def call(self, method: str, *args) -> np.ndarray:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = Client(self.socket_path, family="AF_UNIX", authkey=self.authkey)
+            self._local.conn = conn
+        try:
+            conn.send((method, args))
+            status, result = conn.recv()
+        except (EOFError, OSError):
+            # Server restarted: the next call reconnects
+            self._local.conn = None
+            conn.close()
+            raise
+        if status == "error":
+            raise RuntimeError(f"Inference server error: {result}")
+        return result
+
+
+class RemoteEmbeddings(Embeddings):
+    """Embeddings computed by the shared inference server."""
+
+    def __init__(self, client: InferenceClient):
+        self.client = client
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.client.call("embed_documents", texts).tolist()
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.client.call("embed_query", text).tolist()
+
+
+class RemoteCrossEncoder:
+    """Stands in for a CrossEncoder, scoring pairs on the shared inference server."""
+
+    def __init__(self, client: InferenceClient):
+        self.client = client
+
+    def predict(self, pairs: list[list[str]], batch_size: int = 32) -> np.ndarray:
+        return self.client.call("rerank", pairs, batch_size)
@@ -0,0 +1,251 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+# A recorder receives (stage, duration in seconds, labels) for every timed stage
+Recorder = Callable[[str, float, dict], None]
+
+_recorders: list[Recorder] = []
+
+
+def add_recorder(recorder: Recorder):
+    """Registers a recorder. Timing is a no-op while no recorder is registered."""
+    if recorder not in _recorders:
+        _recorders.append(recorder)
+
+
+def remove_recorder(recorder: Recorder):
+    """Unregisters a recorder."""
+    if recorder in _recorders:
+        _recorders.remove(recorder)
+
+
+def record(stage: str, duration: float, **labels):
+    """Sends a measured duration to all registered recorders."""
+    for recorder in list(_recorders):
+        try:
+            recorder(stage, duration, labels)
+        except Exception:
+            logger.exception(f"Recorder failed for stage '{stage}'")
+
+
+@contextmanager
+def timed(stage: str, **labels):
+    """Times the enclosed block as `stage` (e.g. embed, search, rerank, format)."""
+    if not _recorders:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - start, **labels)
+
+
+class StageCollector:
+    """Recorder that keeps every duration in memory, grouped by stage (for benchmarks)."""
+
+    def __init__(self):
+        self.durations: dict[str, list[float]] = {}
+
+    def __call__(self, stage: str, duration: float, labels: dict):
+        self.durations.setdefault(stage, []).append(duration)
+
+    def __enter__(self) -> "StageCollector":
+        add_recorder(self)
+        return self
+
+    def __exit__(self, *exc):
+        remove_recorder(self)
+
+    def reset(self):
+        self.durations = {}
+
+
+# Prometheus default buckets, extended for multi-second LLM turns
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+
+class Histogram:
+    """Cumulative histogram per label set, rendered in the Prometheus text format."""
+
+    def __init__(self, name: str, description: str, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        # label items -> [bucket counts..., sum, count]
+        self._series: dict[tuple, list[float]] = {}
+
+    def observe(self, value: float, labels: dict):
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} histogram",
+        ]
+        for key, series in sorted(self._series.items()):
+            labels = [f'{k}="{v}"' for k, v in key]
+            for bound, count in zip(self.buckets, series):
+                bucket_labels = ",".join(labels + [f'le="{bound}"'])
+                lines.append(f"{self.name}_bucket{{{bucket_labels}}} {count}")
+            inf_labels = ",".join(labels + ['le="+Inf"'])
+            lines.append(f"{self.name}_bucket{{{inf_labels}}} {series[-1]}")
+            suffix = "{" + ",".join(labels) + "}" if labels else ""
+            lines.append(f"{self.name}_sum{suffix} {series[-2]}")
+            lines.append(f"{self.name}_count{suffix} {series[-1]}")
+        return lines
+
+
+class Value:
+    """Counter or gauge per label set, rendered in the Prometheus text format."""
+
+    def __init__(self, name: str, description: str, kind: str):
+        self.name = name
+        self.description = description
+        self.kind = kind
+        self._series: dict[tuple, float] = {}
+
+    def add(self, value: float, labels: dict):
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        self._series[key] = self._series.get(key, 0) + value
+
+    def set(self, value: float, labels: dict):
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        self._series[key] = value
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        for key, value in sorted(self._series.items()):
+            labels = ",".join(f'{k}="{v}"' for k, v in key)
+            suffix = "{" + labels + "}" if labels else ""
+            lines.append(f"{self.name}{suffix} {value}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Aggregates timed stages (as a recorder) and ad-hoc observations into histograms,
+    counters and gauges exposed on /metrics. Updates are dropped until enabled.
+    """
+
+    def __init__(self, namespace: str = "rag_on_tap"):
+        self.namespace = namespace
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._metrics: dict[str, Histogram | Value] = {}
+        # Called before each render, to sample state such as pool usage
+        self._collectors: list[Callable[[], None]] = []
+
+    def enable(self):
+        self.enabled = True
+        add_recorder(self)
+
+    def disable(self):
+        self.enabled = False
+        remove_recorder(self)
+
+    def __call__(self, stage: str, duration: float, labels: dict):
+        self.observe(
+            "stage_duration_seconds",
+            duration,
+            description="Duration of each processing stage of a chat turn.",
+            stage=stage,
+            **labels,
+        )
+
+    def observe(
+        self,
+        name: str,
+        value: float,
+        description: str = "",
+        buckets=DEFAULT_BUCKETS,
+        **labels,
+    ):
+        """Adds a value to the `<namespace>_<name>` histogram."""
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._metrics.get(name)
+            if histogram is None:
+                histogram = self._metrics[name] = Histogram(
+                    f"{self.namespace}_{name}", description or name, buckets
+                )
+            histogram.observe(value, labels)
+
+    def increment(self, name: str, value: float = 1, description: str = "", **labels):
+        """Increments the `<namespace>_<name>` counter."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._value(name, description, "counter").add(value, labels)
+
+    def set_gauge(self, name: str, value: float, description: str = "", **labels):
+        """Sets the `<namespace>_<name>` gauge."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._value(name, description, "gauge").set(value, labels)
+
+    def _value(self, name: str, description: str, kind: str) -> Value:
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = Value(
+                f"{self.namespace}_{name}", description or name, kind
+            )
+        return metric
+
+    def add_collector(self, collector: Callable[[], None]):
+        """Registers a callback that updates gauges or counters at scrape time."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Returns all metrics in the Prometheus text exposition format."""
+        for collector in list(self._collectors):
+            try:
+                collector()
+            except Exception:
+                logger.exception("Metrics collector failed")
+        with self._lock:
+            lines = []
+            for name in sorted(self._metrics):
+                lines.extend(self._metrics[name].render())
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._metrics = {}
+
+
+# Process-wide registry, enabled by the API when METRICS_ENABLED is set
+metrics = MetricsRegistry()
@@ -0,0 +1,100 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def hash_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def schema_hash(schema: dict) -> str:
+    """Hash of a JSON schema (e.g. model_json_schema()), independent of key order."""
+    return hash_text(json.dumps(schema, sort_keys=True, separators=(",", ":")))
+
+
+class LLMCacheService:
+    """
+    Structured LLM outputs persisted in SQLite, keyed on (model, temperature, prompt
+    hash, schema hash). A byte-identical prompt sent to the same model with the same
+    output schema is answered from disk; any change to one of them is a miss.
+    """
+
+    TABLE_NAME = "llm_responses"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.TABLE_NAME} (
+                model TEXT NOT NULL,
+                temperature REAL NOT NULL,
+                prompt_hash TEXT NOT NULL,
+                schema_hash TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (model, temperature, prompt_hash, schema_hash)
+            )
+            """)
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def get(
+        self, model: str, temperature: float, prompt: str, schema: str
+    ) -> dict | None:
+        """Stored output for the key, or None. schema is a schema_hash()."""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT response FROM {self.TABLE_NAME} WHERE model = ? "
+                "AND temperature = ? AND prompt_hash = ? AND schema_hash = ?",
+                (model, temperature, hash_text(prompt), schema),
+            ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(
+        self, model: str, temperature: float, prompt: str, schema: str, response: dict
+    ):
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.TABLE_NAME} "
+                "(model, temperature, prompt_hash, schema_hash, response, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    model,
+                    temperature,
+                    hash_text(prompt),
+                    schema,
+                    json.dumps(response),
+                    time.time(),
+                ),
+            )
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT COUNT(*) FROM {self.TABLE_NAME}"
+            ).fetchone()[0]
+
+    def stats(self) -> str:
+        lookups = self.hits + self.misses
+        rate = self.hits / lookups if lookups else 0.0
+        return (
+            f"{self.hits} hits, {self.misses} misses ({rate:.0%} hit rate), "
+            f"{len(self)} entries in {self.path}"
+        )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
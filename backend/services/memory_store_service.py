@@ -0,0 +1,176 @@
+import logging
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from services.filters import filter_mask, matches_condition
+from services.instrumentation import timed
+from services.quantization import normalize, top_k
+from services.storage_service import StorageService
+
+logger = logging.getLogger(__name__)
+
+
+class _VectorIndex:
+    """Normalized embedding matrix plus the documents it was computed from."""
+
+    def __init__(self):
+        self.documents: list[Document] = []
+        self.matrix = np.zeros((0, 0), dtype=np.float32)
+
+    def add(self, documents: list[Document], vectors: list[list[float]]):
+        vectors = normalize(vectors)
+        self.matrix = (
+            vectors if not self.documents else np.vstack([self.matrix, vectors])
+        )
+        self.documents.extend(documents)
+
+    def search(self, embedding: list[float], k: int, filter: dict | None) -> list:
+        """Returns (Document, cosine distance, vector) tuples, closest first."""
+        if not self.documents:
+            return []
+
+        similarities = self.matrix @ normalize(embedding)
+
+        if filter:
+            mask = filter_mask(filter, len(self.documents), self._field_mask)
+            similarities = np.where(mask, similarities, -np.inf)
+
+        return [
+            (self.documents[i], float(1.0 - similarities[i]), self.matrix[i])
+            for i in top_k(similarities, k)
+            if np.isfinite(similarities[i])
+        ]
+
+    def _field_mask(self, field: str, operator: str, operand) -> np.ndarray:
+        return np.fromiter(
+            (
+                matches_condition(doc.metadata.get(field), operator, operand)
+                for doc in self.documents
+            ),
+            dtype=bool,
+            count=len(self.documents),
+        )
+
+
+class InMemoryStoreService(StorageService):
+    """In-process vector index with the same search interface as VectorStoreService."""
+
+    def __init__(self, embeddings: Embeddings, two_tier: bool = False):
+        self.embeddings = embeddings
+        self.two_tier = two_tier
+        self._chunks = _VectorIndex()
+        self._recipes = _VectorIndex()
+
+    def _add(self, index: _VectorIndex, documents: list[Document], batch_size: int):
+        for i in range(0, len(documents), batch_size):
+            batch = documents[i : i + batch_size]
+            vectors = self.embeddings.embed_documents([d.page_content for d in batch])
+            index.add(batch, vectors)
+
+    def add_documents(self, documents: list[Document], batch_size: int = 100):
+        """Embeds and indexes documents in memory."""
+        if not documents:
+            return
+        logger.info(f"Indexing {len(documents)} documents in memory...")
+        self._add(self._chunks, documents, batch_size)
+
+    def add_embeddings(self, documents: list[Document], vectors, batch_size: int = 100):
+        """Indexes documents with precomputed vectors in memory."""
+        if not documents:
+            return
+        self._chunks.add(documents, vectors)
+
+    def add_recipe_summaries(
+        self, documents: list[Document], batch_size: int = 100, vectors=None
+    ):
+        """Embeds (unless vectors are given) and indexes recipe summaries for two-tier search."""
+        if not documents:
+            return
+        if not self.two_tier:
+            raise ValueError("Recipe summaries require two_tier=True.")
+        if vectors is not None:
+            self._recipes.add(documents, vectors)
+        else:
+            self._add(self._recipes, documents, batch_size)
+
+    def embed_query(self, query: str) -> list[float]:
+        """Embeds a search query."""
+        with timed("embed"):
+            return self.embeddings.embed_query(query)
+
+    def similarity_search(self, query: str, k: int = 3, filter: dict | None = None):
+        """Performs a similarity search and returns documents with scores."""
+        return self.similarity_search_by_vector(self.embed_query(query), k, filter)
+
+    def similarity_search_by_vector(
+        self, embedding: list[float], k: int = 3, filter: dict | None = None
+    ):
+        """Flat similarity search for a precomputed embedding."""
+        with timed("search"):
+            return [(d, s) for d, s, _ in self._chunks.search(embedding, k, filter)]
+
+    def two_tier_search(
+        self,
+        query: str,
+        k: int = 3,
+        filter: dict | None = None,
+        recipe_k: int = 20,
+    ):
+        """Selects candidate recipes on the coarse index, then searches only their chunks."""
+        return self.two_tier_search_by_vector(
+            self.embed_query(query), k=k, filter=filter, recipe_k=recipe_k
+        )
+
+    def two_tier_search_by_vector(
+        self,
+        embedding: list[float],
+        k: int = 3,
+        filter: dict | None = None,
+        recipe_k: int = 20,
+    ):
+        """Two-tier search for a precomputed embedding."""
+        with timed("search"):
+            chunk_filter = self._restrict_to_recipes(embedding, filter, recipe_k)
+            if chunk_filter is None:
+                return []
+            return [
+                (d, s) for d, s, _ in self._chunks.search(embedding, k, chunk_filter)
+            ]
+
+    def _restrict_to_recipes(
+        self, embedding: list[float], filter: dict | None, recipe_k: int
+    ) -> dict | None:
+        if not self.two_tier:
+            raise ValueError("Two-tier search requires two_tier=True.")
+        recipes = self._recipes.search(embedding, recipe_k, filter)
+        beer_ids = list(
+            dict.fromkeys(
+                d.metadata["beer_id"]
+                for d, _, _ in recipes
+                if d.metadata.get("beer_id")
+            )
+        )
+        if not beer_ids:
+            return None
+        chunk_filter = {"beer_id": {"$in": beer_ids}}
+        return {"$and": [filter, chunk_filter]} if filter else chunk_filter
+
+    def similarity_search_with_embeddings(
+        self,
+        query: str,
+        k: int = 30,
+        filter: dict | None = None,
+        recipe_k: int | None = None,
+        embedding: list[float] | None = None,
+    ):
+        """Returns (query_embedding, [(Document, score, embedding), ...])."""
+        if embedding is None:
+            embedding = self.embed_query(query)
+        with timed("search"):
+            if recipe_k is not None:
+                filter = self._restrict_to_recipes(embedding, filter, recipe_k)
+                if filter is None:
+                    return embedding, []
+            return embedding, self._chunks.search(embedding, k, filter)
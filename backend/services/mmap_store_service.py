@@ -0,0 +1,595 @@
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from datetime import datetime
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from services.filters import COMPARISONS, filter_mask, text_value
+from services.instrumentation import timed
+from services.quantization import (
+    PREFILTERS,
+    binary_codes,
+    hamming_distances,
+    quantize_int8,
+    top_k,
+    truncate,
+)
+from services.storage_service import StorageService
+
+logger = logging.getLogger(__name__)
+
+# Metadata fields stored as NumPy columns, the only ones filters can use
+CATEGORICAL_FIELDS = ("style", "beer_id")
+NUMERIC_FIELDS = ("abv", "ibu")
+DTYPES = ("float16", "int8")
+
+CURRENT_FILE = "CURRENT"
+SNAPSHOTS_DIR = "snapshots"
+# Rows scored per matrix product, bounding the float32 copy of the stored vectors
+BLOCK_ROWS = 16384
+
+
+def _number(value) -> float:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    # Like PGVector, non-numeric values (e.g. an empty ABV) never match comparisons
+    return np.nan
+
+
+class _IndexWriter:
+    """Writes one index (vectors, metadata columns and documents) of a snapshot."""
+
+    def __init__(
+        self,
+        directory: str,
+        count: int,
+        dim: int,
+        dtype: str,
+        vocab: dict[str, dict],
+        prefilter: str | None = None,
+        prefilter_dim: int | None = None,
+    ):
+        os.makedirs(directory)
+        self.directory = directory
+        self.count = count
+        self.dim = dim
+        self.dtype = dtype
+        self.vocab = vocab
+        self.vectors = np.lib.format.open_memmap(
+            os.path.join(directory, "vectors.npy"),
+            mode="w+",
+            dtype=np.float16 if dtype == "float16" else np.int8,
+            shape=(count, dim),
+        )
+        self.scales = np.ones(count, dtype=np.float32)
+        self.prefilter = prefilter
+        self.prefilter_dim = prefilter_dim
+        if prefilter is not None:
+            self.prefilter_codes = np.lib.format.open_memmap(
+                os.path.join(directory, "prefilter.npy"),
+                mode="w+",
+                dtype=np.uint8 if prefilter == "binary" else np.int8,
+                shape=(
+                    count,
+                    -(-prefilter_dim // 8) if prefilter == "binary" else prefilter_dim,
+                ),
+            )
+            self.prefilter_scales = np.ones(count, dtype=np.float32)
+        self.columns = {field: [] for field in CATEGORICAL_FIELDS + NUMERIC_FIELDS}
+        self.offsets = [0]
+        self.documents = open(os.path.join(directory, "documents.jsonl"), "wb")
+        self.written = 0
+
+    def add(self, documents: list[Document], vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        rows = slice(self.written, self.written + len(documents))
+        if self.prefilter == "binary":
+            self.prefilter_codes[rows] = binary_codes(
+                truncate(vectors, self.prefilter_dim)
+            )
+        elif self.prefilter == "int8":
+            self.prefilter_codes[rows], self.prefilter_scales[rows] = quantize_int8(
+                truncate(vectors, self.prefilter_dim)
+            )
+
+        vectors = truncate(vectors, self.dim)
+        if self.dtype == "int8":
+            self.vectors[rows], self.scales[rows] = quantize_int8(vectors)
+        else:
+            self.vectors[rows] = vectors.astype(np.float16)
+
+        for doc in documents:
+            for field in CATEGORICAL_FIELDS:
+                value = doc.metadata.get(field)
+                codes = self.vocab[field]
+                if value is None or value == "":
+                    self.columns[field].append(-1)
+                else:
+                    self.columns[field].append(
+                        codes.setdefault(text_value(value), len(codes))
+                    )
+            for field in NUMERIC_FIELDS:
+                self.columns[field].append(_number(doc.metadata.get(field)))
+
+            line = json.dumps(
+                {"page_content": doc.page_content, "metadata": doc.metadata}
+            ).encode("utf-8")
+            self.documents.write(line + b"\n")
+            self.offsets.append(self.offsets[-1] + len(line) + 1)
+        self.written += len(documents)
+
+    def close(self):
+        if self.written != self.count:
+            raise ValueError(f"Expected {self.count} documents, got {self.written}.")
+        self.vectors.flush()
+        del self.vectors
+        self.documents.close()
+        np.save(os.path.join(self.directory, "scales.npy"), self.scales)
+        if self.prefilter is not None:
+            self.prefilter_codes.flush()
+            del self.prefilter_codes
+            np.save(
+                os.path.join(self.directory, "prefilter_scales.npy"),
+                self.prefilter_scales,
+            )
+        np.save(os.path.join(self.directory, "offsets.npy"), np.array(self.offsets))
+        for field in CATEGORICAL_FIELDS:
+            np.save(
+                os.path.join(self.directory, f"{field}.npy"),
+                np.array(self.columns[field], dtype=np.int32),
+            )
+        for field in NUMERIC_FIELDS:
+            np.save(
+                os.path.join(self.directory, f"{field}.npy"),
+                np.array(self.columns[field], dtype=np.float32),
+            )
+
+
+class SnapshotWriter:
+    """
+    Builds a new snapshot under `<root>/snapshots/` and publishes it by atomically
+    replacing `<root>/CURRENT`, which running MmapStoreServices poll for hot reload.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        dim: int,
+        dtype: str = "float16",
+        keep: int = 2,
+        prefilter: str | None = None,
+        prefilter_dim: int | None = None,
+    ):
+        if dtype not in DTYPES:
+            raise ValueError(f"Unsupported index dtype '{dtype}', expected {DTYPES}.")
+        if prefilter is not None and prefilter not in PREFILTERS:
+            raise ValueError(
+                f"Unsupported prefilter '{prefilter}', expected {PREFILTERS}."
+            )
+        self.root = root
+        # Vectors wider than dim are truncated (Matryoshka) when added
+        self.dim = dim
+        self.dtype = dtype
+        self.prefilter = prefilter
+        self.prefilter_dim = min(prefilter_dim or dim, dim)
+        # Older snapshots kept for rollback and for servers still mapping them
+        self.keep = keep
+        # Sortable by publication time
+        self.name = f"{datetime.now():%Y%m%dT%H%M%S%f}-{uuid.uuid4().hex[:8]}"
+        self.directory = os.path.join(root, SNAPSHOTS_DIR, self.name)
+        self.vocab: dict[str, dict] = {field: {} for field in CATEGORICAL_FIELDS}
+        self.counts: dict[str, int] = {}
+        self._writers: list[_IndexWriter] = []
+
+    def index(self, name: str, count: int) -> _IndexWriter:
+        """Starts the "chunks" or "recipes" index of the snapshot."""
+        writer = _IndexWriter(
+            os.path.join(self.directory, name),
+            count,
+            self.dim,
+            self.dtype,
+            self.vocab,
+            prefilter=self.prefilter,
+            prefilter_dim=self.prefilter_dim,
+        )
+        self.counts[name] = count
+        self._writers.append(writer)
+        return writer
+
+    def publish(self) -> str:
+        for writer in self._writers:
+            writer.close()
+        manifest = {
+            "dim": self.dim,
+            "dtype": self.dtype,
+            "prefilter": self.prefilter,
+            "prefilter_dim": self.prefilter_dim if self.prefilter else None,
+            "counts": self.counts,
+            # Code -> value, per categorical column
+            "vocab": {
+                field: sorted(codes, key=codes.get)
+                for field, codes in self.vocab.items()
+            },
+            "created_at": time.time(),
+        }
+        with open(os.path.join(self.directory, "manifest.json"), "w") as f:
+            json.dump(manifest, f)
+
+        current = os.path.join(self.root, CURRENT_FILE)
+        with open(current + ".tmp", "w") as f:
+            f.write(self.name)
+        os.replace(current + ".tmp", current)
+        logger.info(f"Published index snapshot {self.name} ({self.counts}).")
+        self._collect_garbage()
+        return self.directory
+
+    def _collect_garbage(self):
+        # Servers still mapping a deleted snapshot keep reading it until they reload
+        snapshots = sorted(os.listdir(os.path.join(self.root, SNAPSHOTS_DIR)))
+        for name in snapshots[: -self.keep]:
+            if name != self.name:
+                shutil.rmtree(os.path.join(self.root, SNAPSHOTS_DIR, name))
+
+
+def write_snapshot(
+    root: str,
+    documents: list[Document],
+    vectors,
+    dtype: str = "float16",
+    recipe_documents: list[Document] | None = None,
+    recipe_vectors=None,
+    dim: int | None = None,
+    prefilter: str | None = None,
+    prefilter_dim: int | None = None,
+) -> str:
+    """Writes and publishes a snapshot from in-memory documents and vectors."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    writer = SnapshotWriter(
+        root,
+        dim=min(dim or vectors.shape[1], vectors.shape[1]),
+        dtype=dtype,
+        prefilter=prefilter,
+        prefilter_dim=prefilter_dim,
+    )
+    writer.index("chunks", len(documents)).add(documents, vectors)
+    if recipe_documents:
+        writer.index("recipes", len(recipe_documents)).add(
+            recipe_documents, recipe_vectors
+        )
+    return writer.publish()
+
+
+class _MmapIndex:
+    """One memory-mapped index of a snapshot."""
+
+    def __init__(self, directory: str, manifest: dict):
+        def load(name: str, mmap: bool = True) -> np.ndarray:
+            return np.load(
+                os.path.join(directory, f"{name}.npy"), mmap_mode="r" if mmap else None
+            )
+
+        self.vectors = load("vectors")
+        self.count, self.dim = self.vectors.shape
+        self.quantized = self.vectors.dtype == np.int8
+        self.scales = load("scales", mmap=False) if self.quantized else None
+        # Optional compact copy of the vectors scanned first, then rescored exactly
+        self.prefilter = manifest.get("prefilter")
+        if self.prefilter is not None:
+            self.prefilter_dim = manifest["prefilter_dim"]
+            self.prefilter_codes = load("prefilter")
+            self.prefilter_scales = load("prefilter_scales", mmap=False)
+        self.offsets = load("offsets", mmap=False)
+        self.columns = {
+            field: load(field, mmap=False)
+            for field in CATEGORICAL_FIELDS + NUMERIC_FIELDS
+        }
+        self.codes = {
+            field: {value: code for code, value in enumerate(values)}
+            for field, values in manifest["vocab"].items()
+        }
+        path = os.path.join(directory, "documents.jsonl")
+        self.documents = (
+            np.memmap(path, dtype=np.uint8, mode="r")
+            if os.path.getsize(path)
+            else np.zeros(0, dtype=np.uint8)
+        )
+
+    def search(
+        self,
+        embedding: list[float],
+        k: int,
+        filter: dict | None,
+        rescore_factor: int = 10,
+    ) -> list:
+        """Returns (Document, cosine distance, vector) tuples, closest first."""
+        if not self.count:
+            return []
+        query = truncate(embedding, self.dim)
+
+        rows = None
+        if filter:
+            rows = np.flatnonzero(filter_mask(filter, self.count, self._field_mask))
+            if not len(rows):
+                return []
+        candidates = k * rescore_factor
+        if self.prefilter and candidates < (self.count if rows is None else len(rows)):
+            rows = self._prefilter(embedding, rows, candidates)
+        similarities = self._similarities(query, rows)
+
+        results = []
+        for i in top_k(similarities, k):
+            row = int(rows[i]) if rows is not None else int(i)
+            results.append(
+                (self.document(row), float(1.0 - similarities[i]), self.vector(row))
+            )
+        return results
+
+    def _similarities(self, query: np.ndarray, rows: np.ndarray | None) -> np.ndarray:
+        def score(block: np.ndarray, index) -> np.ndarray:
+            similarities = block.astype(np.float32) @ query
+            return similarities * self.scales[index] if self.quantized else similarities
+
+        return self._scan(self.vectors, rows, score)
+
+    def _prefilter(
+        self, embedding: list[float], rows: np.ndarray | None, candidates: int
+    ) -> np.ndarray:
+        """Selects the candidates closest to the query on the prefilter codes."""
+        query = truncate(embedding, self.prefilter_dim)
+        if self.prefilter == "binary":
+            query_code = binary_codes(query)
+
+            def score(block: np.ndarray, index) -> np.ndarray:
+                return -hamming_distances(block, query_code).astype(np.float32)
+
+        else:
+
+            def score(block: np.ndarray, index) -> np.ndarray:
+                return (block.astype(np.float32) @ query) * self.prefilter_scales[index]
+
+        scores = self._scan(self.prefilter_codes, rows, score)
+        top = np.argpartition(-scores, candidates - 1)[:candidates]
+        # Ascending rows keep the rescoring reads sequential in the mapped file
+        return np.sort(top if rows is None else rows[top])
+
+    def _scan(self, matrix: np.ndarray, rows: np.ndarray | None, score) -> np.ndarray:
+        """Scores the given rows, or every row block by block."""
+        if rows is not None:
+            # Selected rows only: fancy indexing reads just those pages
+            return score(matrix[rows], rows)
+        scores = np.empty(self.count, dtype=np.float32)
+        for start in range(0, self.count, BLOCK_ROWS):
+            block = slice(start, start + BLOCK_ROWS)
+            scores[block] = score(matrix[block], block)
+        return scores
+
+    def _field_mask(self, field: str, operator: str, operand) -> np.ndarray:
+        """Evaluates one filter condition on the metadata columns."""
+        column = self.columns.get(field)
+        if column is None:
+            raise ValueError(f"Field '{field}' is not indexed for filtering.")
+
+        if field in CATEGORICAL_FIELDS:
+            codes = self.codes[field]
+            if operator in ("$in", "$nin"):
+                hits = np.isin(column, [codes.get(text_value(v), -2) for v in operand])
+                return hits if operator == "$in" else (column >= 0) & ~hits
+            if operator in ("$eq", "$ne"):
+                code = (
+                    codes.get(text_value(operand), -2)
+                    if isinstance(operand, str)
+                    else -2
+                )
+                if operator == "$eq":
+                    return column == code
+                return (column >= 0) & (column != code)
+        elif operator in COMPARISONS:
+            if np.isnan(_number(operand)):
+                return np.zeros(self.count, dtype=bool)
+            return COMPARISONS[operator](column, operand) & ~np.isnan(column)
+        raise ValueError(f"Unsupported filter operator '{operator}' on '{field}'.")
+
+    def document(self, row: int) -> Document:
+        line = bytes(self.documents[self.offsets[row] : self.offsets[row + 1]])
+        data = json.loads(line)
+        return Document(page_content=data["page_content"], metadata=data["metadata"])
+
+    def vector(self, row: int) -> np.ndarray:
+        vector = self.vectors[row].astype(np.float32)
+        return vector * self.scales[row] if self.quantized else vector
+
+
+class _Snapshot:
+    def __init__(self, root: str, name: str):
+        self.name = name
+        directory = os.path.join(root, SNAPSHOTS_DIR, name)
+        with open(os.path.join(directory, "manifest.json")) as f:
+            self.manifest = json.load(f)
+        self.chunks = _MmapIndex(os.path.join(directory, "chunks"), self.manifest)
+        self.recipes = (
+            _MmapIndex(os.path.join(directory, "recipes"), self.manifest)
+            if "recipes" in self.manifest["counts"]
+            else None
+        )
+
+
+class MmapStoreService(StorageService):
+    """
+    In-process vector index served from memory-mapped float16 or int8 snapshots, with
+    the same search interface as VectorStoreService. Snapshots are exported from
+    PGVector (utilities/export_index.py) and picked up without restart.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        embeddings: Embeddings,
+        two_tier: bool = False,
+        reload_interval: float = 5.0,
+        dtype: str = "float16",
+        rescore_factor: int = 10,
+    ):
+        self.root = root
+        self.embeddings = embeddings
+        self.two_tier = two_tier
+        self.reload_interval = reload_interval
+        self.dtype = dtype
+        # Candidates per result kept by a snapshot's quantized prefilter
+        self.rescore_factor = rescore_factor
+        self._lock = threading.Lock()
+        self._snapshot: _Snapshot | None = None
+        self._checked_at = 0.0
+        self.reload()
+
+    def reload(self) -> bool:
+        """Switches to the published snapshot if it changed. Returns True on switch."""
+        self._checked_at = time.monotonic()
+        try:
+            with open(os.path.join(self.root, CURRENT_FILE)) as f:
+                name = f.read().strip()
+        except FileNotFoundError:
+            return False
+        if self._snapshot is not None and self._snapshot.name == name:
+            return False
+        with self._lock:
+            if self._snapshot is not None and self._snapshot.name == name:
+                return False
+            # In-flight searches keep their reference to the previous snapshot
+            self._snapshot = _Snapshot(self.root, name)
+        logger.info(f"Loaded index snapshot {name}.")
+        return True
+
+    def _current(self) -> _Snapshot:
+        if time.monotonic() - self._checked_at >= self.reload_interval:
+            self.reload()
+        if self._snapshot is None:
+            raise RuntimeError(f"No index snapshot published in '{self.root}'.")
+        return self._snapshot
+
+    def add_documents(self, documents: list[Document], batch_size: int = 100):
+        """Embeds the documents and publishes them as a new (chunk-only) snapshot."""
+        if not documents:
+            return
+        logger.info(f"Indexing {len(documents)} documents into {self.root}...")
+        vectors = []
+        for i in range(0, len(documents), batch_size):
+            batch = documents[i : i + batch_size]
+            vectors.extend(
+                self.embeddings.embed_documents([d.page_content for d in batch])
+            )
+        self.add_embeddings(documents, vectors)
+
+    def add_embeddings(self, documents: list[Document], vectors, batch_size: int = 100):
+        """Publishes documents with precomputed vectors as a new (chunk-only) snapshot."""
+        if not documents:
+            return
+        write_snapshot(self.root, documents, vectors, dtype=self.dtype)
+        self.reload()
+
+    def embed_query(self, query: str) -> list[float]:
+        """Embeds a search query."""
+        with timed("embed"):
+            return self.embeddings.embed_query(query)
+
+    def similarity_search(self, query: str, k: int = 3, filter: dict | None = None):
+        """Performs a similarity search and returns documents with scores."""
+        return self.similarity_search_by_vector(self.embed_query(query), k, filter)
+
+    def similarity_search_by_vector(
+        self, embedding: list[float], k: int = 3, filter: dict | None = None
+    ):
+        """Flat similarity search for a precomputed embedding."""
+        with timed("search"):
+            chunks = self._current().chunks
+            return [
+                (d, s)
+                for d, s, _ in chunks.search(embedding, k, filter, self.rescore_factor)
+            ]
+
+    def two_tier_search(
+        self,
+        query: str,
+        k: int = 3,
+        filter: dict | None = None,
+        recipe_k: int = 20,
+    ):
+        """Selects candidate recipes on the coarse index, then searches only their chunks."""
+        return self.two_tier_search_by_vector(
+            self.embed_query(query), k=k, filter=filter, recipe_k=recipe_k
+        )
+
+    def two_tier_search_by_vector(
+        self,
+        embedding: list[float],
+        k: int = 3,
+        filter: dict | None = None,
+        recipe_k: int = 20,
+    ):
+        """Two-tier search for a precomputed embedding."""
+        with timed("search"):
+            snapshot = self._current()
+            chunk_filter = self._restrict_to_recipes(
+                snapshot, embedding, filter, recipe_k
+            )
+            if chunk_filter is None:
+                return []
+            return [
+                (d, s)
+                for d, s, _ in snapshot.chunks.search(
+                    embedding, k, chunk_filter, self.rescore_factor
+                )
+            ]
+
+    def _restrict_to_recipes(
+        self,
+        snapshot: _Snapshot,
+        embedding: list[float],
+        filter: dict | None,
+        recipe_k: int,
+    ) -> dict | None:
+        if not self.two_tier or snapshot.recipes is None:
+            raise ValueError("Two-tier search requires a snapshot with recipes.")
+        recipes = snapshot.recipes.search(
+            embedding, recipe_k, filter, self.rescore_factor
+        )
+        beer_ids = list(
+            dict.fromkeys(
+                d.metadata["beer_id"]
+                for d, _, _ in recipes
+                if d.metadata.get("beer_id")
+            )
+        )
+        if not beer_ids:
+            return None
+        chunk_filter = {"beer_id": {"$in": beer_ids}}
+        return {"$and": [filter, chunk_filter]} if filter else chunk_filter
+
+    def similarity_search_with_embeddings(
+        self,
+        query: str,
+        k: int = 30,
+        filter: dict | None = None,
+        recipe_k: int | None = None,
+        embedding: list[float] | None = None,
+    ):
+        """Returns (query_embedding, [(Document, score, embedding), ...])."""
+        if embedding is None:
+            embedding = self.embed_query(query)
+        with timed("search"):
+            snapshot = self._current()
+            if recipe_k is not None:
+                filter = self._restrict_to_recipes(
+                    snapshot, embedding, filter, recipe_k
+                )
+                if filter is None:
+                    return embedding, []
+            results = snapshot.chunks.search(embedding, k, filter, self.rescore_factor)
+            # Same (possibly truncated) space as the returned chunk vectors
+            return truncate(embedding, snapshot.chunks.dim).tolist(), results
@@ -0,0 +1,142 @@
+import logging
+
+import numpy as np
+from langchain_core.documents import Document
+from pgvector.psycopg import register_vector
+from psycopg import sql
+from psycopg.types.json import Jsonb
+from psycopg_pool import ConnectionPool
+
+from services.filters import text_value
+
+logger = logging.getLogger(__name__)
+
+# Same jsonpath comparisons as PGVector, so both paths filter identically
+COMPARISONS = {
+    "$eq": "==",
+    "$ne": "!=",
+    "$lt": "<",
+    "$lte": "<=",
+    "$gt": ">",
+    "$gte": ">=",
+}
+
+
+class PgSearchService:
+    """
+    Similarity search over PGVector's tables with hand-written SQL: the query vector
+    is sent as a binary parameter, only the needed columns are read and the statements
+    are prepared on the server. Filters use the PGVector syntax; unsupported operators
+    raise NotImplementedError so callers can fall back to PGVector.
+    """
+
+    def __init__(self, pool: ConnectionPool, prepare: bool = True):
+        self.pool = pool
+        # Prepared statements are unavailable behind PgBouncer in transaction mode
+        self.prepare = prepare
+
+    def search(
+        self,
+        collection_name: str,
+        embedding: list[float],
+        k: int = 3,
+        filter: dict | None = None,
+        with_embeddings: bool = False,
+    ) -> list[tuple]:
+        """
+        Returns [(Document, cosine distance), ...] ordered by distance, or
+        [(Document, distance, embedding), ...] when with_embeddings is set.
+        """
+        where, params = translate_filter(filter) if filter else (sql.SQL("TRUE"), [])
+        columns = sql.SQL("id, document, cmetadata, embedding <=> %b AS distance")
+        if with_embeddings:
+            columns += sql.SQL(", embedding")
+        query = sql.SQL("""
+            SELECT {columns}
+            FROM langchain_pg_embedding
+            WHERE collection_id = (
+                SELECT uuid FROM langchain_pg_collection WHERE name = %s
+            )
+              AND {where}
+            ORDER BY distance
+            LIMIT %s
+            """).format(columns=columns, where=where)
+        vector = np.asarray(embedding, dtype=np.float32)
+        rows = self._fetch(query, [vector, collection_name, *params, k])
+
+        results = []
+        for row in rows:
+            # Rows come from our own table, so pydantic validation is skipped
+            doc = Document.model_construct(
+                id=row[0], page_content=row[1], metadata=row[2]
+            )
+            if with_embeddings:
+                results.append((doc, row[3], row[4]))
+            else:
+                results.append((doc, row[3]))
+        return results
+
+    def embeddings(self, ids: list[str]) -> dict[str, np.ndarray]:
+        """Stored embeddings of the given chunk ids."""
+        if not ids:
+            return {}
+        rows = self._fetch(
+            sql.SQL(
+                "SELECT id, embedding FROM langchain_pg_embedding WHERE id = ANY(%s)"
+            ),
+            [list(ids)],
+        )
+        return {row[0]: row[1] for row in rows}
+
+    def _fetch(self, query: sql.Composable, params: list) -> list[tuple]:
+        with self.pool.connection() as conn:
+            if conn.adapters.types.get("vector") is None:
+                # Once per pooled connection: binary vector dumpers and loaders
+                register_vector(conn)
+            with conn.cursor(binary=True) as cur:
+                return cur.execute(
+                    query, params, prepare=self.prepare or None
+                ).fetchall()
+
+
+def translate_filter(filter: dict) -> tuple[sql.Composable, list]:
+    """Translates a PGVector metadata filter into a SQL condition and its parameters."""
+    conditions, params = [], []
+    for key, value in filter.items():
+        if key in ("$and", "$or"):
+            parts = [translate_filter(clause) for clause in value]
+            joiner = sql.SQL(" AND " if key == "$and" else " OR ")
+            conditions.append(
+                sql.SQL("({})").format(joiner.join(part for part, _ in parts))
+            )
+            for _, part_params in parts:
+                params.extend(part_params)
+        elif key.startswith("$") or not key.isidentifier():
+            raise NotImplementedError(f"Unsupported filter key '{key}'")
+        else:
+            condition, condition_params = _field_condition(key, value)
+            conditions.append(condition)
+            params.extend(condition_params)
+    return sql.SQL(" AND ").join(conditions), params
+
+
+def _field_condition(field: str, value) -> tuple[sql.Composable, list]:
+    operator, operand = ("$eq", value)
+    if isinstance(value, dict):
+        if len(value) != 1:
+            raise NotImplementedError(f"Unsupported filter on '{field}': {value}")
+        operator, operand = next(iter(value.items()))
+
+    if operator in COMPARISONS:
+        # The field is a validated identifier and the operator comes from the table
+        path = sql.Literal(f"$.{field} {COMPARISONS[operator]} $value")
+        return (
+            sql.SQL("jsonb_path_match(cmetadata, {}::jsonpath, %s)").format(path),
+            [Jsonb({"value": operand})],
+        )
+    if operator in ("$in", "$nin"):
+        condition = sql.SQL("cmetadata ->> {} = ANY(%s)").format(sql.Literal(field))
+        if operator == "$nin":
+            condition = sql.SQL("NOT ({})").format(condition)
+        return condition, [[text_value(item) for item in operand]]
+    raise NotImplementedError(f"Unsupported filter operator '{operator}'")
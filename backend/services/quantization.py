@@ -0,0 +1,78 @@
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# Compact representations scanned before rescoring with the stored vectors
+PREFILTERS = ("binary", "int8")
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalizes the rows of a float matrix (zero rows are left as is)."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, highest first."""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.zeros(0, dtype=np.intp)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+def truncate(vectors, dim: int | None) -> np.ndarray:
+    """
+    Matryoshka truncation: keeps the first dim components and renormalizes. Qwen3
+    embeddings are trained so that these prefixes remain usable embeddings.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if dim is not None and dim < vectors.shape[-1]:
+        vectors = vectors[..., :dim]
+    return normalize(vectors)
+
+
+def quantize_int8(vectors: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-row quantization: vector ~= int8 codes * scale."""
+    scales = np.abs(vectors).max(axis=1) / 127
+    scales[scales == 0] = 1.0
+    codes = np.round(vectors / scales[:, None]).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def binary_codes(vectors: np.ndarray) -> np.ndarray:
+    """One sign bit per component, packed 8 per byte."""
+    return np.packbits(vectors > 0, axis=-1)
+
+
+def hamming_distances(codes: np.ndarray, query_code: np.ndarray) -> np.ndarray:
+    """Differing bits between each row of packed codes and a packed query."""
+    return np.bitwise_count(codes ^ query_code).sum(axis=1, dtype=np.int32)
+
+
+def embed_array(embeddings: Embeddings, texts: list[str]) -> np.ndarray:
+    """
+    Vectors of texts as a float32 matrix, without a round trip through Python lists
+    for models that can return one (embed_array).
+    """
+    if hasattr(embeddings, "embed_array"):
+        return embeddings.embed_array(texts)
+    return np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+
+
+class MatryoshkaEmbeddings(Embeddings):
+    """Truncates the vectors of another embedding model to its first dim components."""
+
+    def __init__(self, embeddings: Embeddings, dim: int):
+        self.embeddings = embeddings
+        self.dim = dim
+
+    def embed_array(self, texts: list[str]) -> np.ndarray:
+        return truncate(embed_array(self.embeddings, texts), self.dim)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.embed_array(texts).tolist()
+
+    def embed_query(self, text: str) -> list[float]:
+        return truncate(self.embeddings.embed_query(text), self.dim).tolist()
@@ -1,16 +1,28 @@
 import logging
+from contextvars import ContextVar
 from enum import Enum
 from typing import Type
 
 from langchain.tools import BaseTool
 from pydantic import BaseModel, Field
 
-from services.config_service import ConfigService
+from services.chunking_service import ChunkingService
+from services.collection_alias_service import CollectionAliasService
+from services.config_service import ConfigService, VectorBackend
+from services.database_service import DatabaseService
+from services.diversity_service import DiversityService
+from services.instrumentation import timed
+from services.mmap_store_service import MmapStoreService
 from services.reranker_service import RerankerService
-from services.vector_store_service import VectorStoreService
+from services.speculation_service import SpeculationService
+from services.vector_store_service import VectorStoreService, create_embeddings
 
 logger = logging.getLogger(__name__)
 
+# Set by the API for turns admitted under overload: the cross-encoder is skipped and
+# the best similarity-search results are used as is
+skip_rerank: ContextVar[bool] = ContextVar("skip_rerank", default=False)
+
 
 class StyleEnum(str, Enum):
     American_Brown_Ale = "American Brown Ale"
@@ -89,6 +101,13 @@ class BeerRAGTool(BaseTool):
     # Internal services
     _vector_store: VectorStoreService = None
     _reranker: RerankerService = None
+    _two_tier: bool = False
+    _coarse_recipe_k: int = 20
+    _diversity: DiversityService | None = None
+    _diversity_fetch_k: int = 30
+    _candidates: int = 10
+    _chunking: ChunkingService = None
+    _speculation: SpeculationService | None = None
 
     def __init__(
         self,
@@ -96,12 +115,71 @@ class BeerRAGTool(BaseTool):
         model_name: str,
         collection_name: str,
         rerank_model: str,
+        vector_store: VectorStoreService | None = None,
+        reranker: RerankerService | None = None,
+        database: DatabaseService | None = None,
+        aliases: CollectionAliasService | None = None,
     ):
+        """
+        vector_store and reranker can be injected (e.g. an in-process index for benchmarks).
+        With aliases, collection_name is resolved to its live version at query time.
+        """
         super().__init__()
-        self._vector_store = VectorStoreService(
-            config=config, model_name=model_name, collection_name=collection_name
+        self._chunking = ChunkingService()
+        self._two_tier = config.two_tier_retrieval
+        self._coarse_recipe_k = config.coarse_recipe_k
+        self._candidates = config.rerank_candidates
+        if vector_store is None and config.vector_backend == VectorBackend.MMAP:
+            vector_store = MmapStoreService(
+                config.mmap_index_dir,
+                create_embeddings(
+                    model_name,
+                    inference_socket=config.inference_socket,
+                    inference_authkey=config.inference_authkey,
+                ),
+                two_tier=self._two_tier,
+                reload_interval=config.mmap_reload_interval,
+                rescore_factor=config.mmap_rescore_factor,
+            )
+        self._vector_store = vector_store or VectorStoreService(
+            config=config,
+            model_name=model_name,
+            collection_name=collection_name,
+            two_tier=self._two_tier,
+            inference_socket=config.inference_socket,
+            inference_authkey=config.inference_authkey,
+            database=database,
+            native_search=config.native_search and database is not None,
+            dimensions=config.embedding_dimensions,
+            aliases=aliases,
         )
-        self._reranker = RerankerService(model_name=rerank_model)
+        self._reranker = reranker or RerankerService(
+            model_name=rerank_model,
+            inference_socket=config.inference_socket,
+            max_length=config.rerank_max_length,
+            batch_size=config.rerank_batch_size,
+            cascade=config.rerank_cascade,
+            cascade_keep=config.rerank_cascade_keep,
+            inference_authkey=config.inference_authkey,
+        )
+        if config.mmr_enabled:
+            self._diversity = DiversityService(
+                lambda_mult=config.mmr_lambda,
+                max_per_recipe=config.max_chunks_per_recipe,
+            )
+            self._diversity_fetch_k = max(config.mmr_fetch_k, self._candidates)
+        if config.speculative_retrieval:
+            self._speculation = SpeculationService(
+                embed=self.embed_query,
+                retrieve=lambda query, embedding: self._retrieve(
+                    query, None, embedding
+                ),
+                threshold=config.speculative_similarity,
+            )
+
+    def embed_query(self, query: str) -> list[float]:
+        """Embeds text with the retrieval embedding model (shared with other caches)."""
+        return self._vector_store.embed_query(query)
 
     def _get_recipe_url(self, beer_id: str) -> str:
         """Constructs the original Brewer's Friend URL from the beer ID."""
@@ -109,6 +187,48 @@ class BeerRAGTool(BaseTool):
             return "Unknown URL"
         return f"https://www.brewersfriend.com/homebrew/recipe/view/{beer_id}"
 
+    def _format_results(self, results: list) -> str:
+        """Groups reranked chunks by recipe and formats them for the LLM."""
+        # Group results by Recipe to avoid redundancy
+        # Key: beer_id, Value: {name, style, url, contents[]}
+        grouped: dict[str, dict] = {}
+
+        for doc, score in results:
+            meta = doc.metadata
+            bid = meta.get("beer_id")
+            if not bid:
+                continue
+
+            if bid not in grouped:
+                grouped[bid] = {
+                    "name": meta.get("name", "Unknown Recipe"),
+                    "style": meta.get("style", "Unknown Style"),
+                    "abv": meta.get("abv"),
+                    "ibu": meta.get("ibu"),
+                    "url": self._get_recipe_url(bid),
+                    "contents": [],
+                }
+
+            # The recipe heading carries the context, so only `Section: text` is kept
+            grouped[bid]["contents"].append(self._chunking.format_for_display(doc))
+
+        # Format output
+        formatted_outputs = []
+        for bid, data in grouped.items():
+            combined_content = "\n".join(f"- {c}" for c in data["contents"])
+            stats = ""
+            if data["abv"] not in (None, "") or data["ibu"] not in (None, ""):
+                stats = f"ABV: {data['abv']}% | IBU: {data['ibu']}\n"
+            output = (
+                f"--- Recipe: {data['name']} ({data['style']}) ---\n"
+                f"Source URL: {data['url']}\n"
+                f"{stats}"
+                f"Details:\n{combined_content}\n"
+            )
+            formatted_outputs.append(output)
+
+        return "\n".join(formatted_outputs)
+
     def _run(
         self,
         query: str,
@@ -148,55 +268,82 @@ class BeerRAGTool(BaseTool):
             else:
                 filter = None
 
-            # 1. Similarity search (candidates)
+            embedding = None
+            if filter is None and self._speculation is not None:
+                # Reuse the retrieval started for the raw user message if similar
+                embedding = self.embed_query(query)
+                speculative = self._speculation.match(embedding)
+                if speculative is not None:
+                    return speculative
+
+            return self._retrieve(query, filter, embedding)
+
+        except Exception as e:
+            logger.error(f"Error in BeerRAGTool: {e}")
+            return f"An error occurred while searching for recipes: {str(e)}"
+
+    def _retrieve(
+        self, query: str, filter: dict | None, embedding: list[float] | None = None
+    ) -> str:
+        """Search, rerank and format. A precomputed query embedding is reused if given."""
+        # 1. Similarity search (candidates)
+        if self._diversity is not None:
+            # Fetch a larger pool and keep a diverse subset for the reranker
+            query_embedding, candidates = (
+                self._vector_store.similarity_search_with_embeddings(
+                    query,
+                    k=self._diversity_fetch_k,
+                    filter=filter,
+                    recipe_k=self._coarse_recipe_k if self._two_tier else None,
+                    embedding=embedding,
+                )
+            )
+            with timed("select"):
+                initial_results = self._diversity.select(
+                    query_embedding, candidates, k=self._candidates
+                )
+        elif self._two_tier:
+            # Coarse recipe pass first, then chunks of the selected recipes only
+            if embedding is None:
+                initial_results = self._vector_store.two_tier_search(
+                    query,
+                    k=self._candidates,
+                    filter=filter,
+                    recipe_k=self._coarse_recipe_k,
+                )
+            else:
+                initial_results = self._vector_store.two_tier_search_by_vector(
+                    embedding,
+                    k=self._candidates,
+                    filter=filter,
+                    recipe_k=self._coarse_recipe_k,
+                )
+        elif embedding is None:
             initial_results = self._vector_store.similarity_search(
-                query, k=10, filter=filter
+                query, k=self._candidates, filter=filter
+            )
+        else:
+            initial_results = self._vector_store.similarity_search_by_vector(
+                embedding, k=self._candidates, filter=filter
             )
 
-            # 2. Rerank
+        # 2. Rerank
+        if skip_rerank.get():
+            results = initial_results[:3]
+        else:
             results = self._reranker.rerank(query, initial_results, top_k=3)
 
-            if not results:
-                return "No relevant beer recipes found for this query."
-
-            # 3. Group results by Recipe to avoid redundancy
-            # Key: beer_id, Value: {name, style, url, contents[]}
-            grouped: dict[str, dict] = {}
-
-            for doc, score in results:
-                meta = doc.metadata
-                bid = meta.get("beer_id")
-                if not bid:
-                    continue
-
-                if bid not in grouped:
-                    grouped[bid] = {
-                        "name": meta.get("name", "Unknown Recipe"),
-                        "style": meta.get("style", "Unknown Style"),
-                        "url": self._get_recipe_url(bid),
-                        "contents": [],
-                    }
-
-                # Use the page_content (which already has contextual headers from ChunkingService)
-                grouped[bid]["contents"].append(doc.page_content)
-
-            # 4. Format output
-            formatted_outputs = []
-            for bid, data in grouped.items():
-                # Join multiple snippets from the same recipe with double newlines
-                combined_content = "\n\n".join(data["contents"])
-                output = (
-                    f"--- Recipe: {data['name']} ({data['style']}) ---\n"
-                    f"Source URL: {data['url']}\n"
-                    f"Details:\n{combined_content}\n"
-                )
-                formatted_outputs.append(output)
+        if not results:
+            return "No relevant beer recipes found for this query."
 
-            return "\n".join(formatted_outputs)
+        # 3. Group by recipe and format
+        with timed("format"):
+            return self._format_results(results)
 
-        except Exception as e:
-            logger.error(f"Error in BeerRAGTool: {e}")
-            return f"An error occurred while searching for recipes: {str(e)}"
+    def speculate(self, query: str):
+        """Starts retrieving for the raw user message while the LLM picks its tool call."""
+        if self._speculation is not None:
+            self._speculation.start(query)
 
     async def _arun(
         self,
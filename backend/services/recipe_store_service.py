@@ -0,0 +1,91 @@
+import logging
+from contextlib import contextmanager
+
+import psycopg
+from psycopg.types.json import Jsonb
+from psycopg_pool import ConnectionPool
+
+from services.config_service import ConfigService
+
+logger = logging.getLogger(__name__)
+
+
+class RecipeStoreService:
+    """Stores recipe-level metadata once per recipe, referenced by compact chunks via beer_id."""
+
+    TABLE_NAME = "beer_recipe_metadata"
+
+    def __init__(
+        self,
+        config: ConfigService,
+        collection_name: str = "beer_recipes",
+        pool: ConnectionPool | None = None,
+    ):
+        self.collection_name = collection_name
+        self.connection_string = config.psycopg_connection_string
+        self.pool = pool
+        # Recipe metadata is immutable between ingestions, so reads are cached in-process
+        self._cache: dict[str, dict] = {}
+        self._table_ready = False
+
+    @contextmanager
+    def _connect(self):
+        if self.pool is not None:
+            with self.pool.connection() as conn:
+                yield conn
+        else:
+            with psycopg.connect(self.connection_string) as conn:
+                yield conn
+
+    def setup(self):
+        """Creates the recipe metadata table if it does not exist."""
+        if self._table_ready:
+            return
+        with self._connect() as conn:
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {self.TABLE_NAME} (
+                    collection_name TEXT NOT NULL,
+                    beer_id TEXT NOT NULL,
+                    metadata JSONB NOT NULL,
+                    PRIMARY KEY (collection_name, beer_id)
+                )
+                """)
+        self._table_ready = True
+
+    def upsert(self, recipes: dict[str, dict]):
+        """Inserts or replaces the metadata of the given recipes (beer_id -> metadata)."""
+        if not recipes:
+            return
+        self.setup()
+        with self._connect() as conn:
+            with conn.cursor() as cur:
+                cur.executemany(
+                    f"""
+                    INSERT INTO {self.TABLE_NAME} (collection_name, beer_id, metadata)
+                    VALUES (%s, %s, %s)
+                    ON CONFLICT (collection_name, beer_id)
+                    DO UPDATE SET metadata = EXCLUDED.metadata
+                    """,
+                    [
+                        (self.collection_name, beer_id, Jsonb(metadata))
+                        for beer_id, metadata in recipes.items()
+                    ],
+                )
+        for beer_id in recipes:
+            self._cache.pop(beer_id, None)
+        logger.info(f"Stored metadata for {len(recipes)} recipes.")
+
+    def get_many(self, beer_ids: list[str]) -> dict[str, dict]:
+        """Returns the metadata of the given recipes, keyed by beer_id."""
+        missing = [bid for bid in dict.fromkeys(beer_ids) if bid not in self._cache]
+        if missing:
+            with self._connect() as conn:
+                rows = conn.execute(
+                    f"SELECT beer_id, metadata FROM {self.TABLE_NAME} "
+                    "WHERE collection_name = %s AND beer_id = ANY(%s)",
+                    (self.collection_name, missing),
+                ).fetchall()
+            for beer_id, metadata in rows:
+                self._cache[beer_id] = metadata
+
+        return {bid: self._cache[bid] for bid in beer_ids if bid in self._cache}
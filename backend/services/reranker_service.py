@@ -1,27 +1,153 @@
 import logging
+import math
+import re
+from collections import Counter
 
 import torch
 from sentence_transformers import CrossEncoder
+from transformers import AutoTokenizer
+
+from services.chunking_service import ChunkingService
+from services.inference_service import InferenceClient, RemoteCrossEncoder
+from services.instrumentation import timed
 
 logger = logging.getLogger(__name__)
 
+# Cheap first stage of a reranking cascade, besides a small cross-encoder model name
+LEXICAL_CASCADE = "lexical"
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def load_cross_encoder(model_name: str, max_length: int | None = None) -> CrossEncoder:
+    """Loads the cross-encoder on GPU if available, with a pad token for batching."""
+    logger.info(f"Loading reranker model ({model_name})...")
+
+    # Use sentence-transformers directly for better control
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    model = CrossEncoder(
+        model_name, trust_remote_code=True, device=device, max_length=max_length
+    )
+
+    # Explicitly set pad_token to eos_token to fix the batching error
+    # Qwen3 models often don't have a default pad_token in their config
+    # (BERT-style cross-encoders have no eos_token and already pad)
+    if model.tokenizer.eos_token is not None:
+        model.tokenizer.pad_token = model.tokenizer.eos_token
+        model.model.config.pad_token_id = model.tokenizer.eos_token_id
+
+    logger.info(
+        f"Reranker initialized. Pad token: {model.tokenizer.pad_token} (ID: {model.model.config.pad_token_id})"
+    )
+    return model
+
+
+class LexicalScorer:
+    """
+    BM25 scores of (query, passage) pairs, with document frequencies taken from the
+    scored passages themselves. Same predict() interface as a CrossEncoder.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+
+    @staticmethod
+    def tokenize(text: str) -> list[str]:
+        return WORD_PATTERN.findall(text.lower())
+
+    def predict(self, pairs: list, batch_size: int | None = None) -> list[float]:
+        if not pairs:
+            return []
+        query_terms = set(self.tokenize(pairs[0][0]))
+        passages = [Counter(self.tokenize(passage)) for _, passage in pairs]
+        n = len(passages)
+        average_length = sum(sum(p.values()) for p in passages) / n or 1.0
+        idf = {}
+        for term in query_terms:
+            df = sum(1 for passage in passages if term in passage)
+            idf[term] = math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+        scores = []
+        for passage in passages:
+            norm = self.k1 * (
+                1 - self.b + self.b * sum(passage.values()) / average_length
+            )
+            scores.append(
+                sum(
+                    idf[term] * passage[term] * (self.k1 + 1) / (passage[term] + norm)
+                    for term in query_terms
+                    if term in passage
+                )
+            )
+        return scores
+
+
+def load_cascade(name: str | None):
+    """First stage of a reranking cascade: "lexical", a cross-encoder name, or None."""
+    if not name:
+        return None
+    if name == LEXICAL_CASCADE:
+        return LexicalScorer()
+    return load_cross_encoder(name)
+
 
 class RerankerService:
-    def __init__(self, model_name: str = "Qwen/Qwen3-Reranker-0.6B"):
-        logger.info(f"Loading reranker model ({model_name})...")
+    def __init__(
+        self,
+        model_name: str = "Qwen/Qwen3-Reranker-0.6B",
+        inference_socket: str | None = None,
+        max_length: int | None = None,
+        batch_size: int = 16,
+        cascade: str | None = None,
+        cascade_keep: int = 10,
+        inference_authkey: str | None = None,
+    ):
+        """
+        With inference_socket, pairs are scored by the shared inference server, which
+        requires inference_authkey.
+        max_length bounds query + passage tokens: passages keep their header and the
+        start of their section text. Pairs are sorted by length and scored batch_size
+        at a time, so each batch is only padded to similar lengths.
 
-        # Use sentence-transformers directly for better control
-        device = "cuda" if torch.cuda.is_available() else "cpu"
-        self.model = CrossEncoder(model_name, trust_remote_code=True, device=device)
+        cascade is a cheap first stage ("lexical", or a small cross-encoder model run
+        in-process) that prunes the candidates to cascade_keep before the model.
+        """
+        self.max_length = max_length
+        self.batch_size = batch_size
+        self.cascade_keep = cascade_keep
+        self.cascade = load_cascade(cascade)
+        tokenizer = None
+        if inference_socket:
+            logger.info(f"Using the inference server at {inference_socket}.")
+            self.model = RemoteCrossEncoder(
+                InferenceClient(inference_socket, inference_authkey)
+            )
+            if max_length:
+                tokenizer = AutoTokenizer.from_pretrained(model_name)
+        else:
+            self.model = load_cross_encoder(model_name, max_length)
+            tokenizer = self.model.tokenizer
+        self.tokenizer = tokenizer
+        self.chunking_service = ChunkingService(tokenizer=tokenizer)
 
-        # Explicitly set pad_token to eos_token to fix the batching error
-        # Qwen3 models often don't have a default pad_token in their config
-        self.model.tokenizer.pad_token = self.model.tokenizer.eos_token
-        self.model.model.config.pad_token_id = self.model.tokenizer.eos_token_id
+    def passage_budget(self, query: str) -> int | None:
+        """Passage tokens left once the query and the special tokens are counted."""
+        if not self.max_length:
+            return None
+        query_tokens = len(self.tokenizer(query, add_special_tokens=False)["input_ids"])
+        special_tokens = self.tokenizer.num_special_tokens_to_add(pair=True)
+        return max(self.max_length - query_tokens - special_tokens, 0)
 
-        logger.info(
-            f"Reranker initialized. Pad token: {self.model.tokenizer.pad_token} (ID: {self.model.model.config.pad_token_id})"
-        )
+    def prune(self, pairs: list) -> list[int]:
+        """
+        Indices of the cascade_keep pairs with the best first-stage scores, in input
+        order. Ties (e.g. passages sharing no word with the query) keep the retrieval
+        order.
+        """
+        scores = self.cascade.predict(pairs, batch_size=self.batch_size)
+        keep = sorted(range(len(pairs)), key=lambda i: (-scores[i], i))
+        return sorted(keep[: self.cascade_keep])
 
     def rerank(self, query: str, results: list, top_k: int = 3):
         """
@@ -34,10 +160,28 @@ class RerankerService:
         docs = [res[0] for res in results]
 
         # Prepare pairs for the cross-encoder: (query, passage)
-        pairs = [[query, doc.page_content] for doc in docs]
+        # Passages use the short rerank header to keep sequences (and cost) down
+        budget = self.passage_budget(query)
+        pairs = [
+            [query, self.chunking_service.format_for_rerank(doc, budget)]
+            for doc in docs
+        ]
+
+        if self.cascade is not None and len(pairs) > self.cascade_keep:
+            with timed("prune"):
+                keep = self.prune(pairs)
+            docs = [docs[i] for i in keep]
+            pairs = [pairs[i] for i in keep]
 
-        # Get scores from the cross-encoder
-        scores = self.model.predict(pairs)
+        # Longest first, so each batch holds passages of similar length
+        order = sorted(range(len(pairs)), key=lambda i: len(pairs[i][1]), reverse=True)
+        with timed("rerank"):
+            sorted_scores = self.model.predict(
+                [pairs[i] for i in order], batch_size=self.batch_size
+            )
+        scores = [0.0] * len(pairs)
+        for i, score in zip(order, sorted_scores):
+            scores[i] = score
 
         # Combine documents with reranked scores and sort
         doc_scores = list(zip(docs, scores))
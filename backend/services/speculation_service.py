@@ -0,0 +1,121 @@
+import contextvars
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable
+
+import numpy as np
+
+from services.instrumentation import timed
+
+logger = logging.getLogger(__name__)
+
+
+class SpeculationService:
+    """
+    Runs a retrieval for the raw user message while the LLM is still deciding on its
+    tool call, and serves that result if the tool is then called with a similar query.
+    """
+
+    def __init__(
+        self,
+        embed: Callable[[str], list[float]],
+        retrieve: Callable[[str, list[float]], str],
+        threshold: float = 0.85,
+        max_entries: int = 32,
+        ttl: float = 120.0,
+        max_workers: int = 2,
+    ):
+        """
+        embed: query -> embedding. retrieve: (query, embedding) -> tool output.
+        threshold: minimum cosine similarity between the speculated and actual query.
+        """
+        self.embed = embed
+        self.retrieve = retrieve
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="speculation"
+        )
+        self._lock = threading.Lock()
+        # query -> (created_at, future of the normalized embedding, future of the output)
+        self._entries: OrderedDict[str, tuple[float, Future, Future]] = OrderedDict()
+
+    def start(self, query: str):
+        """Starts a speculative retrieval in the background (no-op if already running)."""
+        query = query.strip()
+        if not query:
+            return
+        with self._lock:
+            self._evict()
+            if query in self._entries:
+                return
+            embedding = Future()
+            # In the request's context, so the retrieval keeps its skip_rerank flag
+            # and its time is recorded in the turn's trace
+            context = contextvars.copy_context()
+            output = self._executor.submit(
+                context.run, self._speculate, query, embedding
+            )
+            self._entries[query] = (time.monotonic(), embedding, output)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _speculate(self, query: str, embedding_future: Future) -> str:
+        with timed("speculate"):
+            # The embedding is published first so matching does not wait for retrieval
+            try:
+                embedding = self.embed(query)
+            except Exception as e:
+                embedding_future.set_exception(e)
+                raise
+            embedding_future.set_result(_normalize(embedding))
+            return self.retrieve(query, embedding)
+
+    def match(self, embedding: list[float]) -> str | None:
+        """
+        Returns the speculative result whose query is most similar to the actual tool
+        query (waiting for its retrieval if still running), or None below the threshold.
+        """
+        with self._lock:
+            self._evict()
+            entries = list(self._entries.values())
+
+        query_vector = _normalize(embedding)
+        best, best_similarity = None, self.threshold
+        for _, embedding_future, output in entries:
+            # Speculations still queued behind others are not worth waiting for
+            if not embedding_future.done():
+                continue
+            try:
+                similarity = float(embedding_future.result() @ query_vector)
+            except Exception:
+                continue
+            if similarity >= best_similarity:
+                best, best_similarity = output, similarity
+
+        if best is None:
+            return None
+        try:
+            result = best.result()
+        except Exception:
+            logger.exception("Speculative retrieval failed")
+            return None
+        logger.info(f"Using speculative retrieval (similarity {best_similarity:.3f})")
+        return result
+
+    def _evict(self):
+        expiry = time.monotonic() - self.ttl
+        while self._entries:
+            created_at, _, _ = next(iter(self._entries.values()))
+            if created_at >= expiry:
+                break
+            self._entries.popitem(last=False)
+
+
+def _normalize(embedding: list[float]) -> np.ndarray:
+    vector = np.asarray(embedding, dtype=np.float32)
+    return vector / (np.linalg.norm(vector) or 1.0)
@@ -10,3 +10,8 @@ class StorageService(ABC):
     def add_documents(self, documents: list[Document], batch_size: int = 500):
         """Adds documents to the storage."""
         pass
+
+    @abstractmethod
+    def add_embeddings(self, documents: list[Document], vectors, batch_size: int = 500):
+        """Adds documents with precomputed vectors (e.g. from an embedding artifact)."""
+        pass
@@ -0,0 +1,170 @@
+import cProfile
+import json
+import logging
+import os
+import random
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+from services.instrumentation import add_recorder
+
+logger = logging.getLogger(__name__)
+
+# Trace of the chat turn running in the current context (None when not sampled).
+# Context variables are copied into the worker threads LangGraph runs tools in.
+_current_trace: ContextVar["Trace | None"] = ContextVar("current_trace", default=None)
+
+
+class Trace:
+    """Spans and tool calls recorded during one chat turn."""
+
+    def __init__(self, session_id: str):
+        self.trace_id = uuid.uuid4().hex
+        self.session_id = session_id
+        self.started_at = datetime.now(timezone.utc)
+        self.start = time.perf_counter()
+        self.duration: float | None = None
+        self.spans: list[dict] = []
+        self.tool_calls: list[dict] = []
+
+    def add_span(self, stage: str, duration: float, labels: dict):
+        offset = time.perf_counter() - duration - self.start
+        self.spans.append(
+            {
+                "stage": stage,
+                "offset_ms": round(offset * 1000, 2),
+                "duration_ms": round(duration * 1000, 2),
+                **labels,
+            }
+        )
+
+    def add_tool_call(self, name: str, args: dict, result_chars: int, duration: float):
+        self.tool_calls.append(
+            {
+                "name": name,
+                "args": args,
+                "result_chars": result_chars,
+                "duration_ms": round(duration * 1000, 2),
+            }
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "session_id": self.session_id,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round((self.duration or 0.0) * 1000, 2),
+            "tool_calls": self.tool_calls,
+            "spans": self.spans,
+        }
+
+
+def current_trace() -> Trace | None:
+    return _current_trace.get()
+
+
+def _record_span(stage: str, duration: float, labels: dict):
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add_span(stage, duration, labels)
+
+
+class TracingService:
+    """
+    Samples chat turns for tracing. Traces are appended to `<output_dir>/traces.jsonl`,
+    and turns slower than `slow_threshold` also get their trace written as a separate
+    file for inspection.
+
+    With profile, sampled turns are also profiled with cProfile and slow turns get a
+    .prof file. On Python 3.12+ a profiler records every thread of the interpreter,
+    so the profile covers the whole process during the turn, including concurrent
+    turns: profiling is meant for a single worker serving one turn at a time.
+    """
+
+    def __init__(
+        self,
+        sample_rate: float = 0.0,
+        slow_threshold: float = 10.0,
+        output_dir: str = "traces",
+        profile: bool = False,
+    ):
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError("sample_rate must be between 0 and 1.")
+        self.sample_rate = sample_rate
+        self.slow_threshold = slow_threshold
+        self.output_dir = output_dir
+        self.profile = profile
+        if sample_rate > 0:
+            add_recorder(_record_span)
+
+    def should_sample(self) -> bool:
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    @contextmanager
+    def trace(self, session_id: str):
+        """Traces the enclosed chat turn. Yields the Trace, or None if not sampled."""
+        if not self.should_sample():
+            start = time.perf_counter()
+            yield None
+            duration = time.perf_counter() - start
+            if duration > self.slow_threshold:
+                logger.warning(
+                    f"Slow chat turn ({duration:.1f}s) for session {session_id} "
+                    "was not sampled for tracing."
+                )
+            return
+
+        trace = Trace(session_id)
+        profiler = cProfile.Profile() if self.profile else None
+        _current_trace.set(trace)
+        if profiler is not None:
+            try:
+                profiler.enable()
+            except ValueError:
+                # Only one profiler can be active at once (concurrent sampled turns)
+                profiler = None
+        try:
+            yield trace
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            # Not reset with a token: a streaming generator may be closed from
+            # another context than the one it started in
+            _current_trace.set(None)
+            trace.duration = time.perf_counter() - trace.start
+            try:
+                self._save(trace, profiler)
+            except OSError:
+                logger.exception(f"Failed to write trace {trace.trace_id}")
+
+    def _save(self, trace: Trace, profiler: cProfile.Profile | None):
+        os.makedirs(self.output_dir, exist_ok=True)
+        data = trace.to_dict()
+        with open(
+            os.path.join(self.output_dir, "traces.jsonl"), "a", encoding="utf-8"
+        ) as f:
+            f.write(json.dumps(data, default=str) + "\n")
+
+        if trace.duration > self.slow_threshold:
+            prefix = os.path.join(
+                self.output_dir,
+                f"{trace.started_at:%Y%m%dT%H%M%S}_{trace.trace_id}",
+            )
+            if profiler is not None:
+                profiler.dump_stats(f"{prefix}.prof")
+                data["profile"] = {
+                    "path": f"{prefix}.prof",
+                    # Not this turn alone: see the TracingService docstring
+                    "scope": "process",
+                    "note": "cProfile records every thread of the interpreter; "
+                    "concurrent turns are included in the profile.",
+                }
+            with open(f"{prefix}.json", "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2, default=str)
+            logger.warning(
+                f"Slow chat turn ({trace.duration:.1f}s, {len(trace.tool_calls)} "
+                f"tool calls) traced to {prefix}.json"
+            )
@@ -1,17 +1,78 @@
 import logging
-import os
+import threading
 
 import torch
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_postgres import PGVector
+from transformers import AutoTokenizer
 
+from services.chunking_service import ChunkingService
+from services.collection_alias_service import CollectionAliasService
 from services.config_service import ConfigService
+from services.database_service import DatabaseService
+from services.inference_service import InferenceClient, RemoteEmbeddings
+from services.instrumentation import timed
+from services.pg_search_service import PgSearchService
+from services.quantization import MatryoshkaEmbeddings, embed_array
+from services.recipe_store_service import RecipeStoreService
 from services.storage_service import StorageService
 
 logger = logging.getLogger(__name__)
 
 
+def load_embedding_model(
+    model_name: str, num_threads: int = 2, encode_kwargs: dict | None = None
+) -> HuggingFaceEmbeddings:
+    """Loads the Hugging Face embedding model on GPU if available, else on limited CPU threads."""
+    logger.info(f"Initializing embedding model ({model_name})...")
+
+    # Limit torch threads to avoid making the machine unresponsive on CPU
+    if torch.cuda.is_available():
+        logger.info("CUDA is available, using GPU.")
+        device = "cuda"
+    else:
+        logger.info(
+            f"CUDA not available, using CPU and limiting to {num_threads} threads."
+        )
+        torch.set_num_threads(num_threads)
+        device = "cpu"
+
+    model_kwargs = {"device": device}
+    if "Qwen" in model_name:
+        model_kwargs["trust_remote_code"] = True
+
+    return HuggingFaceEmbeddings(
+        model_name=model_name,
+        model_kwargs=model_kwargs,
+        encode_kwargs=encode_kwargs or {},
+    )
+
+
+def create_embeddings(
+    model_name: str,
+    num_threads: int = 2,
+    inference_socket: str | None = None,
+    dimensions: int | None = None,
+    inference_authkey: str | None = None,
+) -> Embeddings:
+    """
+    Loads the embedding model, or a client of the shared inference server (which
+    requires its authkey), optionally truncated to its first `dimensions` components.
+    """
+    if inference_socket:
+        logger.info(f"Using the inference server at {inference_socket}.")
+        embeddings = RemoteEmbeddings(
+            InferenceClient(inference_socket, inference_authkey)
+        )
+    else:
+        embeddings = load_embedding_model(model_name, num_threads)
+    if dimensions:
+        embeddings = MatryoshkaEmbeddings(embeddings, dimensions)
+    return embeddings
+
+
 class VectorStoreService(StorageService):
     """Manages the PGVector database connection and operations."""
 
@@ -21,64 +82,312 @@ class VectorStoreService(StorageService):
         model_name: str = "all-MiniLM-L6-v2",
         collection_name: str = "beer_recipes",
         num_threads: int = 2,
+        two_tier: bool = False,
+        compact: bool = False,
+        inference_socket: str | None = None,
+        database: DatabaseService | None = None,
+        native_search: bool = False,
+        dimensions: int | None = None,
+        bulk_embeddings: Embeddings | None = None,
+        aliases: CollectionAliasService | None = None,
+        embeddings: Embeddings | None = None,
+        inference_authkey: str | None = None,
     ):
         self.config = config
         self.model_name = model_name
-        self.collection_name = collection_name
+        # With aliases, collection_name is an alias resolved to its live version
+        # (e.g. beer_recipes -> beer_recipes@v42) at query time
+        self.alias = collection_name
+        self.aliases = aliases
+        self._bind_lock = threading.Lock()
         self.connection_string = config.connection_string
         self.num_threads = num_threads
+        self.two_tier = two_tier
+        # Compact layout: chunks store only their section text and filter fields,
+        # recipe metadata lives once in the recipe store (see ChunkingService.compact_chunk)
+        self.compact = compact
+        # Embed through the shared inference server instead of loading the model
+        self.inference_socket = inference_socket
+        self.inference_authkey = inference_authkey
+        # Matryoshka truncation of the stored and query vectors (None: full size)
+        self.dimensions = dimensions
+        # Ingestion-only embedder (e.g. BulkEmbeddingService) that embeds the documents
+        # of add_documents a window at a time; queries always use the model
+        self.bulk_embeddings = bulk_embeddings
+        # Injected embedder (e.g. ArtifactEmbeddings) used instead of loading the model
+        self.embeddings = embeddings
+        self.chunking_service = ChunkingService()
+        self._tokenizer = None
+        # A shared DatabaseService bounds and tunes the connections; without it PGVector
+        # and the recipe store connect on their own (one-off utilities)
+        self.database = database
+        # Hand-written SQL search, which also reads the stored embeddings that
+        # PGVector does not return
+        self._sql_search = None
+        if database is not None:
+            self._sql_search = PgSearchService(
+                database.pool, prepare=config.db_prepared_statements
+            )
+        # Use it instead of PGVector's generic query builder for every search
+        self.native_search = None
+        if native_search:
+            if database is None:
+                raise ValueError("Native search requires a DatabaseService.")
+            self.native_search = self._sql_search
 
         self._initialize_vectorstore()
 
     def _initialize_vectorstore(self):
         """Initializes embeddings and the PGVector store."""
-        logger.info(f"Initializing embedding model ({self.model_name})...")
+        if self.embeddings is None:
+            self.embeddings = create_embeddings(
+                self.model_name,
+                self.num_threads,
+                self.inference_socket,
+                self.dimensions,
+                self.inference_authkey,
+            )
+        collection_name = self.alias
+        if self.aliases is not None:
+            collection_name = self.aliases.resolve(self.alias)
+        self._bind(collection_name)
 
-        # Limit torch threads to avoid making the machine unresponsive on CPU
-        if torch.cuda.is_available():
-            logger.info("CUDA is available, using GPU.")
-            device = "cuda"
-        else:
+    def _bind(self, collection_name: str):
+        """Connects to the chunk, recipe summary and recipe metadata stores of a collection."""
+        logger.info(f"Connecting to PGVector collection '{collection_name}'...")
+        vectorstore = PGVector(
+            embeddings=self.embeddings,
+            collection_name=collection_name,
+            connection=self._connection(),
+            use_jsonb=True,
+        )
+
+        # Coarse recipe-level index used as a first pass in two-tier retrieval
+        recipe_collection_name = f"{collection_name}_recipes"
+        recipe_vectorstore = None
+        if self.two_tier:
             logger.info(
-                f"CUDA not available, using CPU and limiting to {self.num_threads} threads."
+                f"Connecting to PGVector recipe collection '{recipe_collection_name}'..."
+            )
+            recipe_vectorstore = PGVector(
+                embeddings=self.embeddings,
+                collection_name=recipe_collection_name,
+                connection=self._connection(),
+                use_jsonb=True,
             )
-            torch.set_num_threads(self.num_threads)
-            device = "cpu"
-
-        model_kwargs = {"device": device}
-        if "Qwen" in self.model_name:
-            model_kwargs["trust_remote_code"] = True
 
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name=self.model_name,
-            model_kwargs=model_kwargs,
+        self.recipe_store = RecipeStoreService(
+            self.config,
+            collection_name=collection_name,
+            pool=self.database.pool if self.database else None,
         )
+        self.vectorstore = vectorstore
+        self.recipe_vectorstore = recipe_vectorstore
+        self.recipe_collection_name = recipe_collection_name
+        self.collection_name = collection_name
 
-        logger.info(f"Connecting to PGVector collection '{self.collection_name}'...")
-        self.vectorstore = PGVector(
-            embeddings=self.embeddings,
-            collection_name=self.collection_name,
-            connection=self.connection_string,
-            use_jsonb=True,
-        )
+    def _refresh(self):
+        """Follows the alias to its live version after a switch (resolve() is cached)."""
+        if self.aliases is None:
+            return
+        collection_name = self.aliases.resolve(self.alias)
+        if collection_name == self.collection_name:
+            return
+        with self._bind_lock:
+            if collection_name != self.collection_name:
+                logger.info(
+                    f"Alias '{self.alias}' switched from '{self.collection_name}' "
+                    f"to '{collection_name}'."
+                )
+                self._bind(collection_name)
+
+    def _connection(self):
+        return self.database.engine if self.database else self.connection_string
+
+    @property
+    def tokenizer(self):
+        """
+        Tokenizer of the embedding model, used for token budgets at chunking time.
+        Loaded by model name, so it does not depend on how the vectors are computed.
+        """
+        if self._tokenizer is None:
+            self._tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+        return self._tokenizer
 
-    def add_documents(self, documents: list[Document], batch_size: int = 100):
-        """Adds documents to the vector store in batches."""
+    def add_documents(
+        self, documents: list[Document], batch_size: int = 100, window_size: int = 4096
+    ):
+        """
+        Adds documents to the vector store in batches. With a bulk embedder, each
+        window of window_size documents is embedded, then stored before the next.
+        """
         if not documents:
             return
 
+        if self.bulk_embeddings is not None:
+            for i in range(0, len(documents), window_size):
+                window = documents[i : i + window_size]
+                vectors = embed_array(
+                    self.bulk_embeddings, [d.page_content for d in window]
+                )
+                self.add_embeddings(window, vectors, batch_size=batch_size)
+            return
+
         logger.info(f"Adding {len(documents)} documents to the vector store...")
         for i in range(0, len(documents), batch_size):
             batch = documents[i : i + batch_size]
             logger.info(
                 f"Processing batch {i//batch_size + 1}: documents {i} to {min(i + batch_size, len(documents))}"
             )
-            self.vectorstore.add_documents(batch)
+            if self.compact:
+                self._add_compact_batch(batch)
+            else:
+                self.vectorstore.add_documents(batch)
             logger.info(
                 f"Completed batch {i//batch_size + 1}. Total processed: {min(i + batch_size, len(documents))}/{len(documents)}"
             )
         logger.info("Storage complete!")
 
+    def add_embeddings(self, documents: list[Document], vectors, batch_size: int = 100):
+        """Adds documents with precomputed vectors (no model call) in batches."""
+        if not documents:
+            return
+
+        logger.info(
+            f"Adding {len(documents)} embedded documents to the vector store..."
+        )
+        for i in range(0, len(documents), batch_size):
+            batch = documents[i : i + batch_size]
+            batch_vectors = [list(map(float, v)) for v in vectors[i : i + batch_size]]
+            if self.compact:
+                self._add_compact_batch(batch, batch_vectors)
+            else:
+                ids = [d.id for d in batch]
+                self.vectorstore.add_embeddings(
+                    texts=[d.page_content for d in batch],
+                    embeddings=batch_vectors,
+                    metadatas=[d.metadata for d in batch],
+                    ids=ids if any(ids) else None,
+                )
+            logger.info(
+                f"Stored {min(i + batch_size, len(documents))}/{len(documents)} documents."
+            )
+        logger.info("Storage complete!")
+
+    def _add_compact_batch(
+        self, batch: list[Document], embeddings: list[list[float]] | None = None
+    ):
+        """Embeds the full contextual chunks but stores them in the compact layout."""
+        recipes = {}
+        for doc in batch:
+            if doc.metadata.get("beer_id"):
+                recipes[doc.metadata["beer_id"]] = {
+                    key: value
+                    for key, value in doc.metadata.items()
+                    if key not in ("section", "start_index")
+                }
+        self.recipe_store.upsert(recipes)
+
+        if embeddings is None:
+            embeddings = self.embeddings.embed_documents(
+                [d.page_content for d in batch]
+            )
+        compact_docs = [self.chunking_service.compact_chunk(d) for d in batch]
+        self.vectorstore.add_embeddings(
+            texts=[d.page_content for d in compact_docs],
+            embeddings=embeddings,
+            metadatas=[d.metadata for d in compact_docs],
+        )
+
+    def _expand_results(self, results: list) -> list:
+        """Rebuilds contextual headers and recipe metadata for compact chunks."""
+        compact_ids = [
+            item[0].metadata["beer_id"]
+            for item in results
+            if self.chunking_service.is_compact(item[0])
+        ]
+        if not compact_ids:
+            return results
+
+        recipes = self.recipe_store.get_many(compact_ids)
+        expanded = []
+        for doc, *rest in results:
+            if self.chunking_service.is_compact(doc):
+                recipe = recipes.get(doc.metadata["beer_id"], {})
+                doc = self.chunking_service.expand_chunk(doc, recipe)
+            expanded.append((doc, *rest))
+        return expanded
+
+    def add_recipe_summaries(
+        self, documents: list[Document], batch_size: int = 100, vectors=None
+    ):
+        """Adds one summary document per recipe to the coarse recipe index."""
+        if not documents:
+            return
+        if self.recipe_vectorstore is None:
+            raise ValueError("Recipe summaries require two_tier=True.")
+
+        logger.info(f"Adding {len(documents)} recipe summaries to the recipe index...")
+        for i in range(0, len(documents), batch_size):
+            batch = documents[i : i + batch_size]
+            if vectors is None:
+                self.recipe_vectorstore.add_documents(batch)
+            else:
+                self.recipe_vectorstore.add_embeddings(
+                    texts=[d.page_content for d in batch],
+                    embeddings=[
+                        list(map(float, v)) for v in vectors[i : i + batch_size]
+                    ],
+                    metadatas=[d.metadata for d in batch],
+                )
+        logger.info("Recipe index complete!")
+
+    def _search(
+        self,
+        collection: str,
+        embedding: list[float],
+        k: int,
+        filter: dict | None,
+        with_embeddings: bool = False,
+    ) -> list[tuple]:
+        """
+        Searches the chunk ("chunks") or recipe ("recipes") collection and returns
+        (Document, distance) tuples, with the stored embedding appended if requested.
+        """
+        if collection == "chunks":
+            vectorstore, collection_name = self.vectorstore, self.collection_name
+        else:
+            vectorstore = self.recipe_vectorstore
+            collection_name = self.recipe_collection_name
+
+        search = self.native_search
+        if with_embeddings:
+            if self._sql_search is None:
+                raise ValueError(
+                    "Searching with embeddings requires a DatabaseService."
+                )
+            search = self._sql_search
+        if search is not None:
+            try:
+                return search.search(
+                    collection_name,
+                    embedding,
+                    k=k,
+                    filter=filter,
+                    with_embeddings=with_embeddings,
+                )
+            except NotImplementedError as e:
+                logger.debug(f"Falling back to PGVector search: {e}")
+
+        results = vectorstore.similarity_search_with_score_by_vector(
+            embedding, k=k, filter=filter
+        )
+        if not with_embeddings:
+            return results
+        # Filters the SQL path cannot translate: PGVector ranks, vectors are read by id
+        vectors = self._sql_search.embeddings([doc.id for doc, _ in results])
+        return [(doc, score, vectors[doc.id]) for doc, score in results]
+
     def similarity_search(
         self,
         query: str,
@@ -86,4 +395,108 @@ class VectorStoreService(StorageService):
         filter: dict | None = None,
     ):
         """Performs a similarity search and returns documents with scores."""
-        return self.vectorstore.similarity_search_with_score(query, k=k, filter=filter)
+        embedding = self.embed_query(query)
+        return self.similarity_search_by_vector(embedding, k=k, filter=filter)
+
+    def embed_query(self, query: str) -> list[float]:
+        """Embeds a search query."""
+        with timed("embed"):
+            return self.embeddings.embed_query(query)
+
+    def similarity_search_by_vector(
+        self,
+        embedding: list[float],
+        k: int = 3,
+        filter: dict | None = None,
+    ):
+        """Performs a flat similarity search over all chunks for a precomputed embedding."""
+        with timed("search"):
+            self._refresh()
+            return self._expand_results(
+                self._search("chunks", embedding, k=k, filter=filter)
+            )
+
+    def two_tier_search(
+        self,
+        query: str,
+        k: int = 3,
+        filter: dict | None = None,
+        recipe_k: int = 20,
+    ):
+        """Selects candidate recipes on the coarse index, then searches only their chunks."""
+        embedding = self.embed_query(query)
+        return self.two_tier_search_by_vector(
+            embedding, k=k, filter=filter, recipe_k=recipe_k
+        )
+
+    def two_tier_search_by_vector(
+        self,
+        embedding: list[float],
+        k: int = 3,
+        filter: dict | None = None,
+        recipe_k: int = 20,
+    ):
+        """Two-tier search for a precomputed embedding."""
+        with timed("search"):
+            self._refresh()
+            chunk_filter = self._restrict_to_recipes(embedding, filter, recipe_k)
+            if chunk_filter is None:
+                return []
+
+            return self._expand_results(
+                self._search("chunks", embedding, k=k, filter=chunk_filter)
+            )
+
+    def _restrict_to_recipes(
+        self, embedding: list[float], filter: dict | None, recipe_k: int
+    ) -> dict | None:
+        """Runs the coarse recipe pass and returns the chunk filter (None if no recipe matched)."""
+        if self.recipe_vectorstore is None:
+            raise ValueError("Two-tier search requires two_tier=True.")
+
+        recipes = self._search("recipes", embedding, k=recipe_k, filter=filter)
+        # Keep the coarse ranking order while removing duplicates
+        beer_ids = list(
+            dict.fromkeys(
+                doc.metadata["beer_id"]
+                for doc, _ in recipes
+                if doc.metadata.get("beer_id")
+            )
+        )
+        if not beer_ids:
+            return None
+
+        chunk_filter = {"beer_id": {"$in": beer_ids}}
+        if filter:
+            chunk_filter = {"$and": [filter, chunk_filter]}
+        return chunk_filter
+
+    def similarity_search_with_embeddings(
+        self,
+        query: str,
+        k: int = 30,
+        filter: dict | None = None,
+        recipe_k: int | None = None,
+        embedding: list[float] | None = None,
+    ):
+        """
+        Similarity search that also returns the stored chunk embeddings, for selection
+        stages (e.g. MMR) that work in vector space without re-embedding the candidates.
+        Returns (query_embedding, [(Document, score, embedding), ...]).
+        When recipe_k is set, the search is restricted by the two-tier coarse pass.
+        A precomputed query embedding can be passed to skip embedding the query.
+        Embeddings are read with SQL, so the service needs a DatabaseService.
+        """
+        if embedding is None:
+            embedding = self.embed_query(query)
+        with timed("search"):
+            self._refresh()
+            if recipe_k is not None:
+                filter = self._restrict_to_recipes(embedding, filter, recipe_k)
+                if filter is None:
+                    return embedding, []
+
+            candidates = self._search(
+                "chunks", embedding, k=k, filter=filter, with_embeddings=True
+            )
+            return embedding, self._expand_results(candidates)
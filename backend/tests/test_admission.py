@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+from api.admission import AdmissionController, AdmissionRejected
+
+
+def test_release_frees_slot():
+    async def scenario():
+        controller = AdmissionController(max_in_flight=1, max_queue=1)
+        ticket = await controller.acquire("a")
+        assert controller.saturated
+        assert ticket.degraded is False
+
+        ticket.release()
+        # Releasing twice must not free a second slot
+        ticket.release()
+        assert controller._in_flight == 0
+        assert controller._sessions == {}
+
+        await controller.acquire("a")
+        assert controller.saturated
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_turn_of_same_session_is_rejected():
+    async def scenario():
+        controller = AdmissionController(max_in_flight=4)
+        await controller.acquire("a")
+        with pytest.raises(AdmissionRejected) as error:
+            await controller.acquire("a")
+        assert error.value.status_code == 429
+
+        # Other sessions are not affected
+        await controller.acquire("b")
+
+    asyncio.run(scenario())
+
+
+def test_full_queue_is_rejected():
+    async def scenario():
+        controller = AdmissionController(max_in_flight=1, max_queue=1)
+        ticket = await controller.acquire("a")
+        waiting = asyncio.create_task(controller.acquire("b"))
+        await asyncio.sleep(0)
+
+        with pytest.raises(AdmissionRejected) as error:
+            await controller.acquire("c")
+        assert error.value.status_code == 503
+        assert error.value.retry_after >= 1
+
+        # The queued turn runs once the slot is released, flagged as degraded
+        ticket.release()
+        queued_ticket = await waiting
+        assert queued_ticket.degraded is True
+
+    asyncio.run(scenario())
+
+
+def test_queue_timeout_is_rejected():
+    async def scenario():
+        controller = AdmissionController(max_in_flight=1, queue_timeout=0.01)
+        await controller.acquire("a")
+
+        with pytest.raises(AdmissionRejected) as error:
+            await controller.acquire("b")
+        assert error.value.status_code == 503
+        # The timed out turn no longer counts for its session or the queue
+        assert "b" not in controller._sessions
+        assert controller._waiting == 0
+
+    asyncio.run(scenario())
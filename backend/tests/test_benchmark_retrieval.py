@@ -0,0 +1,95 @@
+import json
+from unittest.mock import MagicMock
+
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from services.rag_tool import BeerRAGTool
+from utilities.benchmark_retrieval import (
+    DEFAULT_CSV,
+    DEFAULT_QUERIES,
+    build_store,
+    compare_reports,
+    load_config,
+    ndcg_at_k,
+    percentile,
+    ranked_beer_ids,
+    recall_at_k,
+    reciprocal_rank,
+    run_suite,
+)
+
+
+def test_ranking_metrics():
+    ranked = ["3", "1", "2"]
+
+    assert recall_at_k(ranked, ["1", "4"], k=2) == 0.5
+    assert reciprocal_rank(ranked, ["1"]) == 0.5
+    assert reciprocal_rank(ranked, ["9"]) == 0.0
+    assert ndcg_at_k(["1", "2"], ["1"], k=2) == 1.0
+    assert ndcg_at_k(["2", "1"], ["1"], k=2) == pytest.approx(0.6309, abs=1e-4)
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 101))
+
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([7.0], 95) == 7.0
+
+
+def test_ranked_beer_ids_from_tool_output():
+    output = (
+        "--- Recipe: A (IPA) ---\n"
+        "Source URL: https://www.brewersfriend.com/homebrew/recipe/view/12\n"
+        "--- Recipe: B (Stout) ---\n"
+        "Source URL: https://www.brewersfriend.com/homebrew/recipe/view/7\n"
+    )
+
+    assert ranked_beer_ids(output) == ["12", "7"]
+
+
+def _report(recall, p95, top):
+    return {
+        "metrics": {"recall@3": recall},
+        "latency_ms": {"search": {"p95": p95}},
+        "queries": [{"query": "q", "ranked": [top]}],
+    }
+
+
+def test_compare_reports_flags_regressions():
+    lines, regressions = compare_reports(
+        _report(0.9, 10.0, "1"), _report(0.8, 15.0, "2")
+    )
+
+    assert len(regressions) == 2
+    assert any("top-1 changed" in line for line in lines)
+
+    _, regressions = compare_reports(_report(0.9, 10.0, "1"), _report(0.9, 11.0, "1"))
+    assert regressions == []
+
+
+def test_run_suite_end_to_end():
+    """Replays the fixture queries through BeerRAGTool with fake models."""
+    store = build_store(DEFAULT_CSV, DeterministicFakeEmbedding(size=16), False)
+    reranker = MagicMock()
+    reranker.rerank.side_effect = lambda query, results, top_k: results[:top_k]
+    tool = BeerRAGTool(
+        config=load_config({"MMR_ENABLED": "true"}),
+        model_name="fake",
+        collection_name="benchmark",
+        rerank_model="fake",
+        vector_store=store,
+        reranker=reranker,
+    )
+    with open(DEFAULT_QUERIES, "r", encoding="utf-8") as f:
+        queries = json.load(f)
+
+    report = run_suite(tool, queries[:4], k=3, repeat=2)
+
+    assert set(report["metrics"]) == {"recall@3", "mrr", "ndcg@3"}
+    assert len(report["queries"]) == 4
+    assert all(q["ranked"] for q in report["queries"])
+    for stage in ("embed", "search", "select", "format", "total"):
+        assert report["latency_ms"][stage]["count"] == 8
+    assert report["latency_ms"]["total"]["p50"] <= report["latency_ms"]["total"]["p99"]
@@ -0,0 +1,112 @@
+import argparse
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+import services.bulk_embedding_service as bulk_embedding_service
+from services.bulk_embedding_service import (
+    BulkEmbeddingService,
+    padding_stats,
+    plan_batches,
+)
+from utilities.populate_db import run_population
+
+
+def _tokenizer(texts):
+    return {"input_ids": [text.split() for text in texts]}
+
+
+def test_plan_batches_buckets_by_length():
+    lengths = [5, 50, 6, 48, 7, 49, 5]
+
+    batches = plan_batches(lengths, batch_tokens=100, max_batch_size=3)
+
+    assert sorted(i for batch in batches for i in batch) == list(range(len(lengths)))
+    # Longest first, and no batch exceeds the token budget or the size limit
+    assert batches == [[1, 5], [3, 4], [2, 0, 6]]
+    for batch in batches:
+        assert len(batch) <= 3
+        assert max(lengths[i] for i in batch) * len(batch) <= 100
+
+
+def test_padding_stats():
+    lengths = [10, 2, 8]
+
+    stats = padding_stats(lengths, [[0, 1], [2]])
+
+    assert stats.tokens == 20
+    assert stats.padded_tokens == 28
+    assert stats.padding_waste == pytest.approx(8 / 28)
+
+
+def test_embed_documents_keeps_input_order(monkeypatch):
+    model = DeterministicFakeEmbedding(size=8)
+    monkeypatch.setattr(bulk_embedding_service, "_worker_embeddings", model)
+    service = BulkEmbeddingService(
+        "fake", workers=1, batch_tokens=6, tokenizer=_tokenizer
+    )
+    texts = ["a b c d e", "a", "a b c", "a b", "a b c d"]
+
+    vectors = service.embed_documents(texts)
+
+    for vector, expected in zip(vectors, model.embed_documents(texts)):
+        assert vector == pytest.approx(expected, abs=1e-6)
+    assert service.stats.texts == 5
+    assert service.stats.tokens == 15
+    assert 0 <= service.stats.padding_waste < 1
+
+
+def test_embed_array_is_float32_and_windowed(monkeypatch):
+    model = DeterministicFakeEmbedding(size=8)
+    monkeypatch.setattr(bulk_embedding_service, "_worker_embeddings", model)
+    service = BulkEmbeddingService(
+        "fake", workers=1, batch_tokens=6, tokenizer=_tokenizer, window_size=2
+    )
+    texts = ["a b c d e", "a", "a b c", "a b", "a b c d"]
+
+    vectors = service.embed_array(texts)
+
+    assert vectors.dtype == np.float32
+    assert vectors.shape == (5, 8)
+    np.testing.assert_allclose(vectors, model.embed_documents(texts), atol=1e-6)
+    assert service.stats.texts == 5
+    assert service.stats.tokens == 15
+
+
+@patch("utilities.populate_db.populate_db")
+@patch("utilities.populate_db.VectorStoreService")
+@patch("utilities.populate_db.BulkEmbeddingService")
+@patch("utilities.populate_db.ConfigService")
+def test_population_with_workers_does_not_load_the_model_in_the_parent(
+    mock_config, mock_bulk, mock_store, mock_populate
+):
+    mock_config.return_value.embedding_dimensions = None
+    args = argparse.Namespace(
+        csv_path="recipes.csv",
+        limit=None,
+        collection="beer_recipes",
+        model="fake",
+        num_threads=2,
+        batch_size=100,
+        batch_tokens=8192,
+        embed_workers=2,
+        dimensions=None,
+        dry_run=None,
+        with_vectors=False,
+        embeddings_artifact=None,
+        dump_shard_mb=None,
+        max_chunk_tokens=None,
+        new_version=False,
+        no_switch=False,
+        two_tier=False,
+        compact=False,
+    )
+
+    run_population(args)
+
+    store_kwargs = mock_store.call_args.kwargs
+    assert store_kwargs["embeddings"] is mock_bulk.return_value
+    assert store_kwargs["bulk_embeddings"] is mock_bulk.return_value
+    mock_bulk.return_value.close.assert_called_once()
@@ -1,9 +1,22 @@
+import re
+
 import pytest
 from langchain_core.documents import Document
 
 from services.chunking_service import ChunkingService
 
 
+class WhitespaceTokenizer:
+    """Minimal stand-in for a Hugging Face fast tokenizer: one token per word."""
+
+    def __call__(self, text, add_special_tokens=False, return_offsets_mapping=False):
+        spans = [m.span() for m in re.finditer(r"\S+", text)]
+        encoding = {"input_ids": list(range(len(spans)))}
+        if return_offsets_mapping:
+            encoding["offset_mapping"] = spans
+        return encoding
+
+
 class TestChunkingService:
     def test_contextual_header_generation_clean_text(self):
         """Test that chunks receive the correct header and the Text: portion is cleaned."""
@@ -38,11 +51,134 @@ class TestChunkingService:
 
         for chunk in chunks:
             assert chunk.metadata["beer_id"] == "123"
-            assert "raw_content" in chunk.metadata
-            # Verify raw_content still has the category for UI display
-            assert ":" in chunk.metadata["raw_content"]
+            # The section text is not duplicated in metadata, only its name
+            assert "raw_content" not in chunk.metadata
+        assert chunks[0].metadata["section"] == "Section 1"
+        assert chunks[1].metadata["section"] == "Section 2"
 
     def test_empty_list(self):
         """Test that ChunkingService returns an empty list for empty input."""
         service = ChunkingService()
         assert service.split_documents([]) == []
+
+    def test_create_recipe_summaries(self):
+        """Test that one summary per recipe is built, overall sections first."""
+        service = ChunkingService()
+        content = "Aroma Hop: Citrusy.\n\nOverall Impression: Crisp and refreshing."
+        doc = Document(
+            page_content=content,
+            metadata={"beer_id": "1", "name": "Test Ale", "style": "IPA"},
+        )
+
+        summaries = service.create_recipe_summaries([doc])
+
+        assert len(summaries) == 1
+        assert summaries[0].page_content == (
+            "Recipe: Test Ale | Style: IPA | Summary: Crisp and refreshing. Citrusy."
+        )
+        assert summaries[0].metadata["beer_id"] == "1"
+
+    def test_create_recipe_summaries_budget(self):
+        """Test that summaries stop adding sections once the budget is exhausted."""
+        service = ChunkingService()
+        doc = Document(
+            page_content="Overall Impression: Short.\n\nAroma Hop: " + "x" * 100,
+            metadata={"name": "N", "style": "S"},
+        )
+
+        summaries = service.create_recipe_summaries([doc], max_chars=50)
+
+        assert summaries[0].page_content.endswith("Summary: Short.")
+
+    def test_compact_and_expand_roundtrip(self):
+        """Test that a compact chunk can be rebuilt to the full contextual chunk."""
+        service = ChunkingService()
+        doc = Document(
+            page_content="Aroma Hop: Citrusy.",
+            metadata={"beer_id": "1", "name": "Test Ale", "style": "IPA", "abv": 6.5},
+        )
+        chunk = service.split_documents([doc])[0]
+
+        compact = service.compact_chunk(chunk)
+
+        assert compact.page_content == "Citrusy."
+        assert compact.metadata == {
+            "beer_id": "1",
+            "section": "Aroma Hop",
+            "start_index": 0,
+            "style": "IPA",
+            "abv": 6.5,
+        }
+        assert service.is_compact(compact)
+        assert not service.is_compact(chunk)
+
+        expanded = service.expand_chunk(compact, {"name": "Test Ale", "style": "IPA"})
+
+        assert expanded.page_content == chunk.page_content
+        assert expanded.metadata["name"] == "Test Ale"
+        assert expanded.metadata["section"] == "Aroma Hop"
+
+    def test_split_contextual_content(self):
+        """Test that the header is separated from the section text."""
+        service = ChunkingService()
+
+        header, text = service.split_contextual_content(
+            "Recipe: A | Style: B | Section: C | Text: Hello"
+        )
+
+        assert header == "Recipe: A | Style: B | Section: C"
+        assert text == "Hello"
+        assert service.split_contextual_content("No header") == ("", "No header")
+
+    def test_rerank_and_display_formats(self):
+        """Test the shorter cross-encoder and LLM representations of a chunk."""
+        service = ChunkingService()
+        doc = Document(
+            page_content="Aroma Hop: Citrusy.",
+            metadata={"beer_id": "1", "name": "Test Ale", "style": "IPA"},
+        )
+        chunk = service.split_documents([doc])[0]
+
+        assert (
+            service.format_for_rerank(chunk) == "Test Ale (IPA) | Aroma Hop: Citrusy."
+        )
+        assert service.format_for_display(chunk) == "Aroma Hop: Citrusy."
+
+        # Chunks without a contextual header are passed through unchanged
+        plain = Document(page_content="Plain text")
+        assert service.format_for_rerank(plain) == "Plain text"
+        assert service.format_for_display(plain) == "Plain text"
+
+    def test_max_chunk_tokens(self):
+        """Test that section text is truncated so header + text fit the token budget."""
+        # Header "Recipe: A | Style: B | Section: Aroma | Text: " is 10 words
+        service = ChunkingService(tokenizer=WhitespaceTokenizer(), max_chunk_tokens=13)
+        doc = Document(
+            page_content="Aroma: one two three four five\n\nFlavor: short",
+            metadata={"name": "A", "style": "B"},
+        )
+
+        chunks = service.split_documents([doc])
+
+        assert chunks[0].page_content.endswith("Text: one two three")
+        assert chunks[1].page_content.endswith("Text: short")
+
+    def test_rerank_format_token_budget(self):
+        """Test that rerank passages keep their header and the start of the text."""
+        service = ChunkingService(tokenizer=WhitespaceTokenizer())
+        doc = Document(
+            page_content="Aroma: one two three four five",
+            metadata={"name": "A", "style": "B"},
+        )
+        chunk = service.split_documents([doc])[0]
+
+        # Header "A (B) | Aroma: " is 4 words
+        assert (
+            service.format_for_rerank(chunk, max_tokens=6) == "A (B) | Aroma: one two"
+        )
+        assert service.format_for_rerank(chunk, max_tokens=2) == "A (B) | Aroma: "
+        assert service.format_for_rerank(Document(page_content="a b c"), 2) == "a b"
+
+    def test_max_chunk_tokens_requires_tokenizer(self):
+        with pytest.raises(ValueError):
+            ChunkingService(max_chunk_tokens=128)
@@ -1,6 +1,7 @@
 import os
 
 import pandas as pd
+import pyarrow.parquet as pq
 import pytest
 
 from services.data_service import DataService
@@ -43,3 +44,83 @@ class TestDataService:
 
         assert not loaded_df.empty
         assert loaded_df.iloc[0]["Name"] == "Bière"
+
+    @pytest.fixture
+    def recipes(self):
+        return pd.DataFrame(
+            {
+                "BeerID": [1, 2, 3],
+                "Name": ["Beer A", "Beer B", "Beer C"],
+                "ABV": ["5.2", "", "7"],
+                "IBU": [30, None, 55],
+                "aroma_hop_aroma": ["Citrus", "Pine", "Resin"],
+                "enriched_story": ["Story A", "Story B", "Story C"],
+            }
+        )
+
+    @pytest.mark.parametrize("extension", ["csv", "parquet", "arrow"])
+    def test_format_by_extension(self, tmp_path, recipes, extension):
+        """Test that every format round-trips with the same typed schema."""
+        path = str(tmp_path / f"recipes.{extension}")
+        service = DataService(path)
+        service.save(recipes)
+
+        loaded = service.load()
+
+        assert service.format == {"csv": "csv", "parquet": "parquet"}.get(
+            extension, "arrow"
+        )
+        assert list(loaded["BeerID"]) == ["1", "2", "3"]
+        assert loaded["ABV"].dtype == "float64"
+        assert loaded["ABV"].tolist()[0] == 5.2
+        assert pd.isna(loaded["ABV"][1]) and pd.isna(loaded["IBU"][1])
+        assert list(loaded["enriched_story"]) == ["Story A", "Story B", "Story C"]
+
+    def test_parquet_is_compressed(self, tmp_path, recipes):
+        """Test that Parquet files are written with the configured codec."""
+        path = str(tmp_path / "recipes.parquet")
+        DataService(path).save(recipes)
+
+        metadata = pq.ParquetFile(path).metadata
+        assert metadata.row_group(0).column(0).compression == "ZSTD"
+
+    @pytest.mark.parametrize("extension", ["csv", "parquet", "arrow"])
+    def test_column_projection(self, tmp_path, recipes, extension):
+        """Test that only the requested columns are read; absent ones are skipped."""
+        path = str(tmp_path / f"recipes.{extension}")
+        DataService(path).save(recipes)
+
+        loaded = DataService(path).load(columns=["BeerID", "ABV", "Missing"])
+
+        assert list(loaded.columns) == ["BeerID", "ABV"]
+        assert len(loaded) == 3
+
+    @pytest.mark.parametrize("extension", ["csv", "parquet", "arrow"])
+    def test_iter_batches(self, tmp_path, recipes, extension):
+        """Test that files stream in batches across row groups."""
+        path = str(tmp_path / f"recipes.{extension}")
+        DataService(path, row_group_size=2).save(recipes)
+
+        batches = list(
+            DataService(path).iter_batches(columns=["BeerID", "IBU"], batch_size=2)
+        )
+
+        assert [len(batch) for batch in batches] == [2, 1]
+        assert [list(batch.columns) for batch in batches] == [["BeerID", "IBU"]] * 2
+        assert batches[1]["IBU"].tolist() == [55.0]
+
+    def test_iter_batches_non_existent(self):
+        """Test that a missing file yields no batches."""
+        assert list(DataService("non_existent.parquet").iter_batches()) == []
+
+    def test_iter_batches_fallback_encoding(self, tmp_path):
+        """Test that CSV streaming falls back to latin-1 without repeating rows."""
+        csv_path = tmp_path / "latin1.csv"
+        pd.DataFrame({"Name": ["Ale"] * 3 + ["Bière"]}).to_csv(
+            csv_path, index=False, encoding="latin-1"
+        )
+
+        batches = list(DataService(str(csv_path)).iter_batches(batch_size=2))
+
+        names = [name for batch in batches for name in batch["Name"]]
+        assert names == ["Ale", "Ale", "Ale", "Bière"]
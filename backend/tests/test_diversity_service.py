@@ -0,0 +1,61 @@
+import pytest
+from langchain_core.documents import Document
+
+from services.diversity_service import DiversityService
+
+
+def _candidate(beer_id: str, embedding: list[float], score: float = 0.1):
+    doc = Document(page_content=f"chunk of {beer_id}", metadata={"beer_id": beer_id})
+    return (doc, score, embedding)
+
+
+def test_mmr_prefers_diverse_candidates():
+    # Two near-duplicate chunks close to the query, one different but still relevant
+    candidates = [
+        _candidate("1", [1.0, 0.0]),
+        _candidate("1", [0.99, 0.01]),
+        _candidate("2", [0.7, 0.7]),
+    ]
+    service = DiversityService(lambda_mult=0.3)
+
+    results = service.select([1.0, 0.0], candidates, k=2)
+
+    assert [doc.metadata["beer_id"] for doc, _ in results] == ["1", "2"]
+
+
+def test_lambda_one_is_relevance_order():
+    candidates = [
+        _candidate("1", [0.0, 1.0]),
+        _candidate("2", [1.0, 0.0]),
+        _candidate("3", [0.9, 0.1]),
+    ]
+    service = DiversityService(lambda_mult=1.0)
+
+    results = service.select([1.0, 0.0], candidates, k=3)
+
+    assert [doc.metadata["beer_id"] for doc, _ in results] == ["2", "3", "1"]
+
+
+def test_per_recipe_cap():
+    candidates = [
+        _candidate("1", [1.0, 0.0], score=0.01),
+        _candidate("1", [0.99, 0.01], score=0.02),
+        _candidate("1", [0.98, 0.02], score=0.03),
+        _candidate("2", [0.5, 0.5], score=0.04),
+    ]
+    service = DiversityService(lambda_mult=1.0, max_per_recipe=2)
+
+    results = service.select([1.0, 0.0], candidates, k=4)
+
+    assert [doc.metadata["beer_id"] for doc, _ in results] == ["1", "1", "2"]
+    # Original similarity scores are passed through
+    assert [score for _, score in results] == [0.01, 0.02, 0.04]
+
+
+def test_empty_candidates():
+    assert DiversityService().select([1.0, 0.0], [], k=3) == []
+
+
+def test_invalid_lambda():
+    with pytest.raises(ValueError):
+        DiversityService(lambda_mult=1.5)
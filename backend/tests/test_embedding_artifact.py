@@ -0,0 +1,141 @@
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+from services.embedding_artifact import (
+    ArtifactEmbeddings,
+    EmbeddingArtifact,
+    load_artifact,
+    reuse_artifact,
+    write_artifact,
+)
+from services.memory_store_service import InMemoryStoreService
+from tests.test_memory_store_service import KeywordEmbeddings
+from utilities.populate_db import store_with_artifact
+
+
+class CountingEmbeddings(KeywordEmbeddings):
+    def __init__(self):
+        self.embedded = []
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return super().embed_documents(texts)
+
+
+def _chunks(*texts) -> list[Document]:
+    return [
+        Document(page_content=text, metadata={"beer_id": str(i), "abv": 5.0})
+        for i, text in enumerate(texts)
+    ]
+
+
+def test_artifact_round_trip(tmp_path):
+    chunks = _chunks("a roasty stout", "a hoppy ipa")
+    summaries = [Document(page_content="Stout recipe", metadata={"beer_id": "0"})]
+    write_artifact(
+        str(tmp_path),
+        "test-model",
+        chunks,
+        [[1.0, 0.0], [0.0, 1.0]],
+        recipe_documents=summaries,
+        recipe_vectors=[[0.5, 0.5]],
+        dimensions=2,
+    )
+
+    artifact = EmbeddingArtifact(str(tmp_path))
+    assert (artifact.model_name, artifact.dimensions, artifact.dim) == (
+        "test-model",
+        2,
+        2,
+    )
+    assert artifact.counts == {"chunks": 2, "recipes": 1}
+    documents = artifact.documents()
+    assert [d.page_content for d in documents] == ["a roasty stout", "a hoppy ipa"]
+    assert documents[1].metadata == {"beer_id": "1", "abv": 5.0}
+    assert all(d.id for d in documents)
+    np.testing.assert_array_equal(artifact.vectors(), [[1.0, 0.0], [0.0, 1.0]])
+    assert artifact.documents("recipes")[0].page_content == "Stout recipe"
+
+
+def test_artifact_embeddings_serve_stored_vectors_by_content(tmp_path):
+    write_artifact(str(tmp_path), "m", _chunks("a roasty stout"), [[9.0, 9.0, 9.0]])
+    fallback = CountingEmbeddings()
+    embeddings = ArtifactEmbeddings([EmbeddingArtifact(str(tmp_path))], fallback)
+
+    vectors = embeddings.embed_documents(["a hoppy ipa", "a roasty stout"])
+
+    assert vectors[1] == [9.0, 9.0, 9.0]
+    assert fallback.embedded == ["a hoppy ipa"]
+    assert (embeddings.hits, embeddings.misses) == (1, 1)
+    with pytest.raises(KeyError):
+        ArtifactEmbeddings([EmbeddingArtifact(str(tmp_path))]).embed_documents(["x"])
+
+
+def test_reuse_requires_the_same_model_and_truncation(tmp_path):
+    base = KeywordEmbeddings()
+    assert reuse_artifact(str(tmp_path / "missing"), "m", None, base) is base
+
+    write_artifact(str(tmp_path), "m", _chunks("a stout"), [[1.0, 0.0]], dimensions=2)
+    assert reuse_artifact(str(tmp_path), "other", 2, base) is base
+    assert reuse_artifact(str(tmp_path), "m", None, base) is base
+    assert isinstance(reuse_artifact(str(tmp_path), "m", 2, base), ArtifactEmbeddings)
+
+
+def test_load_artifact_into_a_store_without_the_model(tmp_path):
+    chunks = _chunks("a roasty stout", "a hoppy ipa")
+    summaries = [Document(page_content="ipa", metadata={"beer_id": "1"})]
+    model = CountingEmbeddings()
+    write_artifact(
+        str(tmp_path),
+        "keywords",
+        chunks,
+        model.embed_documents([d.page_content for d in chunks]),
+        recipe_documents=summaries,
+        recipe_vectors=model.embed_documents(["ipa"]),
+    )
+    store = InMemoryStoreService(model, two_tier=True)
+    model.embedded.clear()
+
+    load_artifact(str(tmp_path), store, model_name="keywords")
+
+    assert model.embedded == []
+    results = store.two_tier_search("ipa", k=1, recipe_k=1)
+    assert [d.page_content for d, _ in results] == ["a hoppy ipa"]
+    with pytest.raises(ValueError):
+        load_artifact(str(tmp_path), store, model_name="another-model")
+
+
+def test_store_with_artifact_only_embeds_changed_chunks(tmp_path):
+    path = str(tmp_path / "artifact")
+    model = CountingEmbeddings()
+    store_with_artifact(
+        InMemoryStoreService(model),
+        _chunks("a roasty stout", "a hoppy ipa"),
+        [],
+        path,
+        model,
+        "keywords",
+        None,
+        batch_size=100,
+    )
+    model.embedded.clear()
+
+    store = InMemoryStoreService(model)
+    store_with_artifact(
+        store,
+        _chunks("a roasty stout", "a crisp lager"),
+        [],
+        path,
+        model,
+        "keywords",
+        None,
+        batch_size=100,
+    )
+
+    assert model.embedded == ["a crisp lager"]
+    assert [d.page_content for d in EmbeddingArtifact(path).documents()] == [
+        "a roasty stout",
+        "a crisp lager",
+    ]
+    assert store.similarity_search("lager", k=1)[0][0].page_content == "a crisp lager"
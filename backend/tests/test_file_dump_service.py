@@ -1,10 +1,11 @@
 import json
 import os
+from unittest.mock import MagicMock
 
 import pytest
 from langchain_core.documents import Document
 
-from services.file_dump_service import FileDumpService
+from services.file_dump_service import FileDump, FileDumpService
 
 
 class TestFileDumpService:
@@ -49,3 +50,78 @@ class TestFileDumpService:
         assert os.path.exists(output_path)
         with open(output_path, "r") as f:
             assert f.read() == ""
+
+    def test_add_documents_with_vectors(self, output_path):
+        """Test that the dump includes vectors when the service has embeddings."""
+        embeddings = MagicMock()
+        embeddings.embed_documents.return_value = [[0.1, 0.2]]
+        service = FileDumpService(output_path, embeddings=embeddings)
+
+        service.add_documents([Document(page_content="Beer 1 info", metadata={})])
+
+        with open(output_path, "r", encoding="utf-8") as f:
+            data = json.loads(f.readline())
+        assert data["embedding"] == [0.1, 0.2]
+        embeddings.embed_documents.assert_called_once_with(["Beer 1 info"])
+
+    def test_batches_are_appended(self, output_path):
+        """Test that successive calls append instead of overwriting each other."""
+        service = FileDumpService(output_path)
+
+        service.add_documents([Document(page_content="Beer 1 info", metadata={})])
+        service.add_documents([Document(page_content="Beer 2 info", metadata={})])
+
+        dump = FileDump(output_path)
+        assert [d.page_content for d in dump.documents()] == [
+            "Beer 1 info",
+            "Beer 2 info",
+        ]
+        assert len(dump) == 2
+
+    @pytest.mark.parametrize(
+        "extension, compression", [("jsonl.gz", "gzip"), ("jsonl.zst", "zstd")]
+    )
+    def test_sharded_compressed_round_trip(self, tmp_path, extension, compression):
+        """Test that a sharded, compressed dump is read back in order and verifies."""
+        output_path = str(tmp_path / f"chunks.{extension}")
+        service = FileDumpService(output_path, shard_size=200)
+        docs = [
+            Document(page_content=f"Beer {i} info " * 5, metadata={"id": i})
+            for i in range(10)
+        ]
+
+        service.add_embeddings(docs, [[float(i), 0.5] for i in range(10)], batch_size=3)
+
+        dump = FileDump(output_path)
+        assert dump.compression == compression
+        assert len(dump.shards) > 1
+        assert all(os.path.exists(shard["path"]) for shard in dump.shards)
+        assert not os.path.exists(output_path)
+        records = list(dump.records())
+        assert [r["metadata"]["id"] for r in records] == list(range(10))
+        assert records[3]["embedding"] == [3.0, 0.5]
+        assert sum(shard["documents"] for shard in dump.shards) == len(dump) == 10
+        dump.verify()
+
+    def test_verify_detects_corruption(self, output_path):
+        """Test that verify fails when a shard no longer matches its checksum."""
+        FileDumpService(output_path).add_documents(
+            [Document(page_content="Beer 1 info", metadata={})]
+        )
+        with open(output_path, "a", encoding="utf-8") as f:
+            f.write("{}\n")
+
+        with pytest.raises(ValueError, match="does not match"):
+            FileDump(output_path).verify()
+
+    def test_read_dump_without_manifest(self, output_path):
+        """Test that plain JSONL files without a manifest are still readable."""
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"page_content": "Old", "metadata": {"id": 7}}) + "\n")
+
+        dump = FileDump(output_path)
+
+        assert dump.manifest is None
+        assert [(d.page_content, d.metadata) for d in dump.documents()] == [
+            ("Old", {"id": 7})
+        ]
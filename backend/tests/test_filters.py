@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from services.filters import filter_mask, matches_filter, parse_condition
+from services.rag_tool import StyleEnum
+
+
+def test_matches_filter_operators():
+    metadata = {"style": "IPA", "abv": 6.5, "beer_id": "1"}
+
+    assert matches_filter(metadata, None)
+    assert matches_filter(metadata, {"style": {"$in": ["IPA", "Stout"]}})
+    assert not matches_filter(metadata, {"style": {"$nin": ["IPA"]}})
+    assert matches_filter(metadata, {"abv": {"$lte": 7.0}})
+    assert not matches_filter(metadata, {"abv": {"$gt": 7.0}})
+    assert matches_filter(
+        metadata, {"$and": [{"abv": {"$gt": 5.0}}, {"beer_id": {"$in": [1]}}]}
+    )
+    assert matches_filter(metadata, {"$or": [{"style": "Stout"}, {"abv": 6.5}]})
+
+
+def test_matches_filter_type_mismatch_is_false():
+    # Like jsonb_path_match, an empty ABV string never satisfies a numeric comparison
+    assert not matches_filter({"abv": ""}, {"abv": {"$lte": 7.0}})
+
+
+def test_parse_condition():
+    assert parse_condition("IPA") == ("$eq", "IPA")
+    assert parse_condition({"$gt": 5.0}) == ("$gt", 5.0)
+
+
+def test_filter_mask_combines_field_masks():
+    abv = np.array([4.0, 6.0, 8.0])
+    conditions = []
+
+    def field_mask(field, operator, operand):
+        conditions.append((field, operator, operand))
+        return abv > operand if operator == "$gt" else abv < operand
+
+    mask = filter_mask(
+        {"$or": [{"abv": {"$gt": 7.0}}, {"abv": {"$lt": 5.0}}]}, 3, field_mask
+    )
+
+    assert mask.tolist() == [True, False, True]
+    assert conditions == [("abv", "$gt", 7.0), ("abv", "$lt", 5.0)]
+
+
+def test_unsupported_operator_raises():
+    with pytest.raises(ValueError, match="Unsupported filter operator"):
+        matches_filter({"abv": 5.0}, {"abv": {"$like": "5%"}})
+
+
+def test_enum_operands_compare_as_their_values():
+    metadata = {"style": "American IPA"}
+    styles = [StyleEnum.American_IPA, StyleEnum.Saison]
+
+    assert matches_filter(metadata, {"style": {"$in": styles}})
+    assert not matches_filter(metadata, {"style": {"$nin": styles}})
+    assert matches_filter(metadata, {"style": StyleEnum.American_IPA})
+    assert not matches_filter(metadata, {"style": {"$ne": StyleEnum.American_IPA}})
@@ -1,12 +1,17 @@
+import json
 from unittest.mock import MagicMock, patch
 
 import pandas as pd
 
 from services.config_service import ConfigService, LLMProvider
 from utilities.hype_enrichment import (
+    VERSIONS_COLUMN,
+    build_story,
     create_dynamic_model,
     extract_metadata_and_text,
+    field_versions,
     process_recipes,
+    stale_fields,
 )
 
 
@@ -110,7 +115,10 @@ def test_process_recipes_flow(
     mock_chat_google_class.return_value = mock_llm
 
     # Mock extract_metadata_and_text to avoid reading real files
-    with patch("utilities.hype_enrichment.extract_metadata_and_text") as mock_extract:
+    with (
+        patch("utilities.hype_enrichment.OUTPUT_LOG_FILE", str(tmp_path / "log.txt")),
+        patch("utilities.hype_enrichment.extract_metadata_and_text") as mock_extract,
+    ):
         mock_extract.return_value = {
             "BeerID": "123",
             "Name": "Test",
@@ -131,3 +139,187 @@ def test_process_recipes_flow(
     assert df_saved.iloc[0]["BeerID"] == "123"
     assert df_saved.iloc[0]["appearance_color"] == "Golden"
     assert "enriched_story" in df_saved.columns
+
+
+@patch("utilities.hype_enrichment.ChatGoogleGenerativeAI")
+@patch("glob.glob")
+def test_process_recipes_uses_llm_cache(mock_glob, mock_chat_google_class, tmp_path):
+    mock_config = ConfigService(
+        google_api_key="fake_key", llm_provider=LLMProvider.GOOGLE
+    )
+    recipe_file = tmp_path / "recipe_123.html"
+    recipe_file.write_text("dummy", encoding="utf-8")
+    mock_glob.return_value = [str(recipe_file)]
+
+    mock_structured_llm = MagicMock()
+    analysis = create_dynamic_model()
+    answer = {field: f"{field} answer" for field in analysis.model_fields}
+    mock_structured_llm.invoke.return_value = analysis(**answer)
+    mock_chat_google_class.return_value.with_structured_output.return_value = (
+        mock_structured_llm
+    )
+
+    log_file = tmp_path / "log.txt"
+    cache_path = str(tmp_path / "cache.sqlite")
+    with (
+        patch("utilities.hype_enrichment.OUTPUT_LOG_FILE", str(log_file)),
+        patch("utilities.hype_enrichment.extract_metadata_and_text") as mock_extract,
+    ):
+        mock_extract.side_effect = lambda _: {
+            "BeerID": "123",
+            "Name": "Test",
+            "Style": "Test",
+            "ABV": "5.0",
+            "IBU": "30",
+            "clean_text": "Recipe text...",
+        }
+        # A second run without --resume answers the same prompt from the cache
+        for output in ("first.csv", "second.csv"):
+            process_recipes(str(tmp_path / output), mock_config, cache_path=cache_path)
+
+    assert mock_structured_llm.invoke.call_count == 1
+    second = pd.read_csv(tmp_path / "second.csv")
+    assert second.iloc[0]["appearance_color"] == "appearance_color answer"
+    assert "LLM cache: 1 hits, 0 misses" in log_file.read_text(encoding="utf-8")
+
+
+def test_stale_fields():
+    versions = field_versions({"color": "Color?", "pairing": "Food pairing?"})
+    current = {"color": "Gold", VERSIONS_COLUMN: json.dumps(versions)}
+    reworded = {
+        "color": "Gold",
+        "pairing": "Cheese",
+        VERSIONS_COLUMN: json.dumps(field_versions({"color": "Hue?"})),
+    }
+
+    # The new question is missing
+    assert stale_fields(current, versions) == ["pairing"]
+    # The color question was reworded; pairing has no stored version
+    assert stale_fields(reworded, versions) == ["color", "pairing"]
+    # Records enriched before versions existed keep the answers they have
+    assert stale_fields({"color": "Gold", "pairing": float("nan")}, versions) == [
+        "pairing"
+    ]
+
+
+def test_process_recipes_updates_only_new_questions(tmp_path):
+    questions = {
+        "questions": [
+            {
+                "category": "Appearance",
+                "items": [
+                    {"field": "appearance_color", "question": "Color?"},
+                    {"field": "food_pairing", "question": "Food pairing?"},
+                ],
+            }
+        ]
+    }
+    questions_file = tmp_path / "questions.json"
+    questions_file.write_text(json.dumps(questions), encoding="utf-8")
+    recipe_file = tmp_path / "recipe_123.html"
+    recipe_file.write_text("dummy", encoding="utf-8")
+
+    # Enriched before the food pairing question was added
+    output = tmp_path / "enriched.csv"
+    old_versions = field_versions({"appearance_color": "Color?"})
+    old_story = build_story({"appearance_color": "Golden"}, ["appearance_color"])
+    pd.DataFrame(
+        [
+            {
+                "BeerID": "123",
+                "Name": "Test",
+                "appearance_color": "Golden",
+                "enriched_story": old_story,
+                VERSIONS_COLUMN: json.dumps(old_versions),
+            }
+        ]
+    ).to_csv(output, index=False)
+
+    mock_llm = MagicMock()
+    mock_structured_llm = mock_llm.with_structured_output.return_value
+    mock_structured_llm.invoke.return_value.model_dump.return_value = {
+        "food_pairing": "Grilled fish."
+    }
+    config = ConfigService(google_api_key="fake_key", llm_provider=LLMProvider.GOOGLE)
+    with (
+        patch("utilities.hype_enrichment.QUESTIONS_FILE", str(questions_file)),
+        patch("utilities.hype_enrichment.OUTPUT_LOG_FILE", str(tmp_path / "log.txt")),
+        patch(
+            "utilities.hype_enrichment.ChatGoogleGenerativeAI", return_value=mock_llm
+        ),
+        patch("glob.glob", return_value=[str(recipe_file)]),
+        patch("utilities.hype_enrichment.extract_metadata_and_text") as mock_extract,
+    ):
+        mock_extract.return_value = {"BeerID": "123", "clean_text": "Recipe text..."}
+        process_recipes(str(output), config, resume=True)
+
+    # Only the new question is asked
+    model = mock_llm.with_structured_output.call_args[0][0]
+    assert list(model.model_fields) == ["food_pairing"]
+
+    record = pd.read_csv(output).iloc[0]
+    assert record["appearance_color"] == "Golden"
+    assert record["food_pairing"] == "Grilled fish."
+    # The unchanged section is byte-identical, so its chunk keeps its embedding
+    assert record["enriched_story"] == (old_story + "\n\nFood Pairing: Grilled fish.")
+    assert json.loads(record[VERSIONS_COLUMN]) == field_versions(
+        {"appearance_color": "Color?", "food_pairing": "Food pairing?"}
+    )
+
+
+def test_process_recipes_drops_removed_questions(tmp_path):
+    items = [
+        {"field": "appearance_color", "question": "Color?"},
+        {"field": "food_pairing", "question": "Food pairing?"},
+    ]
+    questions_file = tmp_path / "questions.json"
+    recipe_file = tmp_path / "recipe_123.html"
+    recipe_file.write_text("dummy", encoding="utf-8")
+    output = tmp_path / "enriched.csv"
+
+    mock_llm = MagicMock()
+    mock_structured_llm = mock_llm.with_structured_output.return_value
+    mock_structured_llm.invoke.return_value.model_dump.return_value = {
+        "appearance_color": "Golden",
+        "food_pairing": "Grilled fish.",
+    }
+    config = ConfigService(google_api_key="fake_key", llm_provider=LLMProvider.GOOGLE)
+
+    def run(items):
+        questions = {"questions": [{"category": "Appearance", "items": items}]}
+        questions_file.write_text(json.dumps(questions), encoding="utf-8")
+        with (
+            patch("utilities.hype_enrichment.QUESTIONS_FILE", str(questions_file)),
+            patch(
+                "utilities.hype_enrichment.OUTPUT_LOG_FILE", str(tmp_path / "log.txt")
+            ),
+            patch(
+                "utilities.hype_enrichment.ChatGoogleGenerativeAI",
+                return_value=mock_llm,
+            ),
+            patch("glob.glob", return_value=[str(recipe_file)]),
+            patch(
+                "utilities.hype_enrichment.extract_metadata_and_text"
+            ) as mock_extract,
+        ):
+            mock_extract.return_value = {
+                "BeerID": "123",
+                "clean_text": "Recipe text...",
+            }
+            process_recipes(str(output), config, resume=True)
+
+    run(items)
+    assert mock_structured_llm.invoke.call_count == 1
+
+    # The food pairing question is removed
+    run(items[:1])
+
+    # The record is rebuilt without asking the LLM again
+    assert mock_structured_llm.invoke.call_count == 1
+    record = pd.read_csv(output).iloc[0]
+    assert "food_pairing" not in record.index
+    assert record["enriched_story"] == "Appearance Color: Golden"
+    assert json.loads(record[VERSIONS_COLUMN]) == field_versions(
+        {"appearance_color": "Color?"}
+    )
+    assert "1 pruned" in (tmp_path / "log.txt").read_text(encoding="utf-8")
@@ -0,0 +1,126 @@
+import os
+import stat
+import threading
+from multiprocessing import AuthenticationError
+
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from services.config_service import InferenceSettings
+from services.inference_service import (
+    InferenceClient,
+    InferenceServer,
+    RemoteCrossEncoder,
+    RemoteEmbeddings,
+)
+
+AUTHKEY = "test-secret"
+
+
+class FakeCrossEncoder:
+    def predict(self, pairs, batch_size=32):
+        if not pairs:
+            raise ValueError("no pairs")
+        return [float(len(passage)) for _, passage in pairs]
+
+
+@pytest.fixture
+def server(tmp_path):
+    embeddings = DeterministicFakeEmbedding(size=4)
+    server = InferenceServer(
+        str(tmp_path / "inference.sock"),
+        embeddings,
+        FakeCrossEncoder(),
+        authkey=AUTHKEY,
+    )
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    # Wait for the socket to be bound
+    while server._listener is None:
+        pass
+    yield server
+    server.close()
+
+
+def test_remote_embeddings_match_local_model(server):
+    remote = RemoteEmbeddings(InferenceClient(server.socket_path, AUTHKEY))
+
+    assert remote.embed_query("stout") == pytest.approx(
+        server.embeddings.embed_query("stout"), rel=1e-6
+    )
+    remote_vectors = remote.embed_documents(["ipa", "lager"])
+    local_vectors = server.embeddings.embed_documents(["ipa", "lager"])
+    for remote_vector, local_vector in zip(remote_vectors, local_vectors):
+        assert remote_vector == pytest.approx(local_vector, rel=1e-6)
+
+
+def test_remote_cross_encoder_scores_pairs(server):
+    remote = RemoteCrossEncoder(InferenceClient(server.socket_path, AUTHKEY))
+
+    scores = remote.predict([["q", "ab"], ["q", "abcd"]])
+
+    assert scores.tolist() == [2.0, 4.0]
+
+
+def test_server_errors_are_raised_by_client(server):
+    client = InferenceClient(server.socket_path, AUTHKEY)
+
+    with pytest.raises(RuntimeError, match="no pairs"):
+        client.call("rerank", [])
+    # The connection stays usable after an error
+    assert client.call("embed_query", "ipa").shape == (4,)
+
+
+def test_each_thread_uses_its_own_connection(server):
+    client = InferenceClient(server.socket_path, AUTHKEY)
+    results = []
+
+    def embed():
+        results.append(client.call("embed_query", "porter").tolist())
+
+    threads = [threading.Thread(target=embed) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 4
+    assert all(result == results[0] for result in results)
+
+
+def test_client_with_wrong_authkey_is_rejected(server):
+    client = InferenceClient(server.socket_path, "wrong-secret")
+
+    with pytest.raises(AuthenticationError):
+        client.call("embed_query", "ipa")
+    # The server keeps serving clients with the right key
+    assert InferenceClient(server.socket_path, AUTHKEY).call(
+        "embed_query", "ipa"
+    ).shape == (4,)
+
+
+def test_authkey_is_required(tmp_path):
+    with pytest.raises(ValueError, match="INFERENCE_AUTHKEY"):
+        InferenceClient(str(tmp_path / "inference.sock"))
+    with pytest.raises(ValueError, match="INFERENCE_AUTHKEY"):
+        InferenceServer(
+            str(tmp_path / "inference.sock"),
+            DeterministicFakeEmbedding(size=4),
+            FakeCrossEncoder(),
+        )
+
+
+def test_socket_is_private(server):
+    assert stat.S_IMODE(os.stat(server.socket_path).st_mode) == 0o600
+
+
+def test_settings_do_not_require_llm_credentials(monkeypatch):
+    monkeypatch.setenv("LLM_PROVIDER", "openrouter")
+    monkeypatch.delenv("OPENROUTER_API_KEY", raising=False)
+    monkeypatch.setenv("INFERENCE_AUTHKEY", AUTHKEY)
+    monkeypatch.setenv("RERANK_MAX_LENGTH", "256")
+
+    settings = InferenceSettings(_env_file=None)
+
+    assert settings.inference_authkey == AUTHKEY
+    assert settings.rerank_max_length == 256
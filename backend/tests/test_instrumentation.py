@@ -0,0 +1,91 @@
+from services.instrumentation import (
+    Histogram,
+    MetricsRegistry,
+    StageCollector,
+    add_recorder,
+    remove_recorder,
+    timed,
+)
+
+
+def test_timed_is_noop_without_recorders():
+    with timed("search"):
+        pass
+
+
+def test_stage_collector_receives_timed_stages():
+    with StageCollector() as collector:
+        with timed("embed"):
+            pass
+        with timed("embed"):
+            pass
+
+    assert len(collector.durations["embed"]) == 2
+
+    # Unregistered on exit
+    with timed("embed"):
+        pass
+    assert len(collector.durations["embed"]) == 2
+
+
+def test_failing_recorder_does_not_break_timing():
+    def broken(stage, duration, labels):
+        raise RuntimeError("boom")
+
+    add_recorder(broken)
+    try:
+        with timed("rerank"):
+            result = 42
+    finally:
+        remove_recorder(broken)
+
+    assert result == 42
+
+
+def test_histogram_render_is_cumulative():
+    histogram = Histogram("test_seconds", "Test.", buckets=(0.1, 1.0))
+    histogram.observe(0.05, {"stage": "search"})
+    histogram.observe(0.5, {"stage": "search"})
+
+    lines = histogram.render()
+
+    assert 'test_seconds_bucket{stage="search",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{stage="search",le="1.0"} 2' in lines
+    assert 'test_seconds_bucket{stage="search",le="+Inf"} 2' in lines
+    assert 'test_seconds_count{stage="search"} 2' in lines
+
+
+def test_registry_collects_stages_only_when_enabled():
+    registry = MetricsRegistry(namespace="test")
+
+    registry.observe("ignored_seconds", 1.0)
+    assert registry.render() == "\n"
+
+    registry.enable()
+    try:
+        with timed("rerank", model="m"):
+            pass
+    finally:
+        registry.disable()
+
+    rendered = registry.render()
+    assert "# TYPE test_stage_duration_seconds histogram" in rendered
+    assert 'test_stage_duration_seconds_count{model="m",stage="rerank"} 1' in rendered
+
+
+def test_registry_counters_and_gauges():
+    registry = MetricsRegistry(namespace="test")
+    registry.enable()
+    try:
+        registry.increment("rejected_total", reason="queue_full")
+        registry.increment("rejected_total", reason="queue_full")
+        registry.set_gauge("in_flight", 3)
+        registry.set_gauge("in_flight", 1)
+    finally:
+        registry.disable()
+
+    rendered = registry.render()
+    assert "# TYPE test_rejected_total counter" in rendered
+    assert 'test_rejected_total{reason="queue_full"} 2' in rendered
+    assert "# TYPE test_in_flight gauge" in rendered
+    assert "test_in_flight 1" in rendered
@@ -0,0 +1,53 @@
+import pytest
+
+from services.llm_cache_service import LLMCacheService, schema_hash
+
+SCHEMA = schema_hash({"properties": {"aroma": {"type": "string"}}})
+
+
+class TestLLMCacheService:
+    @pytest.fixture
+    def cache(self, tmp_path):
+        cache = LLMCacheService(str(tmp_path / "cache.sqlite"))
+        yield cache
+        cache.close()
+
+    def test_round_trip(self, cache):
+        """Test that a stored output is returned for the same key."""
+        cache.put("gemini", 0.1, "prompt", SCHEMA, {"aroma": "Citrus"})
+
+        assert cache.get("gemini", 0.1, "prompt", SCHEMA) == {"aroma": "Citrus"}
+        assert (cache.hits, cache.misses) == (1, 0)
+
+    @pytest.mark.parametrize(
+        "key",
+        [
+            ("other-model", 0.1, "prompt", SCHEMA),
+            ("gemini", 0.7, "prompt", SCHEMA),
+            ("gemini", 0.1, "prompt!", SCHEMA),
+            ("gemini", 0.1, "prompt", schema_hash({"properties": {}})),
+        ],
+    )
+    def test_any_key_change_misses(self, cache, key):
+        """Test that model, temperature, prompt and schema are all part of the key."""
+        cache.put("gemini", 0.1, "prompt", SCHEMA, {"aroma": "Citrus"})
+
+        assert cache.get(*key) is None
+        assert cache.misses == 1
+
+    def test_persists_across_instances(self, tmp_path):
+        """Test that outputs survive reopening the cache file."""
+        path = str(tmp_path / "cache.sqlite")
+        first = LLMCacheService(path)
+        first.put("gemini", 0.1, "prompt", SCHEMA, {"aroma": "Citrus"})
+        first.close()
+
+        second = LLMCacheService(path)
+        assert second.get("gemini", 0.1, "prompt", SCHEMA) == {"aroma": "Citrus"}
+        assert len(second) == 1
+        assert "1 hits, 0 misses (100% hit rate), 1 entries" in second.stats()
+        second.close()
+
+    def test_schema_hash_ignores_key_order(self):
+        """Test that equivalent schemas hash the same."""
+        assert schema_hash({"a": 1, "b": 2}) == schema_hash({"b": 2, "a": 1})
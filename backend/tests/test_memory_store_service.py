@@ -0,0 +1,66 @@
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from services.memory_store_service import InMemoryStoreService
+
+
+class KeywordEmbeddings(Embeddings):
+    """Maps texts onto a tiny keyword space so rankings are predictable."""
+
+    KEYWORDS = ("stout", "ipa", "lager")
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        text = text.lower()
+        return [float(text.count(word)) + 0.01 for word in self.KEYWORDS]
+
+
+def _chunk(beer_id: str, text: str, abv=5.0) -> Document:
+    return Document(page_content=text, metadata={"beer_id": beer_id, "abv": abv})
+
+
+def test_similarity_search_ranks_and_filters():
+    store = InMemoryStoreService(KeywordEmbeddings())
+    store.add_documents(
+        [
+            _chunk("1", "a stout with lager yeast", abv=8.0),
+            _chunk("2", "a hoppy ipa"),
+            _chunk("3", "a roasty stout", abv=4.5),
+        ]
+    )
+
+    results = store.similarity_search("stout", k=2)
+    assert [d.metadata["beer_id"] for d, _ in results] == ["3", "1"]
+    assert results[0][1] < results[1][1]
+
+    filtered = store.similarity_search("stout", k=3, filter={"abv": {"$lte": 5.0}})
+    assert [d.metadata["beer_id"] for d, _ in filtered] == ["3", "2"]
+
+
+def test_two_tier_search_restricts_to_coarse_recipes():
+    store = InMemoryStoreService(KeywordEmbeddings(), two_tier=True)
+    store.add_documents([_chunk("1", "stout notes"), _chunk("2", "ipa with a stout")])
+    store.add_recipe_summaries(
+        [
+            Document(page_content="stout", metadata={"beer_id": "1"}),
+            Document(page_content="ipa", metadata={"beer_id": "2"}),
+        ]
+    )
+
+    results = store.two_tier_search("stout", k=3, recipe_k=1)
+
+    assert [d.metadata["beer_id"] for d, _ in results] == ["1"]
+
+
+def test_similarity_search_with_embeddings_returns_vectors():
+    store = InMemoryStoreService(KeywordEmbeddings())
+    store.add_documents([_chunk("1", "lager")])
+
+    query_embedding, candidates = store.similarity_search_with_embeddings("lager")
+
+    assert len(query_embedding) == 3
+    doc, score, embedding = candidates[0]
+    assert doc.metadata["beer_id"] == "1"
+    assert len(embedding) == 3
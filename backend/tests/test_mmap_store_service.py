@@ -0,0 +1,161 @@
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from services.filters import matches_filter
+from services.memory_store_service import InMemoryStoreService
+from services.mmap_store_service import MmapStoreService, write_snapshot
+from services.rag_tool import StyleEnum
+
+STYLES = ["American IPA", "Imperial Stout", "Saison"]
+
+
+def _documents(n: int = 60) -> list[Document]:
+    return [
+        Document(
+            page_content=f"chunk {i}",
+            metadata={
+                "beer_id": str(i // 3),
+                "name": f"Beer {i // 3}",
+                "style": STYLES[i % 3],
+                "abv": "" if i % 7 == 0 else 4.0 + (i % 8),
+                "ibu": 10.0 * (i % 5),
+            },
+        )
+        for i in range(n)
+    ]
+
+
+@pytest.fixture
+def embeddings():
+    return DeterministicFakeEmbedding(size=16)
+
+
+@pytest.fixture
+def documents():
+    return _documents()
+
+
+def _store(tmp_path, embeddings, documents, dtype="float16", **kwargs):
+    vectors = embeddings.embed_documents([d.page_content for d in documents])
+    write_snapshot(str(tmp_path), documents, vectors, dtype=dtype, **kwargs)
+    return MmapStoreService(str(tmp_path), embeddings, reload_interval=0)
+
+
+@pytest.mark.parametrize("dtype", ["float16", "int8"])
+@pytest.mark.parametrize(
+    "filter",
+    [
+        None,
+        {"style": StyleEnum.Saison},
+        {"style": {"$in": ["American IPA", "Saison"]}},
+        {"style": {"$in": [StyleEnum.American_IPA, StyleEnum.Saison]}},
+        {"style": {"$ne": StyleEnum.American_IPA}},
+        {"$and": [{"abv": {"$gt": 6.0}}, {"ibu": {"$lte": 20.0}}]},
+        {"$or": [{"style": "Imperial Stout"}, {"abv": {"$lt": 5.0}}]},
+        {"beer_id": {"$nin": ["1", "2"]}},
+    ],
+)
+def test_search_matches_exact_index(tmp_path, embeddings, documents, dtype, filter):
+    """Quantized, filtered search returns the same top-k as the exact in-memory index."""
+    exact = InMemoryStoreService(embeddings)
+    exact.add_documents(documents)
+    store = _store(tmp_path, embeddings, documents, dtype=dtype)
+
+    expected = dict(
+        (d.page_content, score)
+        for d, score in exact.similarity_search("hoppy", k=30, filter=filter)
+    )
+    results = store.similarity_search("hoppy", k=5, filter=filter)
+
+    assert all(matches_filter(d.metadata, filter) for d, _ in results)
+    top = list(expected)[:5]
+    if dtype == "float16":
+        assert [d.page_content for d, _ in results] == top
+    else:
+        # int8 rounding may swap near ties
+        assert len({d.page_content for d, _ in results} & set(top)) >= 4
+    tolerance = 1e-2 if dtype == "int8" else 1e-3
+    for doc, score in results:
+        assert score == pytest.approx(expected[doc.page_content], abs=tolerance)
+
+
+def test_unindexed_filter_field_is_rejected(tmp_path, embeddings, documents):
+    store = _store(tmp_path, embeddings, documents)
+
+    with pytest.raises(ValueError, match="not indexed"):
+        store.similarity_search("hoppy", filter={"name": "Beer 1"})
+
+
+def test_hot_reload_picks_up_new_snapshot(tmp_path, embeddings, documents):
+    store = _store(tmp_path, embeddings, documents[:3])
+    assert len(store.similarity_search("hoppy", k=10)) == 3
+
+    vectors = embeddings.embed_documents([d.page_content for d in documents])
+    write_snapshot(str(tmp_path), documents, vectors)
+
+    assert len(store.similarity_search("hoppy", k=10)) == 10
+    assert not store.reload()
+
+
+def test_two_tier_search_and_embeddings(tmp_path, embeddings, documents):
+    recipes = [
+        Document(page_content=f"recipe {i}", metadata={"beer_id": str(i)})
+        for i in range(20)
+    ]
+    vectors = embeddings.embed_documents([d.page_content for d in documents])
+    recipe_vectors = embeddings.embed_documents([d.page_content for d in recipes])
+    write_snapshot(
+        str(tmp_path),
+        documents,
+        vectors,
+        recipe_documents=recipes,
+        recipe_vectors=recipe_vectors,
+    )
+    store = MmapStoreService(str(tmp_path), embeddings, two_tier=True)
+
+    results = store.two_tier_search("hoppy", k=4, recipe_k=2)
+    assert len({d.metadata["beer_id"] for d, _ in results}) <= 2
+
+    query, candidates = store.similarity_search_with_embeddings("hoppy", k=3)
+    doc, distance, vector = candidates[0]
+    expected = np.asarray(embeddings.embed_query(doc.page_content))
+    expected /= np.linalg.norm(expected)
+    assert vector == pytest.approx(expected, abs=1e-3)
+    assert distance == pytest.approx(
+        1 - expected @ np.asarray(query) / np.linalg.norm(query), abs=1e-3
+    )
+
+
+@pytest.mark.parametrize("prefilter", ["binary", "int8"])
+def test_prefilter_rescoring_matches_exact_index(tmp_path, documents, prefilter):
+    """The quantized prefilter keeps the exact top-k when enough candidates are rescored."""
+    embeddings = DeterministicFakeEmbedding(size=64)
+    exact = InMemoryStoreService(embeddings)
+    exact.add_documents(documents)
+    store = _store(tmp_path, embeddings, documents, prefilter=prefilter)
+    store.rescore_factor = 6
+
+    for filter in (None, {"style": {"$in": ["American IPA", "Saison"]}}):
+        expected = exact.similarity_search("hoppy", k=5, filter=filter)
+        results = store.similarity_search("hoppy", k=5, filter=filter)
+        assert [d.page_content for d, _ in results] == [
+            d.page_content for d, _ in expected
+        ]
+
+
+def test_truncated_snapshot_searches_truncated_vectors(tmp_path, documents):
+    embeddings = DeterministicFakeEmbedding(size=64)
+    store = _store(
+        tmp_path, embeddings, documents, dim=32, prefilter="binary", prefilter_dim=16
+    )
+
+    query, candidates = store.similarity_search_with_embeddings("hoppy", k=3)
+
+    assert len(query) == 32
+    doc, distance, vector = candidates[0]
+    expected = np.asarray(embeddings.embed_query(doc.page_content))[:32]
+    expected /= np.linalg.norm(expected)
+    assert vector == pytest.approx(expected, abs=1e-3)
+    assert distance == pytest.approx(1 - expected @ np.asarray(query), abs=1e-3)
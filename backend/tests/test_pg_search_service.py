@@ -0,0 +1,84 @@
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+from services.pg_search_service import PgSearchService, translate_filter
+
+
+def test_translate_filter_matches_pgvector_operators():
+    where, params = translate_filter(
+        {
+            "$and": [
+                {"style": {"$in": ["IPA", "Stout"]}},
+                {"abv": {"$gt": 5}},
+                {"beer_id": "1"},
+            ]
+        }
+    )
+
+    assert where.as_string(None) == (
+        "(cmetadata ->> 'style' = ANY(%s)"
+        " AND jsonb_path_match(cmetadata, '$.abv > $value'::jsonpath, %s)"
+        " AND jsonb_path_match(cmetadata, '$.beer_id == $value'::jsonpath, %s))"
+    )
+    assert params[0] == ["IPA", "Stout"]
+    assert params[1].obj == {"value": 5}
+    assert params[2].obj == {"value": "1"}
+
+
+@pytest.mark.parametrize(
+    "filter",
+    [{"name": {"$like": "%IPA%"}}, {"$not": {"style": "IPA"}}, {"bad-key": 1}],
+)
+def test_translate_filter_rejects_unsupported_filters(filter):
+    with pytest.raises(NotImplementedError):
+        translate_filter(filter)
+
+
+def test_search_builds_documents_from_rows():
+    pool = MagicMock()
+    conn = pool.connection.return_value.__enter__.return_value
+    cursor = conn.cursor.return_value.__enter__.return_value
+    cursor.execute.return_value.fetchall.return_value = [
+        ("id-1", "Citrusy.", {"beer_id": "1"}, 0.12, np.ones(2, dtype=np.float32)),
+    ]
+    service = PgSearchService(pool)
+
+    results = service.search(
+        "beer_recipes", [1.0, 0.0], k=5, filter={"style": "IPA"}, with_embeddings=True
+    )
+
+    doc, distance, embedding = results[0]
+    assert doc.page_content == "Citrusy."
+    assert doc.metadata == {"beer_id": "1"}
+    assert distance == 0.12
+    assert embedding.tolist() == [1.0, 1.0]
+
+    conn.cursor.assert_called_once_with(binary=True)
+    query, params = cursor.execute.call_args.args
+    assert "embedding <=> %b" in query.as_string(None)
+    assert params[0].dtype == np.float32
+    assert params[1] == "beer_recipes"
+    assert params[-1] == 5
+    assert cursor.execute.call_args.kwargs["prepare"] is True
+
+
+def test_embeddings_are_read_by_id():
+    pool = MagicMock()
+    conn = pool.connection.return_value.__enter__.return_value
+    cursor = conn.cursor.return_value.__enter__.return_value
+    cursor.execute.return_value.fetchall.return_value = [
+        ("id-1", np.ones(2, dtype=np.float32)),
+    ]
+    service = PgSearchService(pool, prepare=False)
+
+    vectors = service.embeddings(["id-1", "id-2"])
+
+    assert list(vectors) == ["id-1"]
+    assert vectors["id-1"].tolist() == [1.0, 1.0]
+    query, params = cursor.execute.call_args.args
+    assert "id = ANY(%s)" in query.as_string(None)
+    assert params == [["id-1", "id-2"]]
+    assert cursor.execute.call_args.kwargs["prepare"] is None
+    assert service.embeddings([]) == {}
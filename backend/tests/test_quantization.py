@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from services.quantization import (
+    MatryoshkaEmbeddings,
+    binary_codes,
+    hamming_distances,
+    quantize_int8,
+    truncate,
+)
+
+
+def test_truncate_renormalizes_prefix():
+    vectors = np.array([[3.0, 4.0, 12.0], [0.0, 0.0, 1.0]])
+
+    truncated = truncate(vectors, 2)
+
+    assert truncated == pytest.approx(np.array([[0.6, 0.8], [0.0, 0.0]]))
+    assert truncate(vectors, None).shape == (2, 3)
+
+
+def test_quantize_int8_round_trip():
+    vectors = truncate(np.random.default_rng(0).standard_normal((4, 32)), None)
+
+    codes, scales = quantize_int8(vectors)
+
+    assert codes.dtype == np.int8
+    assert codes * scales[:, None] == pytest.approx(vectors, abs=1e-2)
+
+
+def test_hamming_distances_count_sign_flips():
+    vectors = np.array([[1.0, -1.0, 1.0, -1.0], [-1.0, -1.0, 1.0, 1.0]])
+    query = np.array([1.0, 1.0, 1.0, 1.0])
+
+    distances = hamming_distances(binary_codes(vectors), binary_codes(query))
+
+    assert distances.tolist() == [2, 2]
+
+
+def test_matryoshka_embeddings():
+    embeddings = MatryoshkaEmbeddings(DeterministicFakeEmbedding(size=64), 16)
+
+    query = embeddings.embed_query("hoppy")
+    documents = embeddings.embed_documents(["a", "b"])
+
+    assert len(query) == 16
+    assert np.linalg.norm(query) == pytest.approx(1.0)
+    assert [len(d) for d in documents] == [16, 16]
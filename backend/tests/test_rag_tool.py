@@ -1,10 +1,11 @@
+import contextvars
 from unittest.mock import MagicMock, patch
 
 import pytest
 from langchain_core.documents import Document
 
-from services.config_service import ConfigService
-from services.rag_tool import BeerRAGTool
+from services.config_service import ConfigService, VectorBackend
+from services.rag_tool import BeerRAGTool, skip_rerank
 
 
 class TestBeerRAGTool:
@@ -12,6 +13,20 @@ class TestBeerRAGTool:
     def mock_config(self):
         config = MagicMock(spec=ConfigService)
         config.google_api_key = "fake_key"
+        config.two_tier_retrieval = False
+        config.coarse_recipe_k = 20
+        config.mmr_enabled = False
+        config.speculative_retrieval = False
+        config.inference_socket = None
+        config.inference_authkey = None
+        config.native_search = False
+        config.vector_backend = VectorBackend.PGVECTOR
+        config.embedding_dimensions = None
+        config.rerank_max_length = 512
+        config.rerank_batch_size = 16
+        config.rerank_candidates = 10
+        config.rerank_cascade = None
+        config.rerank_cascade_keep = 10
         return config
 
     @patch("services.rag_tool.VectorStoreService")
@@ -110,3 +125,196 @@ class TestBeerRAGTool:
         mock_vs.similarity_search.assert_called_with(
             "query", k=10, filter={"style": "American IPA"}
         )
+
+    @patch("services.rag_tool.VectorStoreService")
+    @patch("services.rag_tool.RerankerService")
+    def test_run_two_tier(
+        self, mock_reranker_class, mock_vector_store_class, mock_config
+    ):
+        """Test that two-tier retrieval is used when enabled in the config."""
+        mock_config.two_tier_retrieval = True
+        mock_config.coarse_recipe_k = 5
+        mock_vs = mock_vector_store_class.return_value
+        mock_rr = mock_reranker_class.return_value
+        mock_vs.two_tier_search.return_value = []
+        mock_rr.rerank.return_value = []
+
+        tool = BeerRAGTool(
+            config=mock_config, model_name="m", collection_name="c", rerank_model="r"
+        )
+        tool._run("query", styles=["Saison"])
+
+        _, vs_kwargs = mock_vector_store_class.call_args
+        assert vs_kwargs["two_tier"] is True
+        mock_vs.two_tier_search.assert_called_once_with(
+            "query", k=10, filter={"style": "Saison"}, recipe_k=5
+        )
+        mock_vs.similarity_search.assert_not_called()
+
+    @patch("services.rag_tool.VectorStoreService")
+    @patch("services.rag_tool.RerankerService")
+    def test_run_diversity_selection(
+        self, mock_reranker_class, mock_vector_store_class, mock_config
+    ):
+        """Test that MMR selection runs on the candidate pool before reranking."""
+        mock_config.mmr_enabled = True
+        mock_config.mmr_lambda = 1.0
+        mock_config.mmr_fetch_k = 30
+        mock_config.max_chunks_per_recipe = 1
+        mock_vs = mock_vector_store_class.return_value
+        mock_rr = mock_reranker_class.return_value
+
+        doc1 = Document(page_content="A1", metadata={"beer_id": "1"})
+        doc2 = Document(page_content="A2", metadata={"beer_id": "1"})
+        doc3 = Document(page_content="B1", metadata={"beer_id": "2"})
+        mock_vs.similarity_search_with_embeddings.return_value = (
+            [1.0, 0.0],
+            [(doc1, 0.1, [1.0, 0.0]), (doc2, 0.2, [0.9, 0.1]), (doc3, 0.3, [0.5, 0.5])],
+        )
+        mock_rr.rerank.return_value = []
+
+        tool = BeerRAGTool(
+            config=mock_config, model_name="m", collection_name="c", rerank_model="r"
+        )
+        tool._run("query")
+
+        mock_vs.similarity_search_with_embeddings.assert_called_once_with(
+            "query", k=30, filter=None, recipe_k=None, embedding=None
+        )
+        mock_rr.rerank.assert_called_once_with(
+            "query", [(doc1, 0.1), (doc3, 0.3)], top_k=3
+        )
+
+    @patch("services.rag_tool.VectorStoreService")
+    @patch("services.rag_tool.RerankerService")
+    def test_run_compact_output(
+        self, mock_reranker_class, mock_vector_store_class, mock_config
+    ):
+        """Test that chunk headers are replaced by one heading per recipe."""
+        mock_vs = mock_vector_store_class.return_value
+        mock_rr = mock_reranker_class.return_value
+        meta = {"beer_id": "1", "name": "Beer A", "style": "IPA", "abv": 6.5, "ibu": 60}
+        doc1 = Document(
+            page_content="Recipe: Beer A | Style: IPA | Section: Aroma Hop | Text: Citrusy.",
+            metadata={**meta, "section": "Aroma Hop"},
+        )
+        doc2 = Document(
+            page_content="Recipe: Beer A | Style: IPA | Section: Flavor Balance | Text: Dry.",
+            metadata={**meta, "section": "Flavor Balance"},
+        )
+        mock_vs.similarity_search.return_value = [(doc1, 0.1), (doc2, 0.2)]
+        mock_rr.rerank.return_value = [(doc1, 0.9), (doc2, 0.8)]
+
+        tool = BeerRAGTool(
+            config=mock_config, model_name="m", collection_name="c", rerank_model="r"
+        )
+        result = tool._run("test query")
+
+        assert result == (
+            "--- Recipe: Beer A (IPA) ---\n"
+            "Source URL: https://www.brewersfriend.com/homebrew/recipe/view/1\n"
+            "ABV: 6.5% | IBU: 60\n"
+            "Details:\n"
+            "- Aroma Hop: Citrusy.\n"
+            "- Flavor Balance: Dry.\n"
+        )
+
+    @patch("services.rag_tool.VectorStoreService")
+    @patch("services.rag_tool.RerankerService")
+    def test_run_uses_speculative_retrieval(
+        self, mock_reranker_class, mock_vector_store_class, mock_config
+    ):
+        """Test that a similar tool query is served from the speculative retrieval."""
+        mock_config.speculative_retrieval = True
+        mock_config.speculative_similarity = 0.9
+        mock_vs = mock_vector_store_class.return_value
+        mock_rr = mock_reranker_class.return_value
+        embeddings = {
+            "good beginner IPA?": [1.0, 0.0],
+            "beginner IPA recipe": [0.99, 0.05],
+            "imperial stout": [0.0, 1.0],
+        }
+        mock_vs.embed_query.side_effect = embeddings.get
+        doc = Document(page_content="IPA", metadata={"beer_id": "1", "name": "Beer A"})
+        mock_vs.similarity_search_by_vector.return_value = [(doc, 0.1)]
+        mock_rr.rerank.return_value = [(doc, 0.9)]
+
+        tool = BeerRAGTool(
+            config=mock_config, model_name="m", collection_name="c", rerank_model="r"
+        )
+        tool.speculate("good beginner IPA?")
+        # Wait for the background retrieval
+        tool._speculation._entries["good beginner IPA?"][2].result(timeout=5)
+
+        result = tool._run("beginner IPA recipe")
+        assert "Beer A" in result
+        mock_rr.rerank.assert_called_once_with(
+            "good beginner IPA?", [(doc, 0.1)], top_k=3
+        )
+
+        # A dissimilar query runs its own retrieval, reusing its embedding
+        tool._run("imperial stout")
+        mock_vs.similarity_search_by_vector.assert_called_with(
+            [0.0, 1.0], k=10, filter=None
+        )
+        assert mock_rr.rerank.call_count == 2
+
+    @patch("services.rag_tool.VectorStoreService")
+    @patch("services.rag_tool.RerankerService")
+    def test_run_skips_rerank_when_overloaded(
+        self, mock_reranker_class, mock_vector_store_class, mock_config
+    ):
+        """Test that the reranker is bypassed for turns admitted under overload."""
+        mock_vs = mock_vector_store_class.return_value
+        mock_rr = mock_reranker_class.return_value
+        docs = [
+            Document(
+                page_content=f"chunk {i}",
+                metadata={"beer_id": str(i), "name": f"Beer {i}"},
+            )
+            for i in range(5)
+        ]
+        mock_vs.similarity_search.return_value = [(doc, 0.1) for doc in docs]
+
+        tool = BeerRAGTool(
+            config=mock_config, model_name="m", collection_name="c", rerank_model="r"
+        )
+        context = contextvars.copy_context()
+        context.run(skip_rerank.set, True)
+        result = context.run(tool._run, "query")
+
+        mock_rr.rerank.assert_not_called()
+        assert "Beer 2" in result
+        assert "Beer 3" not in result
+
+    @patch("services.rag_tool.create_embeddings")
+    @patch("services.rag_tool.MmapStoreService")
+    @patch("services.rag_tool.VectorStoreService")
+    @patch("services.rag_tool.RerankerService")
+    def test_mmap_backend(
+        self,
+        mock_reranker_class,
+        mock_vector_store_class,
+        mock_mmap_class,
+        mock_create_embeddings,
+        mock_config,
+    ):
+        """Test that VECTOR_BACKEND=mmap serves retrieval from the exported index."""
+        mock_config.vector_backend = VectorBackend.MMAP
+        mock_config.mmap_index_dir = "index"
+        mock_config.mmap_reload_interval = 5.0
+        mock_config.mmap_rescore_factor = 10
+
+        tool = BeerRAGTool(
+            config=mock_config, model_name="m", collection_name="c", rerank_model="r"
+        )
+
+        mock_vector_store_class.assert_not_called()
+        mock_mmap_class.assert_called_once_with(
+            "index",
+            mock_create_embeddings.return_value,
+            two_tier=False,
+            reload_interval=5.0,
+            rescore_factor=10,
+        )
+        assert tool._vector_store is mock_mmap_class.return_value
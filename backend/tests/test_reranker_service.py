@@ -3,7 +3,8 @@ from unittest.mock import MagicMock, patch
 import pytest
 from langchain_core.documents import Document
 
-from services.reranker_service import RerankerService
+from services.reranker_service import LexicalScorer, RerankerService
+from tests.test_chunking_service import WhitespaceTokenizer
 
 
 @pytest.fixture
@@ -56,3 +57,101 @@ def test_rerank_empty_list(mock_cross_encoder):
     service = RerankerService()
     results = service.rerank("query", [], top_k=3)
     assert results == []
+
+
+def test_rerank_uses_short_header(mock_cross_encoder):
+    mock_instance = MagicMock()
+    mock_instance.predict.return_value = [0.5]
+    mock_cross_encoder.return_value = mock_instance
+    service = RerankerService()
+
+    doc = Document(
+        page_content="Recipe: Test Ale | Style: IPA | Section: Aroma Hop | Text: Citrusy.",
+        metadata={"name": "Test Ale", "style": "IPA", "section": "Aroma Hop"},
+    )
+    service.rerank("hops", [(doc, 0.1)])
+
+    pairs = mock_instance.predict.call_args[0][0]
+    assert pairs == [["hops", "Test Ale (IPA) | Aroma Hop: Citrusy."]]
+
+
+class PairTokenizer(WhitespaceTokenizer):
+    eos_token = "<eos>"
+    eos_token_id = 1
+
+    def num_special_tokens_to_add(self, pair=False):
+        return 3 if pair else 2
+
+
+def test_rerank_sorts_pairs_and_truncates_passages(mock_cross_encoder):
+    mock_instance = MagicMock()
+    mock_instance.tokenizer = PairTokenizer()
+    # Scores in the order the pairs are sent: longest (truncated) passage first
+    mock_instance.predict.return_value = [0.2, 0.9, 0.5]
+    mock_cross_encoder.return_value = mock_instance
+    service = RerankerService(max_length=11, batch_size=4)
+
+    docs = [
+        Document(
+            page_content=f"Recipe: Ale {i} | Style: IPA | Section: Aroma | Text: {text}",
+            metadata={"name": f"Ale {i}", "style": "IPA", "section": "Aroma"},
+        )
+        for i, text in enumerate(["short", "one two three four five six", "a b"])
+    ]
+    results = service.rerank("hoppy ale", [(doc, 0.0) for doc in docs], top_k=3)
+
+    pairs = mock_instance.predict.call_args[0][0]
+    assert mock_instance.predict.call_args.kwargs["batch_size"] == 4
+    # 11 - 2 query tokens - 3 special tokens = 6 passage tokens, 5 of them header
+    assert pairs == [
+        ["hoppy ale", "Ale 0 (IPA) | Aroma: short"],
+        ["hoppy ale", "Ale 1 (IPA) | Aroma: one"],
+        ["hoppy ale", "Ale 2 (IPA) | Aroma: a"],
+    ]
+    assert [(doc.metadata["name"], score) for doc, score in results] == [
+        ("Ale 1", 0.9),
+        ("Ale 2", 0.5),
+        ("Ale 0", 0.2),
+    ]
+
+
+def test_lexical_scorer_prefers_matching_passages():
+    scores = LexicalScorer().predict(
+        [
+            ["citrus pale ale", "Stout | Roasted malt and coffee."],
+            ["citrus pale ale", "Pale Ale | Citrus hops, citrus aroma."],
+            ["citrus pale ale", "Lager | Crisp pale malt."],
+        ]
+    )
+
+    assert scores[1] > scores[2] > scores[0] == 0.0
+
+
+def test_rerank_cascade_prunes_before_the_model(mock_cross_encoder):
+    mock_instance = MagicMock()
+    mock_instance.predict.side_effect = lambda pairs, batch_size: [
+        float(len(passage)) for _, passage in pairs
+    ]
+    mock_cross_encoder.return_value = mock_instance
+    service = RerankerService(cascade="lexical", cascade_keep=2)
+
+    texts = ["stout", "pale ale", "porter", "hoppy pale ale", "mild"]
+    results = [(Document(page_content=text), 0.0) for text in texts]
+    reranked = service.rerank("pale ale", results, top_k=3)
+
+    # Only the two pale ales share words with the query
+    pairs = mock_instance.predict.call_args[0][0]
+    assert sorted(passage for _, passage in pairs) == ["hoppy pale ale", "pale ale"]
+    assert [doc.page_content for doc, _ in reranked] == ["hoppy pale ale", "pale ale"]
+
+
+def test_rerank_cascade_skipped_for_small_pools(mock_cross_encoder):
+    mock_instance = MagicMock()
+    mock_instance.predict.return_value = [0.1, 0.2]
+    mock_cross_encoder.return_value = mock_instance
+    service = RerankerService(cascade="lexical", cascade_keep=2)
+    service.cascade = MagicMock()
+
+    service.rerank("ale", [(Document(page_content=t), 0.0) for t in ["a", "b"]])
+
+    service.cascade.predict.assert_not_called()
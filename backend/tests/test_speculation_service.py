@@ -0,0 +1,107 @@
+import threading
+
+from services.rag_tool import skip_rerank
+from services.speculation_service import SpeculationService
+
+EMBEDDINGS = {
+    "hoppy ipa": [1.0, 0.0],
+    "ipa with lots of hops": [0.95, 0.1],
+    "dark stout": [0.0, 1.0],
+}
+
+
+def _service(**kwargs):
+    calls = []
+
+    def retrieve(query, embedding):
+        calls.append(query)
+        return f"results for {query}"
+
+    service = SpeculationService(
+        embed=EMBEDDINGS.get, retrieve=retrieve, threshold=0.9, **kwargs
+    )
+    return service, calls
+
+
+def _wait(service, query):
+    service._entries[query][2].result(timeout=5)
+
+
+def test_similar_query_matches():
+    service, calls = _service()
+    service.start("hoppy ipa")
+    _wait(service, "hoppy ipa")
+
+    assert service.match(EMBEDDINGS["ipa with lots of hops"]) == "results for hoppy ipa"
+    assert calls == ["hoppy ipa"]
+
+
+def test_dissimilar_query_misses():
+    service, _ = _service()
+    service.start("hoppy ipa")
+    _wait(service, "hoppy ipa")
+
+    assert service.match(EMBEDDINGS["dark stout"]) is None
+
+
+def test_duplicate_start_runs_once():
+    service, calls = _service()
+    service.start("hoppy ipa")
+    service.start("hoppy ipa ")
+    _wait(service, "hoppy ipa")
+
+    assert calls == ["hoppy ipa"]
+
+
+def test_match_waits_for_running_retrieval():
+    release = threading.Event()
+
+    def slow_retrieve(query, embedding):
+        release.wait(timeout=5)
+        return "late results"
+
+    service = SpeculationService(
+        embed=EMBEDDINGS.get, retrieve=slow_retrieve, threshold=0.9
+    )
+    service.start("hoppy ipa")
+    service._entries["hoppy ipa"][1].result(timeout=5)
+    threading.Timer(0.05, release.set).start()
+
+    assert service.match(EMBEDDINGS["hoppy ipa"]) == "late results"
+
+
+def test_failed_speculation_is_ignored():
+    def broken(query, embedding):
+        raise RuntimeError("database down")
+
+    service = SpeculationService(embed=EMBEDDINGS.get, retrieve=broken)
+    service.start("hoppy ipa")
+    service._entries["hoppy ipa"][1].result(timeout=5)
+
+    assert service.match(EMBEDDINGS["hoppy ipa"]) is None
+
+
+def test_entries_expire():
+    service, _ = _service(ttl=0.0)
+    service.start("hoppy ipa")
+    _wait(service, "hoppy ipa")
+
+    assert service.match(EMBEDDINGS["hoppy ipa"]) is None
+
+
+def test_speculation_runs_in_the_request_context():
+    flags = []
+
+    def retrieve(query, embedding):
+        flags.append(skip_rerank.get())
+        return "results"
+
+    service = SpeculationService(embed=EMBEDDINGS.get, retrieve=retrieve)
+    token = skip_rerank.set(True)
+    try:
+        service.start("hoppy ipa")
+    finally:
+        skip_rerank.reset(token)
+    _wait(service, "hoppy ipa")
+
+    assert flags == [True]
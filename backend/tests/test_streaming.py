@@ -0,0 +1,101 @@
+import asyncio
+import json
+import threading
+import time
+
+from api.streaming import (
+    NDJSON_MEDIA_TYPE,
+    SSE_MEDIA_TYPE,
+    TEXT_MEDIA_TYPE,
+    coalesce_events,
+    format_event,
+    select_media_type,
+)
+
+
+async def _collect(events, **kwargs):
+    return [event async for event in coalesce_events(events, **kwargs)]
+
+
+def test_tokens_are_coalesced_until_size_limit():
+    events = iter([{"type": "token", "text": "ab"}] * 5 + [{"type": "done"}])
+
+    frames = asyncio.run(_collect(events, max_chars=4, max_delay=10))
+
+    assert frames == [
+        {"type": "token", "text": "abab"},
+        {"type": "token", "text": "abab"},
+        {"type": "token", "text": "ab"},
+        {"type": "done"},
+    ]
+
+
+def test_buffer_is_flushed_before_other_events():
+    events = iter(
+        [
+            {"type": "token", "text": "Let me check. "},
+            {"type": "tool_start", "name": "search_beer_recipes", "args": {}},
+            {"type": "token", "text": "Found it."},
+        ]
+    )
+
+    frames = asyncio.run(_collect(events, max_chars=1000, max_delay=10))
+
+    assert [frame["type"] for frame in frames] == ["token", "tool_start", "token"]
+
+
+def test_time_window_and_heartbeat():
+    def slow_events():
+        yield {"type": "token", "text": "a"}
+        time.sleep(0.3)
+        yield {"type": "done"}
+
+    frames = asyncio.run(
+        _collect(slow_events(), max_chars=1000, max_delay=0.01, heartbeat_interval=0.1)
+    )
+
+    # The token is sent after the time window, then heartbeats while waiting
+    assert frames[0] == {"type": "token", "text": "a"}
+    assert {"type": "heartbeat"} in frames
+    assert frames[-1] == {"type": "done"}
+
+
+def test_generator_is_closed_when_consumer_stops():
+    closed = threading.Event()
+
+    def endless():
+        try:
+            while True:
+                yield {"type": "tool_start", "name": "t", "args": {}}
+        finally:
+            closed.set()
+
+    async def read_one():
+        stream = coalesce_events(endless())
+        await stream.__anext__()
+        await stream.aclose()
+
+    asyncio.run(read_one())
+
+    assert closed.wait(timeout=2)
+
+
+def test_select_media_type():
+    assert select_media_type("text/event-stream") == SSE_MEDIA_TYPE
+    assert select_media_type("application/x-ndjson") == NDJSON_MEDIA_TYPE
+    assert select_media_type("*/*") == TEXT_MEDIA_TYPE
+    assert select_media_type(None) == TEXT_MEDIA_TYPE
+
+
+def test_format_event():
+    token = {"type": "token", "text": "Hi"}
+    error = {"type": "error", "message": "Oops"}
+
+    assert (
+        format_event(token, SSE_MEDIA_TYPE) == 'event: token\ndata: {"text": "Hi"}\n\n'
+    )
+    assert format_event({"type": "heartbeat"}, SSE_MEDIA_TYPE).startswith(":")
+    assert json.loads(format_event(token, NDJSON_MEDIA_TYPE)) == token
+    assert format_event(token, TEXT_MEDIA_TYPE) == "Hi"
+    assert format_event(error, TEXT_MEDIA_TYPE) == "\n[Oops]"
+    assert format_event({"type": "done"}, TEXT_MEDIA_TYPE) is None
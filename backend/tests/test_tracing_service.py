@@ -0,0 +1,80 @@
+import json
+import os
+
+import pytest
+
+from services.instrumentation import remove_recorder, timed
+from services.tracing_service import TracingService, _record_span, current_trace
+
+
+@pytest.fixture
+def tracing(tmp_path):
+    service = TracingService(
+        sample_rate=1.0, slow_threshold=60.0, output_dir=str(tmp_path)
+    )
+    yield service
+    remove_recorder(_record_span)
+
+
+def _read_traces(tmp_path):
+    with open(tmp_path / "traces.jsonl", "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_sampled_turn_records_spans_and_tool_calls(tracing, tmp_path):
+    with tracing.trace("session-1") as trace:
+        with timed("search"):
+            pass
+        current_trace().add_tool_call("search_beer_recipes", {"query": "ipa"}, 120, 0.5)
+
+    assert current_trace() is None
+    [data] = _read_traces(tmp_path)
+    assert data["trace_id"] == trace.trace_id
+    assert data["session_id"] == "session-1"
+    assert [span["stage"] for span in data["spans"]] == ["search"]
+    assert data["tool_calls"][0]["args"] == {"query": "ipa"}
+    assert data["tool_calls"][0]["result_chars"] == 120
+    # Fast turn: no profile
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".prof")]
+
+
+def test_slow_turn_writes_profile(tracing, tmp_path):
+    tracing.slow_threshold = 0.0
+    tracing.profile = True
+
+    with tracing.trace("session-1"):
+        sum(range(1000))
+
+    files = os.listdir(tmp_path)
+    assert any(name.endswith(".prof") for name in files)
+    [trace_file] = [name for name in files if name.endswith(".json")]
+    with open(tmp_path / trace_file, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    # The profile is labelled as covering the process, not this turn alone
+    assert data["profile"]["scope"] == "process"
+
+
+def test_slow_turn_is_not_profiled_by_default(tracing, tmp_path):
+    tracing.slow_threshold = 0.0
+
+    with tracing.trace("session-1"):
+        pass
+
+    files = os.listdir(tmp_path)
+    assert not any(name.endswith(".prof") for name in files)
+    assert any(name.endswith(".json") for name in files)
+
+
+def test_unsampled_turn_is_not_traced(tmp_path):
+    service = TracingService(sample_rate=0.0, output_dir=str(tmp_path))
+
+    with service.trace("session-1") as trace:
+        assert trace is None
+        assert current_trace() is None
+
+    assert not os.listdir(tmp_path)
+
+
+def test_invalid_sample_rate():
+    with pytest.raises(ValueError):
+        TracingService(sample_rate=1.5)
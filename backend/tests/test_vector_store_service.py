@@ -1,11 +1,17 @@
 from unittest.mock import MagicMock, patch
 
+import numpy as np
 import pytest
 from langchain_core.documents import Document
 
 from services.config_service import ConfigService
 from services.vector_store_service import VectorStoreService
 
+COMPACT_CHUNK = Document(
+    page_content="Citrusy.",
+    metadata={"beer_id": "1", "section": "Aroma Hop", "style": "IPA"},
+)
+
 
 class TestVectorStoreService:
     @pytest.fixture
@@ -47,6 +53,130 @@ class TestVectorStoreService:
             use_jsonb=True,
         )
 
+    @patch("services.vector_store_service.RecipeStoreService")
+    @patch("services.vector_store_service.HuggingFaceEmbeddings")
+    @patch("services.vector_store_service.PGVector")
+    def test_add_documents_compact(
+        self, mock_pgvector, mock_embeddings, mock_recipe_store, mock_config
+    ):
+        """Test that compact storage embeds full chunks but stores compact ones."""
+        mock_embeddings.return_value.embed_documents.return_value = [[0.1, 0.2]]
+        service = VectorStoreService(config=mock_config, compact=True)
+        mock_vs = mock_pgvector.return_value
+
+        chunk = Document(
+            page_content="Recipe: Test Ale | Style: IPA | Section: Aroma Hop | Text: Citrusy.",
+            metadata={
+                "beer_id": "1",
+                "name": "Test Ale",
+                "style": "IPA",
+                "section": "Aroma Hop",
+                "start_index": 0,
+            },
+        )
+        service.add_documents([chunk])
+
+        mock_embeddings.return_value.embed_documents.assert_called_once_with(
+            [chunk.page_content]
+        )
+        mock_recipe_store.return_value.upsert.assert_called_once_with(
+            {"1": {"beer_id": "1", "name": "Test Ale", "style": "IPA"}}
+        )
+        mock_vs.add_embeddings.assert_called_once_with(
+            texts=["Citrusy."],
+            embeddings=[[0.1, 0.2]],
+            metadatas=[
+                {
+                    "beer_id": "1",
+                    "section": "Aroma Hop",
+                    "start_index": 0,
+                    "style": "IPA",
+                }
+            ],
+        )
+        mock_vs.add_documents.assert_not_called()
+
+    @patch("services.vector_store_service.RecipeStoreService")
+    @patch("services.vector_store_service.HuggingFaceEmbeddings")
+    @patch("services.vector_store_service.PGVector")
+    def test_similarity_search_expands_compact_chunks(
+        self, mock_pgvector, mock_embeddings, mock_recipe_store, mock_config
+    ):
+        """Test that compact chunks get their header and recipe metadata back on read."""
+        mock_vs = mock_pgvector.return_value
+        mock_vs.similarity_search_with_score_by_vector.return_value = [
+            (COMPACT_CHUNK, 0.2)
+        ]
+        mock_recipe_store.return_value.get_many.return_value = {
+            "1": {"beer_id": "1", "name": "Test Ale", "style": "IPA"}
+        }
+
+        service = VectorStoreService(config=mock_config)
+        results = service.similarity_search("hops")
+
+        doc, score = results[0]
+        assert score == 0.2
+        assert doc.page_content == (
+            "Recipe: Test Ale | Style: IPA | Section: Aroma Hop | Text: Citrusy."
+        )
+        assert doc.metadata["name"] == "Test Ale"
+        mock_recipe_store.return_value.get_many.assert_called_once_with(["1"])
+
+    @patch("services.vector_store_service.PgSearchService")
+    @patch("services.vector_store_service.RecipeStoreService")
+    @patch("services.vector_store_service.HuggingFaceEmbeddings")
+    @patch("services.vector_store_service.PGVector")
+    def test_native_search_with_fallback(
+        self,
+        mock_pgvector,
+        mock_embeddings,
+        mock_recipe_store,
+        mock_native,
+        mock_config,
+    ):
+        """Test that the native SQL path is used, and PGVector for unsupported filters."""
+        mock_config.db_prepared_statements = True
+        doc = Document(
+            page_content="Full chunk", metadata={"beer_id": "1", "name": "A"}
+        )
+        native = mock_native.return_value
+        native.search.return_value = [(doc, 0.1)]
+        mock_vs = mock_pgvector.return_value
+        mock_vs.similarity_search_with_score_by_vector.return_value = [(doc, 0.3)]
+
+        service = VectorStoreService(
+            config=mock_config,
+            collection_name="c",
+            database=MagicMock(),
+            native_search=True,
+        )
+
+        assert service.similarity_search_by_vector([1.0], k=5) == [(doc, 0.1)]
+        native.search.assert_called_once_with(
+            "c", [1.0], k=5, filter=None, with_embeddings=False
+        )
+        mock_vs.similarity_search_with_score_by_vector.assert_not_called()
+
+        native.search.side_effect = NotImplementedError("$like")
+        like = {"name": {"$like": "%IPA%"}}
+        assert service.similarity_search_by_vector([1.0], filter=like) == [(doc, 0.3)]
+        mock_vs.similarity_search_with_score_by_vector.assert_called_once_with(
+            [1.0], k=3, filter=like
+        )
+
+    @patch("services.vector_store_service.AutoTokenizer")
+    @patch("services.vector_store_service.PGVector")
+    def test_tokenizer_is_loaded_by_model_name(
+        self, mock_pgvector, mock_auto_tokenizer, mock_config
+    ):
+        """Test that the tokenizer does not depend on the injected embeddings."""
+        service = VectorStoreService(
+            config=mock_config, model_name="test-model", embeddings=MagicMock()
+        )
+
+        assert service.tokenizer is service.tokenizer
+        mock_auto_tokenizer.from_pretrained.assert_called_once_with("test-model")
+
     @patch("services.vector_store_service.HuggingFaceEmbeddings")
     @patch("services.vector_store_service.PGVector")
     def test_add_documents(self, mock_pgvector, mock_embeddings, mock_config):
@@ -59,17 +189,205 @@ class TestVectorStoreService:
 
         mock_vs.add_documents.assert_called_once_with(docs)
 
+    @patch("services.vector_store_service.HuggingFaceEmbeddings")
+    @patch("services.vector_store_service.PGVector")
+    def test_add_documents_with_bulk_embeddings(
+        self, mock_pgvector, mock_embeddings, mock_config
+    ):
+        """Test that a bulk embedder embeds the window once, then batches are stored."""
+        bulk = MagicMock()
+        bulk.embed_array.return_value = np.array(
+            [[0.25], [0.5], [0.75]], dtype=np.float32
+        )
+        service = VectorStoreService(config=mock_config, bulk_embeddings=bulk)
+        mock_vs = mock_pgvector.return_value
+
+        docs = [
+            Document(page_content=f"chunk {i}", metadata={"i": i}) for i in range(3)
+        ]
+        service.add_documents(docs, batch_size=2)
+
+        bulk.embed_array.assert_called_once_with(["chunk 0", "chunk 1", "chunk 2"])
+        mock_embeddings.return_value.embed_documents.assert_not_called()
+        assert mock_vs.add_embeddings.call_count == 2
+        second = mock_vs.add_embeddings.call_args_list[1].kwargs
+        assert second["texts"] == ["chunk 2"]
+        assert second["embeddings"] == [[0.75]]
+        assert second["metadatas"] == [{"i": 2}]
+
+    @patch("services.vector_store_service.HuggingFaceEmbeddings")
+    @patch("services.vector_store_service.PGVector")
+    def test_bulk_embeddings_are_stored_window_by_window(
+        self, mock_pgvector, mock_embeddings, mock_config
+    ):
+        """Test that each window is stored before the next one is embedded."""
+        events = []
+        bulk = MagicMock()
+
+        def embed(texts):
+            events.append(("embed", len(texts)))
+            return np.ones((len(texts), 2), dtype=np.float32)
+
+        bulk.embed_array.side_effect = embed
+        service = VectorStoreService(config=mock_config, bulk_embeddings=bulk)
+        mock_vs = mock_pgvector.return_value
+        mock_vs.add_embeddings.side_effect = lambda texts, **kwargs: events.append(
+            ("insert", len(texts))
+        )
+
+        docs = [Document(page_content=f"chunk {i}") for i in range(5)]
+        service.add_documents(docs, batch_size=2, window_size=2)
+
+        assert events == [
+            ("embed", 2),
+            ("insert", 2),
+            ("embed", 2),
+            ("insert", 2),
+            ("embed", 1),
+            ("insert", 1),
+        ]
+
     @patch("services.vector_store_service.HuggingFaceEmbeddings")
     @patch("services.vector_store_service.PGVector")
     def test_similarity_search(self, mock_pgvector, mock_embeddings, mock_config):
-        """Test that similarity_search calls the underlying vectorstore."""
+        """Test that similarity_search embeds the query and calls the underlying vectorstore."""
         service = VectorStoreService(config=mock_config)
         mock_vs = mock_pgvector.return_value
-        mock_vs.similarity_search_with_score.return_value = []
+        mock_vs.similarity_search_with_score_by_vector.return_value = []
+        mock_embeddings.return_value.embed_query.return_value = [0.1, 0.2]
 
         query = "beer"
         service.similarity_search(query, k=5)
 
-        mock_vs.similarity_search_with_score.assert_called_once_with(
-            query, k=5, filter=None
+        mock_embeddings.return_value.embed_query.assert_called_once_with(query)
+        mock_vs.similarity_search_with_score_by_vector.assert_called_once_with(
+            [0.1, 0.2], k=5, filter=None
+        )
+
+    @patch("services.vector_store_service.HuggingFaceEmbeddings")
+    @patch("services.vector_store_service.PGVector")
+    def test_two_tier_search(self, mock_pgvector, mock_embeddings, mock_config):
+        """Test that the chunk search is restricted to the recipes of the coarse pass."""
+        chunk_store = MagicMock()
+        recipe_store = MagicMock()
+        mock_pgvector.side_effect = [chunk_store, recipe_store]
+        mock_embeddings.return_value.embed_query.return_value = [0.1, 0.2]
+        recipe_store.similarity_search_with_score_by_vector.return_value = [
+            (Document(page_content="r2", metadata={"beer_id": "2"}), 0.1),
+            (Document(page_content="r1", metadata={"beer_id": "1"}), 0.2),
+            (Document(page_content="r2 again", metadata={"beer_id": "2"}), 0.3),
+        ]
+        chunk_store.similarity_search_with_score_by_vector.return_value = []
+
+        service = VectorStoreService(config=mock_config, two_tier=True)
+        assert service.recipe_collection_name == "beer_recipes_recipes"
+
+        service.two_tier_search(
+            "stout", k=10, filter={"style": "Dry Stout"}, recipe_k=5
+        )
+
+        recipe_store.similarity_search_with_score_by_vector.assert_called_once_with(
+            [0.1, 0.2], k=5, filter={"style": "Dry Stout"}
+        )
+        chunk_store.similarity_search_with_score_by_vector.assert_called_once_with(
+            [0.1, 0.2],
+            k=10,
+            filter={
+                "$and": [
+                    {"style": "Dry Stout"},
+                    {"beer_id": {"$in": ["2", "1"]}},
+                ]
+            },
         )
+
+    @patch("services.vector_store_service.HuggingFaceEmbeddings")
+    @patch("services.vector_store_service.PGVector")
+    def test_two_tier_search_no_candidates(
+        self, mock_pgvector, mock_embeddings, mock_config
+    ):
+        """Test that an empty coarse pass skips the chunk search."""
+        chunk_store = MagicMock()
+        recipe_store = MagicMock()
+        mock_pgvector.side_effect = [chunk_store, recipe_store]
+        recipe_store.similarity_search_with_score_by_vector.return_value = []
+
+        service = VectorStoreService(config=mock_config, two_tier=True)
+
+        assert service.two_tier_search("stout") == []
+        chunk_store.similarity_search_with_score_by_vector.assert_not_called()
+
+    @patch("services.vector_store_service.PgSearchService")
+    @patch("services.vector_store_service.HuggingFaceEmbeddings")
+    @patch("services.vector_store_service.PGVector")
+    def test_similarity_search_with_embeddings(
+        self, mock_pgvector, mock_embeddings, mock_sql, mock_config
+    ):
+        """Test that stored embeddings are read with SQL, even without native search."""
+        mock_config.db_prepared_statements = True
+        mock_embeddings.return_value.embed_query.return_value = [1.0, 0.0]
+        mock_vs = mock_pgvector.return_value
+        doc = Document(id="id-1", page_content="chunk")
+        sql_search = mock_sql.return_value
+        sql_search.search.return_value = [(doc, 0.2, [0.5, 0.5])]
+
+        service = VectorStoreService(
+            config=mock_config, collection_name="c", database=MagicMock()
+        )
+        query_embedding, candidates = service.similarity_search_with_embeddings(
+            "beer", k=30
+        )
+
+        assert query_embedding == [1.0, 0.0]
+        assert candidates == [(doc, 0.2, [0.5, 0.5])]
+        sql_search.search.assert_called_once_with(
+            "c", [1.0, 0.0], k=30, filter=None, with_embeddings=True
+        )
+        mock_vs.similarity_search_with_score_by_vector.assert_not_called()
+
+        # Filters the SQL path cannot translate: PGVector ranks, SQL reads the vectors
+        sql_search.search.side_effect = NotImplementedError("$like")
+        mock_vs.similarity_search_with_score_by_vector.return_value = [(doc, 0.3)]
+        sql_search.embeddings.return_value = {"id-1": [0.5, 0.5]}
+        like = {"name": {"$like": "%IPA%"}}
+        _, candidates = service.similarity_search_with_embeddings("beer", filter=like)
+
+        assert candidates == [(doc, 0.3, [0.5, 0.5])]
+        sql_search.embeddings.assert_called_once_with(["id-1"])
+
+    @patch("services.vector_store_service.HuggingFaceEmbeddings")
+    @patch("services.vector_store_service.PGVector")
+    def test_similarity_search_with_embeddings_requires_database(
+        self, mock_pgvector, mock_embeddings, mock_config
+    ):
+        """Test that the stored embeddings cannot be read without a DatabaseService."""
+        service = VectorStoreService(config=mock_config)
+
+        with pytest.raises(ValueError, match="DatabaseService"):
+            service.similarity_search_with_embeddings("beer", embedding=[1.0, 0.0])
+
+    @patch("services.vector_store_service.HuggingFaceEmbeddings")
+    @patch("services.vector_store_service.PGVector")
+    def test_search_follows_alias_switch(
+        self, mock_pgvector, mock_embeddings, mock_config
+    ):
+        """Test that the alias is resolved at query time and a switch rebinds the store."""
+        blue, green = MagicMock(), MagicMock()
+        blue.similarity_search_with_score_by_vector.return_value = []
+        green.similarity_search_with_score_by_vector.return_value = []
+        mock_pgvector.side_effect = [blue, green]
+        aliases = MagicMock()
+        aliases.resolve.side_effect = ["c@v1", "c@v1", "c@v2"]
+        service = VectorStoreService(
+            config=mock_config, collection_name="c", aliases=aliases
+        )
+        assert service.collection_name == "c@v1"
+
+        service.similarity_search_by_vector([0.1], k=1)
+        blue.similarity_search_with_score_by_vector.assert_called_once()
+        service.similarity_search_by_vector([0.1], k=1)
+
+        assert service.collection_name == "c@v2"
+        assert service.recipe_collection_name == "c@v2_recipes"
+        assert mock_pgvector.call_args.kwargs["collection_name"] == "c@v2"
+        green.similarity_search_with_score_by_vector.assert_called_once()
+        aliases.resolve.assert_called_with("c")
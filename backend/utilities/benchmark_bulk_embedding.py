@@ -0,0 +1,169 @@
+import argparse
+import logging
+import os
+import time
+
+import numpy as np
+
+from services.bulk_embedding_service import (
+    BulkEmbeddingService,
+    EmbeddingStats,
+    padding_stats,
+)
+from services.chunking_service import ChunkingService
+from utilities.benchmark_retrieval import DEFAULT_CSV
+
+logger = logging.getLogger(__name__)
+
+# Current ingestion: populate_db batches, split by sentence-transformers' encode
+INGEST_BATCH_SIZE = 100
+ENCODE_BATCH_SIZE = 32
+
+
+def current_batches(lengths: list[int]) -> list[list[int]]:
+    """
+    Batches of the current path: chunks in file order, 100 per embed_documents call,
+    each call sorted by length and encoded 32 at a time by sentence-transformers.
+    """
+    batches = []
+    for start in range(0, len(lengths), INGEST_BATCH_SIZE):
+        call = sorted(
+            range(start, min(start + INGEST_BATCH_SIZE, len(lengths))),
+            key=lambda i: lengths[i],
+            reverse=True,
+        )
+        for i in range(0, len(call), ENCODE_BATCH_SIZE):
+            batches.append(call[i : i + ENCODE_BATCH_SIZE])
+    return batches
+
+
+def run_current(
+    model: str, texts: list[str], lengths: list[int], num_threads: int
+) -> tuple[EmbeddingStats, np.ndarray]:
+    from services.vector_store_service import load_embedding_model
+
+    embeddings = load_embedding_model(model, num_threads=num_threads)
+    embeddings.embed_documents(texts[:8])  # warm-up
+    start = time.perf_counter()
+    vectors = []
+    for i in range(0, len(texts), INGEST_BATCH_SIZE):
+        vectors.extend(embeddings.embed_documents(texts[i : i + INGEST_BATCH_SIZE]))
+    stats = padding_stats(lengths, current_batches(lengths))
+    stats.seconds = time.perf_counter() - start
+    return stats, np.asarray(vectors, dtype=np.float32)
+
+
+def run_bulk(
+    model: str,
+    texts: list[str],
+    workers: int,
+    threads_per_worker: int,
+    batch_tokens: int,
+) -> tuple[EmbeddingStats, np.ndarray]:
+    service = BulkEmbeddingService(
+        model,
+        workers=workers,
+        threads_per_worker=threads_per_worker,
+        batch_tokens=batch_tokens,
+    )
+    try:
+        # Loads the model in every worker before timing
+        service.embed_documents(texts[: workers * 2])
+        vectors = service.embed_documents(texts)
+        return service.stats, np.asarray(vectors, dtype=np.float32)
+    finally:
+        service.close()
+
+
+def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    parser = argparse.ArgumentParser(
+        description="Benchmark length-bucketed multi-process embedding against the current path"
+    )
+    parser.add_argument(
+        "csv_path",
+        nargs="?",
+        default=DEFAULT_CSV,
+        help="Enriched recipes CSV (default: the benchmark fixture)",
+    )
+    parser.add_argument(
+        "--limit", "-l", type=int, default=None, help="Recipes to chunk and embed"
+    )
+    parser.add_argument(
+        "--model",
+        "-m",
+        default="Qwen/Qwen3-Embedding-0.6B",
+        help="Embedding model name to use (default: Qwen/Qwen3-Embedding-0.6B)",
+    )
+    parser.add_argument(
+        "--num_threads",
+        "-t",
+        type=int,
+        default=2,
+        help="Threads of the current path and of each worker (default: 2)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        default=[1, max(1, (os.cpu_count() or 1) // 2)],
+        help="Worker counts to measure (default: 1 and one per 2 cores)",
+    )
+    parser.add_argument(
+        "--batch-tokens",
+        type=int,
+        default=8192,
+        help="Padded tokens per bucket (default: 8192)",
+    )
+    parser.add_argument(
+        "--online",
+        action="store_true",
+        help="Allow downloading the model (default: local Hugging Face cache only)",
+    )
+    args = parser.parse_args()
+
+    if not args.online:
+        os.environ.setdefault("HF_HUB_OFFLINE", "1")
+    from transformers import AutoTokenizer
+
+    from utilities.populate_db import load_documents_from_csv
+
+    chunks = ChunkingService().split_documents(
+        load_documents_from_csv(args.csv_path, args.limit)
+    )
+    texts = [chunk.page_content for chunk in chunks]
+    tokenizer = AutoTokenizer.from_pretrained(args.model)
+    lengths = [
+        len(ids)
+        for ids in tokenizer([text.replace("\n", " ") for text in texts])["input_ids"]
+    ]
+
+    report = {}
+    report["current"], reference = run_current(
+        args.model, texts, lengths, args.num_threads
+    )
+    differences = {"current": 0.0}
+    for workers in args.workers:
+        label = f"bucketed x{workers}"
+        report[label], vectors = run_bulk(
+            args.model, texts, workers, args.num_threads, args.batch_tokens
+        )
+        # Padding changes the numerics slightly, never the result
+        differences[label] = float(np.abs(vectors - reference).max())
+
+    print(
+        f"\n{len(texts)} chunks, {sum(lengths)} tokens\n"
+        f"{'path':<16} {'seconds':>8} {'tokens/s':>9} {'padding':>8} {'max diff':>9}"
+    )
+    for label, stats in report.items():
+        print(
+            f"{label:<16} {stats.seconds:>8.1f} {stats.tokens_per_second:>9.0f} "
+            f"{stats.padding_waste:>8.1%} {differences[label]:>9.1e}"
+        )
+
+
+if __name__ == "__main__":
+    main()
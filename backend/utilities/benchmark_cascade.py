@@ -0,0 +1,151 @@
+import argparse
+import json
+import logging
+import os
+
+from utilities.benchmark_retrieval import (
+    DEFAULT_CSV,
+    DEFAULT_QUERIES,
+    build_store,
+    load_config,
+    run_suite,
+)
+
+logger = logging.getLogger(__name__)
+
+MINILM = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+# CANDIDATES[:CASCADE:KEEP]; the first one is the current setup
+DEFAULT_CONFIGS = [
+    "10",
+    "30",
+    "30:lexical:10",
+    "30:lexical:5",
+    f"30:{MINILM}:10",
+    f"30:{MINILM}:5",
+]
+
+
+def parse_config(spec: str) -> dict[str, str]:
+    """'30:lexical:10' -> ConfigService overrides for the candidate pool and cascade."""
+    candidates, _, rest = spec.partition(":")
+    overrides = {"RERANK_CANDIDATES": candidates}
+    if rest:
+        cascade, _, keep = rest.rpartition(":")
+        overrides["RERANK_CASCADE"] = cascade
+        overrides["RERANK_CASCADE_KEEP"] = keep
+    return overrides
+
+
+def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    logging.getLogger("sentence_transformers").setLevel(logging.WARNING)
+    logging.getLogger("transformers").setLevel(logging.WARNING)
+
+    parser = argparse.ArgumentParser(
+        description="Quality and latency of reranking cascades on the retrieval fixture"
+    )
+    parser.add_argument(
+        "configs",
+        nargs="*",
+        default=DEFAULT_CONFIGS,
+        help="CANDIDATES[:CASCADE:KEEP] settings to compare (default: 10 and 30 "
+        "candidates, lexical and MiniLM cascades keeping 10 or 5)",
+    )
+    parser.add_argument("--csv-path", default=DEFAULT_CSV, help="Fixture recipes CSV")
+    parser.add_argument(
+        "--queries", default=DEFAULT_QUERIES, help="Fixture labeled queries"
+    )
+    parser.add_argument(
+        "--model",
+        "-m",
+        default="Qwen/Qwen3-Embedding-0.6B",
+        help="Embedding model to use (default: Qwen/Qwen3-Embedding-0.6B)",
+    )
+    parser.add_argument(
+        "--rerank-model",
+        "-r",
+        default="Qwen/Qwen3-Reranker-0.6B",
+        help="Reranker model to use (default: Qwen/Qwen3-Reranker-0.6B)",
+    )
+    parser.add_argument(
+        "--k", type=int, default=3, help="Cutoff for recall and nDCG (default: 3)"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Timed runs per query (default: 3)"
+    )
+    parser.add_argument(
+        "--num_threads",
+        "-t",
+        type=int,
+        default=2,
+        help="Number of CPU threads for the models (default: 2)",
+    )
+    parser.add_argument(
+        "--online",
+        action="store_true",
+        help="Allow downloading models from the Hugging Face Hub",
+    )
+    args = parser.parse_args()
+
+    if not args.online:
+        os.environ.setdefault("HF_HUB_OFFLINE", "1")
+    import torch
+
+    from services.rag_tool import BeerRAGTool
+    from services.reranker_service import RerankerService, load_cascade
+    from services.vector_store_service import load_embedding_model
+
+    torch.set_num_threads(args.num_threads)
+    base = load_config()
+    embeddings = load_embedding_model(args.model, num_threads=args.num_threads)
+    store = build_store(args.csv_path, embeddings, two_tier=base.two_tier_retrieval)
+    # The large model is loaded once; the first stage is swapped per config
+    reranker = RerankerService(
+        model_name=args.rerank_model,
+        max_length=base.rerank_max_length,
+        batch_size=base.rerank_batch_size,
+    )
+    with open(args.queries, "r", encoding="utf-8") as f:
+        queries = json.load(f)
+
+    reports = {}
+    first_stages = {}
+    for spec in args.configs:
+        config = load_config(parse_config(spec))
+        cascade = config.rerank_cascade
+        if cascade not in first_stages:
+            first_stages[cascade] = load_cascade(cascade)
+        reranker.cascade = first_stages[cascade]
+        reranker.cascade_keep = config.rerank_cascade_keep
+        tool = BeerRAGTool(
+            config=config,
+            model_name=args.model,
+            collection_name="benchmark",
+            rerank_model=args.rerank_model,
+            vector_store=store,
+            reranker=reranker,
+        )
+        tool._run(queries[0]["query"])  # warm-up
+        reports[spec] = run_suite(tool, queries, k=args.k, repeat=args.repeat)
+
+    recall, ndcg = f"recall@{args.k}", f"ndcg@{args.k}"
+    print(
+        f"\n{'config':<48} {recall:>9} {'mrr':>6} {ndcg:>7} "
+        f"{'prune p50':>10} {'rerank p50':>11} {'total p95':>10}"
+    )
+    for spec, report in reports.items():
+        metrics, latency = report["metrics"], report["latency_ms"]
+        prune = latency.get("prune", {}).get("p50", 0.0)
+        print(
+            f"{spec:<48} {metrics[recall]:>9.3f} {metrics['mrr']:>6.3f} "
+            f"{metrics[ndcg]:>7.3f} {prune:>10.1f} "
+            f"{latency['rerank']['p50']:>11.1f} {latency['total']['p95']:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import argparse
+import logging
+import multiprocessing
+import os
+import random
+import resource
+import tempfile
+import time
+
+import pandas as pd
+
+from services.data_service import DataService
+from utilities.benchmark_retrieval import DEFAULT_CSV
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONS = ("csv", "parquet", "arrow")
+# full: every column; projected: the columns populate-db needs; documents: projected
+# and streamed into Documents, as populate-db does
+MODES = ("full", "projected", "documents")
+
+
+def synthesize(source: pd.DataFrame, rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Recipes built from the fixture: each text cell holds the words of a random fixture
+    cell of the same column, shuffled. The vocabulary stays smaller than that of real
+    recipes, so compressed sizes are somewhat optimistic.
+    """
+    rng = random.Random(seed)
+    data = {"BeerID": [str(100_000 + i) for i in range(rows)]}
+    for column in source.columns.drop("BeerID"):
+        values = source[column].tolist()
+        if column in ("ABV", "IBU"):
+            data[column] = [rng.choice(values) for _ in range(rows)]
+            continue
+        cells = []
+        for _ in range(rows):
+            words = str(rng.choice(values)).split(" ")
+            rng.shuffle(words)
+            cells.append(" ".join(words))
+        data[column] = cells
+    return pd.DataFrame(data)
+
+
+def measure(path: str, mode: str, queue):
+    """Loads the file in a fresh process; reports seconds and peak RSS growth in MB."""
+    from utilities.populate_db import DOCUMENT_COLUMNS, load_documents_from_csv
+
+    logging.getLogger("utilities.populate_db").setLevel(logging.WARNING)
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if mode == "full":
+        rows = len(DataService(path).load())
+    elif mode == "projected":
+        rows = len(DataService(path).load(columns=DOCUMENT_COLUMNS))
+    else:
+        rows = len(load_documents_from_csv(path))
+    seconds = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put((rows, seconds, (peak - baseline) / 1024))
+
+
+def run(path: str, mode: str, repeat: int) -> tuple[int, float, float]:
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for _ in range(repeat):
+        queue = context.Queue()
+        process = context.Process(target=measure, args=(path, mode, queue))
+        process.start()
+        results.append(queue.get())
+        process.join()
+    rows = results[0][0]
+    return (
+        rows,
+        min(seconds for _, seconds, _ in results),
+        max(memory for _, _, memory in results),
+    )
+
+
+def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    parser = argparse.ArgumentParser(
+        description="Load time and memory of the enriched recipes in CSV, Parquet "
+        "and Arrow"
+    )
+    parser.add_argument(
+        "--csv-path", default=DEFAULT_CSV, help="Enriched recipes to synthesize from"
+    )
+    parser.add_argument(
+        "--rows",
+        type=int,
+        default=100_000,
+        help="Synthetic recipes (default: 100000)",
+    )
+    parser.add_argument(
+        "--compression",
+        default="zstd",
+        help="Codec of the columnar files (default: zstd)",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Runs per setting; the fastest is reported (default: 3)",
+    )
+    parser.add_argument(
+        "--dir", default=None, help="Directory for the files (default: a temp dir)"
+    )
+    args = parser.parse_args()
+
+    source = DataService(args.csv_path).load()
+    df = synthesize(source, args.rows)
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        paths = {}
+        for extension in EXTENSIONS:
+            path = os.path.join(tmp, f"recipes.{extension}")
+            start = time.perf_counter()
+            DataService(path, compression=args.compression).save(df)
+            logger.info(
+                f"Wrote {path} ({os.path.getsize(path) / 2**20:.1f} MB) in "
+                f"{time.perf_counter() - start:.1f} s."
+            )
+            paths[extension] = path
+        del df
+
+        print(
+            f"\n{args.rows} recipes, {len(source.columns)} columns\n"
+            f"{'format':<8} {'size MB':>8} {'mode':<10} {'rows':>7} "
+            f"{'load s':>7} {'peak MB':>8}"
+        )
+        for extension, path in paths.items():
+            size = os.path.getsize(path) / 2**20
+            for mode in MODES:
+                rows, seconds, memory = run(path, mode, args.repeat)
+                print(
+                    f"{extension:<8} {size:>8.1f} {mode:<10} {rows:>7} "
+                    f"{seconds:>7.2f} {memory:>8.0f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
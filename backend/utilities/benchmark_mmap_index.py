@@ -0,0 +1,201 @@
+import argparse
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import FakeEmbeddings
+
+from services.mmap_store_service import DTYPES, MmapStoreService, SnapshotWriter
+from utilities.benchmark_search_path import STYLES, random_vectors
+from utilities.benchmark_two_tier import percentile
+
+logger = logging.getLogger(__name__)
+
+FILTERS = {
+    "no filter": None,
+    "style + abv": {"$and": [{"style": {"$in": STYLES[:2]}}, {"abv": {"$gt": 6}}]},
+}
+
+
+def build_synthetic_snapshot(
+    root: str, size: int, dim: int, dtype: str, batch_size: int = 10000
+) -> str:
+    """Writes a snapshot of random chunks shaped like the recipe chunks."""
+    rng = np.random.default_rng(0)
+    writer = SnapshotWriter(root, dim=dim, dtype=dtype)
+    index = writer.index("chunks", size)
+    for start in range(0, size, batch_size):
+        count = min(batch_size, size - start)
+        documents = [
+            Document(
+                page_content=f"Synthetic chunk {start + i}",
+                metadata={
+                    "beer_id": str((start + i) // 8),
+                    "name": f"Beer {(start + i) // 8}",
+                    "style": STYLES[(start + i) % len(STYLES)],
+                    "abv": round(float(rng.uniform(3, 12)), 1),
+                },
+            )
+            for i in range(count)
+        ]
+        index.add(documents, random_vectors(rng, count, dim))
+    return writer.publish()
+
+
+def run_load(search, queries: np.ndarray, threads: int) -> dict:
+    """Runs the queries on a thread pool; returns latency percentiles and throughput."""
+
+    def timed_query(query: np.ndarray) -> float:
+        start = time.perf_counter()
+        search(query.tolist())
+        return (time.perf_counter() - start) * 1000
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        # Warm up page cache, connections and prepared statements
+        list(executor.map(timed_query, queries[: threads * 2]))
+        start = time.perf_counter()
+        latencies = list(executor.map(timed_query, queries))
+        elapsed = time.perf_counter() - start
+
+    qps = len(queries) / elapsed
+    return {
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "qps": qps,
+        "qps_per_core": qps / min(threads, os.cpu_count() or 1),
+    }
+
+
+def run_benchmark(
+    root: str,
+    dim: int,
+    k: int = 10,
+    n_queries: int = 200,
+    threads: int = 1,
+    collection: str | None = None,
+) -> dict:
+    """Measures the mmap index and, if a collection is given, the native SQL path."""
+    rng = np.random.default_rng(1)
+    queries = random_vectors(rng, n_queries, dim)
+    store = MmapStoreService(root, FakeEmbeddings(size=dim))
+    paths = {
+        "mmap": lambda flt: lambda emb: store.similarity_search_by_vector(
+            emb, k=k, filter=flt
+        )
+    }
+
+    database = None
+    if collection:
+        # Imported lazily: the mmap-only benchmark runs without Postgres
+        from services.config_service import ConfigService
+        from services.database_service import DatabaseService
+        from services.pg_search_service import PgSearchService
+
+        database = DatabaseService(ConfigService())
+        native = PgSearchService(
+            database.pool, prepare=database.config.db_prepared_statements
+        )
+        paths["pgvector"] = lambda flt: lambda emb: native.search(
+            collection, emb, k=k, filter=flt
+        )
+
+    report = {}
+    try:
+        for label, filter in FILTERS.items():
+            for path, make_search in paths.items():
+                report.setdefault(label, {})[path] = run_load(
+                    make_search(filter), queries, threads
+                )
+    finally:
+        if database is not None:
+            database.close()
+    return report
+
+
+def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    parser = argparse.ArgumentParser(
+        description="Benchmark the memory-mapped index against the PGVector search path"
+    )
+    parser.add_argument(
+        "--index",
+        default=None,
+        help="Existing index directory (default: build a synthetic one)",
+    )
+    parser.add_argument(
+        "--size",
+        type=int,
+        default=100000,
+        help="Chunks in the synthetic index (default: 100000)",
+    )
+    parser.add_argument(
+        "--dim", type=int, default=1024, help="Vector dimension (default: 1024)"
+    )
+    parser.add_argument(
+        "--dtype",
+        choices=DTYPES,
+        default="float16",
+        help="Vector storage type of the synthetic index (default: float16)",
+    )
+    parser.add_argument(
+        "--k", type=int, default=10, help="Chunks retrieved per query (default: 10)"
+    )
+    parser.add_argument(
+        "--queries",
+        type=int,
+        default=200,
+        help="Timed queries per path and filter (default: 200)",
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=1,
+        help="Concurrent queries, e.g. the number of API workers (default: 1)",
+    )
+    parser.add_argument(
+        "--collection",
+        default=None,
+        help="Also query this PGVector collection natively (needs Postgres). "
+        "Use the collection the index was exported from for a like-for-like run.",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = args.index
+        dim = args.dim
+        if root is None:
+            root = tmp
+            logger.info(f"Building a synthetic {args.dtype} index of {args.size}...")
+            build_synthetic_snapshot(root, args.size, dim, args.dtype)
+        else:
+            dim = MmapStoreService(root, None)._current().manifest["dim"]
+        report = run_benchmark(
+            root,
+            dim,
+            k=args.k,
+            n_queries=args.queries,
+            threads=args.threads,
+            collection=args.collection,
+        )
+
+    print(
+        f"\n{'filter':<12} {'path':<9} {'p50 ms':>9} {'p95 ms':>9} {'QPS':>9} "
+        f"{'QPS/core':>9}"
+    )
+    for label, by_path in report.items():
+        for path, stats in by_path.items():
+            print(
+                f"{label:<12} {path:<9} {stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} "
+                f"{stats['qps']:>9.1f} {stats['qps_per_core']:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+import argparse
+import json
+import logging
+import os
+import tempfile
+import time
+
+import numpy as np
+from langchain_core.documents import Document
+
+from services.chunking_service import ChunkingService
+from services.mmap_store_service import SNAPSHOTS_DIR, MmapStoreService, write_snapshot
+from services.quantization import normalize
+from utilities.benchmark_retrieval import DEFAULT_CSV, DEFAULT_QUERIES
+from utilities.benchmark_two_tier import percentile
+
+logger = logging.getLogger(__name__)
+
+# Label -> write_snapshot options; compared with exact float32 search at full size
+VARIANTS = {
+    "float16": {"dtype": "float16"},
+    "int8": {"dtype": "int8"},
+    "float16 @512": {"dtype": "float16", "dim": 512},
+    "float16 @256": {"dtype": "float16", "dim": 256},
+    "int8 @256": {"dtype": "int8", "dim": 256},
+    "binary + rescore": {"dtype": "float16", "prefilter": "binary"},
+    "binary @512 + rescore": {
+        "dtype": "float16",
+        "prefilter": "binary",
+        "prefilter_dim": 512,
+    },
+    "int8 @256 + rescore": {
+        "dtype": "float16",
+        "prefilter": "int8",
+        "prefilter_dim": 256,
+    },
+}
+
+INDEX_FILES = ("vectors.npy", "scales.npy", "prefilter.npy", "prefilter_scales.npy")
+
+
+def embed_fixture(model: str, csv_path: str, queries_path: str, num_threads: int):
+    """Embeds the benchmark fixture chunks and labeled queries at full precision."""
+    from services.vector_store_service import load_embedding_model
+    from utilities.populate_db import load_documents_from_csv
+
+    embeddings = load_embedding_model(model, num_threads=num_threads)
+    chunks = ChunkingService().split_documents(load_documents_from_csv(csv_path))
+    logger.info(f"Embedding {len(chunks)} chunks...")
+    vectors = embeddings.embed_documents([d.page_content for d in chunks])
+    with open(queries_path, "r", encoding="utf-8") as f:
+        queries = [embeddings.embed_query(item["query"]) for item in json.load(f)]
+    return np.asarray(vectors, dtype=np.float32), np.asarray(queries, dtype=np.float32)
+
+
+def load_collection(collection: str) -> np.ndarray:
+    """Reads the full-precision vectors of a PGVector collection."""
+    import psycopg
+    from pgvector.psycopg import register_vector
+
+    from services.config_service import ConfigService
+    from utilities.export_index import ROWS_QUERY
+
+    with psycopg.connect(ConfigService().psycopg_connection_string) as conn:
+        register_vector(conn)
+        with conn.cursor(binary=True) as cur:
+            rows = cur.execute(ROWS_QUERY, [collection]).fetchall()
+    return np.stack([row[2] for row in rows]).astype(np.float32)
+
+
+def exact_top_k(corpus: np.ndarray, queries: np.ndarray, k: int) -> list[set[int]]:
+    similarities = normalize(queries) @ normalize(corpus).T
+    return [set(np.argsort(-row)[:k].tolist()) for row in similarities]
+
+
+def time_exact(corpus: np.ndarray, queries: np.ndarray, k: int) -> list[float]:
+    """Latency of the current setup's scan: exact float32 cosine at full size."""
+    corpus = normalize(corpus)
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        similarities = corpus @ normalize(query)
+        top = np.argpartition(-similarities, k - 1)[:k]
+        top = top[np.argsort(-similarities[top])]
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def index_size(root: str) -> int:
+    """Bytes of vector data in the published snapshot (documents excluded)."""
+    size = 0
+    for directory, _, files in os.walk(os.path.join(root, SNAPSHOTS_DIR)):
+        size += sum(
+            os.path.getsize(os.path.join(directory, name))
+            for name in files
+            if name in INDEX_FILES
+        )
+    return size
+
+
+def run_benchmark(
+    corpus: np.ndarray,
+    queries: np.ndarray,
+    k: int = 10,
+    rescore_factor: int = 10,
+    variants: dict = VARIANTS,
+) -> dict:
+    """Reports index size, query latency and recall@k against exact float32 search."""
+    n, dim = corpus.shape
+    truth = exact_top_k(corpus, queries, k)
+    latencies = time_exact(corpus, queries, k)
+    report = {
+        "float32 (current)": {
+            # pgvector stores 4 bytes per dimension plus an 8-byte header
+            "size_mb": n * (4 * dim + 8) / 1e6,
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "recall": 1.0,
+        }
+    }
+    # Row numbers identify the results
+    documents = [Document(page_content="", metadata={"row": i}) for i in range(n)]
+
+    for label, options in variants.items():
+        if options.get("dim", dim) > dim or options.get("prefilter_dim", dim) > dim:
+            continue
+        with tempfile.TemporaryDirectory() as root:
+            write_snapshot(root, documents, corpus, **options)
+            store = MmapStoreService(
+                root, embeddings=None, rescore_factor=rescore_factor
+            )
+            latencies, recalls = [], []
+            for query, expected in zip(queries, truth):
+                start = time.perf_counter()
+                results = store.similarity_search_by_vector(query.tolist(), k=k)
+                latencies.append((time.perf_counter() - start) * 1000)
+                found = {d.metadata["row"] for d, _ in results}
+                recalls.append(len(found & expected) / k)
+            report[label] = {
+                "size_mb": index_size(root) / 1e6,
+                "p50_ms": percentile(latencies, 50),
+                "p95_ms": percentile(latencies, 95),
+                "recall": float(np.mean(recalls)),
+            }
+    return report
+
+
+def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    parser = argparse.ArgumentParser(
+        description="Benchmark truncated and quantized vectors against exact float32 search"
+    )
+    parser.add_argument(
+        "--collection",
+        default=None,
+        help="Read vectors from this PGVector collection (default: embed the fixture)",
+    )
+    parser.add_argument("--csv_path", default=DEFAULT_CSV, help="Fixture recipes CSV")
+    parser.add_argument(
+        "--queries", default=DEFAULT_QUERIES, help="Fixture labeled queries"
+    )
+    parser.add_argument(
+        "--sample-queries",
+        type=int,
+        default=200,
+        help="Corpus vectors also used as queries (default: 200)",
+    )
+    parser.add_argument(
+        "--model",
+        "-m",
+        default="Qwen/Qwen3-Embedding-0.6B",
+        help="Embedding model name to use (default: Qwen/Qwen3-Embedding-0.6B)",
+    )
+    parser.add_argument(
+        "--num_threads",
+        "-t",
+        type=int,
+        default=2,
+        help="Number of CPU threads for the embedding model (default: 2)",
+    )
+    parser.add_argument(
+        "--k", type=int, default=10, help="Neighbors per query (default: 10)"
+    )
+    parser.add_argument(
+        "--rescore-factor",
+        type=int,
+        default=10,
+        help="Candidates per result rescored after a prefilter (default: 10)",
+    )
+    parser.add_argument(
+        "--online",
+        action="store_true",
+        help="Allow downloading the model (default: local Hugging Face cache only)",
+    )
+    args = parser.parse_args()
+
+    if args.collection:
+        corpus = load_collection(args.collection)
+        queries = np.empty((0, corpus.shape[1]), dtype=np.float32)
+    else:
+        if not args.online:
+            os.environ.setdefault("HF_HUB_OFFLINE", "1")
+        corpus, queries = embed_fixture(
+            args.model, args.csv_path, args.queries, args.num_threads
+        )
+    rng = np.random.default_rng(0)
+    sample = rng.choice(len(corpus), min(args.sample_queries, len(corpus)), False)
+    queries = np.concatenate([queries, corpus[sample]])
+
+    report = run_benchmark(
+        corpus, queries, k=args.k, rescore_factor=args.rescore_factor
+    )
+    print(
+        f"\n{len(corpus)} vectors, {corpus.shape[1]} dims, {len(queries)} queries\n"
+        f"{'variant':<24} {'MB':>8} {'p50 ms':>8} {'p95 ms':>8} "
+        f"{'recall@' + str(args.k):>10}"
+    )
+    for label, stats in report.items():
+        print(
+            f"{label:<24} {stats['size_mb']:>8.2f} {stats['p50_ms']:>8.2f} "
+            f"{stats['p95_ms']:>8.2f} {stats['recall']:>10.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
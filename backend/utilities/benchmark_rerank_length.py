@@ -0,0 +1,127 @@
+import argparse
+import logging
+import os
+import statistics
+import time
+
+from services.chunking_service import ChunkingService
+from utilities.benchmark_retrieval import DEFAULT_CSV
+from utilities.benchmark_two_tier import percentile
+
+logger = logging.getLogger(__name__)
+
+QUERY = "a crisp, hoppy pale ale with citrus aroma and a dry finish"
+
+
+def passage_of_length(tokenizer, text: str, tokens: int) -> str:
+    """Repeats text and cuts it to the given number of tokens."""
+    ids = tokenizer(text, add_special_tokens=False)["input_ids"]
+    ids = (ids * (tokens // max(len(ids), 1) + 1))[:tokens]
+    return tokenizer.decode(ids)
+
+
+def time_predict(model, pairs: list, batch_size: int, repeat: int) -> list[float]:
+    model.predict(pairs[:batch_size], batch_size=batch_size)  # warm-up
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        model.predict(pairs, batch_size=batch_size)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    parser = argparse.ArgumentParser(
+        description="Micro-benchmark of reranking latency vs sequence length on CPU"
+    )
+    parser.add_argument(
+        "--rerank_model",
+        "-r",
+        default="Qwen/Qwen3-Reranker-0.6B",
+        help="Reranker model name to use (default: Qwen/Qwen3-Reranker-0.6B)",
+    )
+    parser.add_argument(
+        "--lengths",
+        type=int,
+        nargs="+",
+        default=[64, 128, 256, 512],
+        help="Passage lengths in tokens (default: 64 128 256 512)",
+    )
+    parser.add_argument(
+        "--batch-sizes",
+        type=int,
+        nargs="+",
+        default=[8, 16, 32],
+        help="Pairs per forward pass (default: 8 16 32)",
+    )
+    parser.add_argument(
+        "--candidates",
+        type=int,
+        default=30,
+        help="Pairs reranked per query (default: 30, the MMR fetch size)",
+    )
+    parser.add_argument(
+        "--num_threads",
+        "-t",
+        type=int,
+        default=2,
+        help="Number of CPU threads (default: 2)",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="Timed runs per setting (default: 5)"
+    )
+    parser.add_argument(
+        "--online",
+        action="store_true",
+        help="Allow downloading the model (default: local Hugging Face cache only)",
+    )
+    args = parser.parse_args()
+
+    if not args.online:
+        os.environ.setdefault("HF_HUB_OFFLINE", "1")
+    import torch
+
+    from services.reranker_service import load_cross_encoder
+    from utilities.populate_db import load_documents_from_csv
+
+    torch.set_num_threads(args.num_threads)
+    model = load_cross_encoder(args.rerank_model)
+    model.to("cpu")
+    tokenizer = model.tokenizer
+
+    chunking = ChunkingService()
+    chunks = chunking.split_documents(load_documents_from_csv(DEFAULT_CSV))
+    passages = [chunking.format_for_rerank(chunk) for chunk in chunks]
+
+    print(f"\n{'passage tokens':>14} {'batch':>6} {'p50 ms':>9} {'ms/pair':>8}")
+    for length in args.lengths:
+        text = passage_of_length(tokenizer, " ".join(passages[:20]), length)
+        pairs = [[QUERY, text]] * args.candidates
+        for batch_size in args.batch_sizes:
+            latencies = time_predict(model, pairs, batch_size, args.repeat)
+            p50 = percentile(latencies, 50)
+            print(
+                f"{length:>14} {batch_size:>6} {p50:>9.1f} "
+                f"{p50 / args.candidates:>8.2f}"
+            )
+
+    # Real passages of mixed lengths: one padded batch vs sorted batches
+    mixed = [[QUERY, passage] for passage in passages[: args.candidates]]
+    lengths = [
+        len(tokenizer(p, add_special_tokens=False)["input_ids"]) for _, p in mixed
+    ]
+    print(
+        f"\nFixture passages: {statistics.mean(lengths):.0f} tokens on average, "
+        f"{max(lengths)} at most"
+    )
+    for batch_size in sorted({len(mixed), *args.batch_sizes}):
+        latencies = time_predict(model, mixed, batch_size, args.repeat)
+        print(f"batch {batch_size:>3}: p50 {percentile(latencies, 50):.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
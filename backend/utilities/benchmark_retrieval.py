@@ -0,0 +1,355 @@
+import argparse
+import json
+import logging
+import math
+import os
+import re
+import statistics
+import sys
+import time
+
+from services.chunking_service import ChunkingService
+from services.config_service import ConfigService
+from services.instrumentation import StageCollector, record
+from services.memory_store_service import InMemoryStoreService
+
+logger = logging.getLogger(__name__)
+
+BENCHMARK_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "benchmarks")
+DEFAULT_CSV = os.path.join(BENCHMARK_DIR, "recipes.csv")
+DEFAULT_QUERIES = os.path.join(BENCHMARK_DIR, "queries.json")
+
+# BeerRAGTool._run arguments that a labeled query may carry besides the query text
+FILTER_ARGS = ("styles", "abv_lte", "abv_gt", "ibu_lte", "ibu_gt")
+
+STAGES = ("embed", "search", "select", "prune", "rerank", "format", "total")
+
+URL_PATTERN = re.compile(r"Source URL: \S+/recipe/view/(\S+)")
+
+
+def load_config(overrides: dict[str, str] | None = None) -> ConfigService:
+    """Builds the ConfigService for a benchmark run. LLM keys are irrelevant to retrieval."""
+    values = {
+        "LLM_PROVIDER": "google",
+        "GOOGLE_API_KEY": os.getenv("GOOGLE_API_KEY") or "unused-by-benchmark",
+    }
+    values.update(overrides or {})
+    return ConfigService(**values)
+
+
+def build_store(csv_path: str, embeddings, two_tier: bool) -> InMemoryStoreService:
+    """Indexes the fixture recipes in an in-process store (no database needed)."""
+    from utilities.populate_db import load_documents_from_csv
+
+    documents = load_documents_from_csv(csv_path)
+    chunking_service = ChunkingService()
+    store = InMemoryStoreService(embeddings, two_tier=two_tier)
+    store.add_documents(chunking_service.split_documents(documents))
+    if two_tier:
+        store.add_recipe_summaries(chunking_service.create_recipe_summaries(documents))
+    return store
+
+
+def ranked_beer_ids(tool_output: str) -> list[str]:
+    """Extracts the recipe ranking from the tool output (one Source URL per recipe)."""
+    return URL_PATTERN.findall(tool_output)
+
+
+def recall_at_k(ranked: list[str], relevant: list[str], k: int) -> float:
+    if not relevant:
+        return 0.0
+    return len(set(ranked[:k]) & set(relevant)) / len(relevant)
+
+
+def reciprocal_rank(ranked: list[str], relevant: list[str]) -> float:
+    for position, beer_id in enumerate(ranked, 1):
+        if beer_id in relevant:
+            return 1.0 / position
+    return 0.0
+
+
+def ndcg_at_k(ranked: list[str], relevant: list[str], k: int) -> float:
+    """Binary-relevance nDCG."""
+    dcg = sum(
+        1.0 / math.log2(position + 1)
+        for position, beer_id in enumerate(ranked[:k], 1)
+        if beer_id in relevant
+    )
+    ideal = sum(1.0 / math.log2(p + 1) for p in range(1, min(len(relevant), k) + 1))
+    return dcg / ideal if ideal else 0.0
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize_latencies(durations: dict[str, list[float]]) -> dict:
+    """Converts per-stage durations (seconds) to millisecond percentiles."""
+    summary = {}
+    for stage in STAGES:
+        values = [d * 1000 for d in durations.get(stage, [])]
+        if not values:
+            continue
+        summary[stage] = {
+            "count": len(values),
+            "mean": statistics.mean(values),
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "p99": percentile(values, 99),
+        }
+    return summary
+
+
+def run_suite(tool, queries: list[dict], k: int = 3, repeat: int = 1):
+    """Replays the labeled queries through BeerRAGTool._run and scores the rankings."""
+    per_query = []
+    with StageCollector() as collector:
+        for item in queries:
+            kwargs = {arg: item[arg] for arg in FILTER_ARGS if arg in item}
+            relevant = [str(bid) for bid in item["relevant_beer_ids"]]
+            for _ in range(repeat):
+                start = time.perf_counter()
+                output = tool._run(item["query"], **kwargs)
+                record("total", time.perf_counter() - start)
+
+            ranked = ranked_beer_ids(output)
+            per_query.append(
+                {
+                    "query": item["query"],
+                    "ranked": ranked,
+                    f"recall@{k}": recall_at_k(ranked, relevant, k),
+                    "rr": reciprocal_rank(ranked, relevant),
+                    f"ndcg@{k}": ndcg_at_k(ranked, relevant, k),
+                }
+            )
+
+    return {
+        "k": k,
+        "metrics": {
+            f"recall@{k}": statistics.mean(q[f"recall@{k}"] for q in per_query),
+            "mrr": statistics.mean(q["rr"] for q in per_query),
+            f"ndcg@{k}": statistics.mean(q[f"ndcg@{k}"] for q in per_query),
+        },
+        "latency_ms": summarize_latencies(collector.durations),
+        "queries": per_query,
+    }
+
+
+def compare_reports(
+    base: dict,
+    candidate: dict,
+    max_latency_regression: float = 0.2,
+    max_quality_drop: float = 0.02,
+) -> tuple[list[str], list[str]]:
+    """
+    Diffs two reports. Returns (lines, regressions): a quality metric dropping by more
+    than max_quality_drop, or a p95 stage latency growing by more than
+    max_latency_regression (relative), counts as a regression.
+    """
+    lines = []
+    regressions = []
+
+    for metric, base_value in base["metrics"].items():
+        value = candidate["metrics"].get(metric)
+        if value is None:
+            continue
+        delta = value - base_value
+        lines.append(f"{metric:<12} {base_value:>8.3f} -> {value:>8.3f} ({delta:+.3f})")
+        if delta < -max_quality_drop:
+            regressions.append(f"{metric} dropped by {-delta:.3f}")
+
+    for stage, base_stats in base["latency_ms"].items():
+        stats = candidate["latency_ms"].get(stage)
+        if stats is None:
+            continue
+        ratio = stats["p95"] / base_stats["p95"] - 1 if base_stats["p95"] else 0.0
+        lines.append(
+            f"p95 {stage:<8} {base_stats['p95']:>8.1f} -> {stats['p95']:>8.1f} ms ({ratio:+.0%})"
+        )
+        if ratio > max_latency_regression:
+            regressions.append(f"p95 {stage} latency grew by {ratio:.0%}")
+
+    candidate_queries = {q["query"]: q for q in candidate["queries"]}
+    for query in base["queries"]:
+        other = candidate_queries.get(query["query"])
+        if other and other["ranked"][:1] != query["ranked"][:1]:
+            lines.append(
+                f"top-1 changed for '{query['query']}': "
+                f"{query['ranked'][:1]} -> {other['ranked'][:1]}"
+            )
+
+    return lines, regressions
+
+
+def print_report(report: dict):
+    print("\nQuality:")
+    for metric, value in report["metrics"].items():
+        print(f"  {metric:<10} {value:.3f}")
+    print("\nLatency (ms):")
+    print(f"  {'stage':<8} {'count':>6} {'mean':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for stage, stats in report["latency_ms"].items():
+        print(
+            f"  {stage:<8} {stats['count']:>6} {stats['mean']:>8.1f} {stats['p50']:>8.1f} "
+            f"{stats['p95']:>8.1f} {stats['p99']:>8.1f}"
+        )
+
+
+def run_command(args: argparse.Namespace):
+    if not args.online:
+        # Models must already be in the local Hugging Face cache. Set before the
+        # Hugging Face libraries are imported, since they read it at import time.
+        os.environ.setdefault("HF_HUB_OFFLINE", "1")
+
+    from services.rag_tool import BeerRAGTool
+    from services.reranker_service import RerankerService
+    from services.vector_store_service import load_embedding_model
+
+    overrides = dict(item.split("=", 1) for item in args.set)
+    config = load_config(overrides)
+
+    embeddings = load_embedding_model(args.model, num_threads=args.num_threads)
+    store = build_store(args.csv_path, embeddings, two_tier=config.two_tier_retrieval)
+    tool = BeerRAGTool(
+        config=config,
+        model_name=args.model,
+        collection_name="benchmark",
+        rerank_model=args.rerank_model,
+        vector_store=store,
+        reranker=RerankerService(
+            model_name=args.rerank_model,
+            max_length=config.rerank_max_length,
+            batch_size=config.rerank_batch_size,
+            cascade=config.rerank_cascade,
+            cascade_keep=config.rerank_cascade_keep,
+        ),
+    )
+
+    with open(args.queries, "r", encoding="utf-8") as f:
+        queries = json.load(f)
+
+    # Warm up model caches so the first query does not skew the percentiles
+    tool._run(queries[0]["query"])
+
+    report = run_suite(tool, queries, k=args.k, repeat=args.repeat)
+    report["config"] = overrides
+    print_report(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport saved to {args.output}")
+
+
+def compare_command(args: argparse.Namespace):
+    with open(args.base, "r", encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.candidate, "r", encoding="utf-8") as f:
+        candidate = json.load(f)
+
+    lines, regressions = compare_reports(
+        base,
+        candidate,
+        max_latency_regression=args.max_latency_regression,
+        max_quality_drop=args.max_quality_drop,
+    )
+    print("\n".join(lines))
+    if regressions:
+        print("\nREGRESSIONS:\n  " + "\n  ".join(regressions))
+        sys.exit(1)
+    print("\nNo regression.")
+
+
+def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    logging.getLogger("sentence_transformers").setLevel(logging.WARNING)
+    logging.getLogger("transformers").setLevel(logging.WARNING)
+
+    parser = argparse.ArgumentParser(
+        description="Offline retrieval benchmark: quality (recall, MRR, nDCG) and stage latencies"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser(
+        "run", help="Index the fixture CSV in memory and replay the labeled queries"
+    )
+    run_parser.add_argument(
+        "--csv-path",
+        default=DEFAULT_CSV,
+        help="Enriched recipes CSV to index (default: benchmarks/recipes.csv)",
+    )
+    run_parser.add_argument(
+        "--queries",
+        default=DEFAULT_QUERIES,
+        help="Labeled queries JSON (default: benchmarks/queries.json)",
+    )
+    run_parser.add_argument(
+        "--model",
+        "-m",
+        default="Qwen/Qwen3-Embedding-0.6B",
+        help="Embedding model to use (default: Qwen/Qwen3-Embedding-0.6B)",
+    )
+    run_parser.add_argument(
+        "--rerank-model",
+        "-r",
+        default="Qwen/Qwen3-Reranker-0.6B",
+        help="Reranker model to use (default: Qwen/Qwen3-Reranker-0.6B)",
+    )
+    run_parser.add_argument(
+        "--set",
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="Override a ConfigService setting, e.g. --set MMR_ENABLED=true",
+    )
+    run_parser.add_argument(
+        "--k", type=int, default=3, help="Cutoff for recall and nDCG (default: 3)"
+    )
+    run_parser.add_argument(
+        "--repeat", type=int, default=3, help="Timed runs per query (default: 3)"
+    )
+    run_parser.add_argument(
+        "--num_threads",
+        "-t",
+        type=int,
+        default=2,
+        help="Number of CPU threads for the models (default: 2)",
+    )
+    run_parser.add_argument(
+        "--online",
+        action="store_true",
+        help="Allow downloading models from the Hugging Face Hub",
+    )
+    run_parser.add_argument("--output", "-o", help="Save the JSON report to this path")
+    run_parser.set_defaults(func=run_command)
+
+    compare_parser = subparsers.add_parser(
+        "compare", help="Diff two reports and fail on regressions"
+    )
+    compare_parser.add_argument("base", help="Baseline report JSON")
+    compare_parser.add_argument("candidate", help="Candidate report JSON")
+    compare_parser.add_argument(
+        "--max-latency-regression",
+        type=float,
+        default=0.2,
+        help="Allowed relative p95 latency increase per stage (default: 0.2)",
+    )
+    compare_parser.add_argument(
+        "--max-quality-drop",
+        type=float,
+        default=0.02,
+        help="Allowed absolute drop of each quality metric (default: 0.02)",
+    )
+    compare_parser.set_defaults(func=compare_command)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+import argparse
+import logging
+import statistics
+import time
+
+import numpy as np
+from langchain_core.embeddings import FakeEmbeddings
+from langchain_postgres import PGVector
+
+from services.config_service import ConfigService
+from services.database_service import DatabaseService
+from services.pg_search_service import PgSearchService
+from utilities.benchmark_two_tier import percentile
+
+logger = logging.getLogger(__name__)
+
+STYLES = ["American IPA", "Imperial Stout", "Saison", "Czech Pilsner", "Witbier"]
+
+
+def random_vectors(rng: np.random.Generator, n: int, dim: int) -> np.ndarray:
+    vectors = rng.standard_normal((n, dim), dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def build_collection(
+    database: DatabaseService,
+    name: str,
+    size: int,
+    dim: int,
+    rng: np.random.Generator,
+    batch_size: int = 1000,
+) -> PGVector:
+    """Creates a synthetic collection shaped like the recipe chunks."""
+    store = PGVector(
+        embeddings=FakeEmbeddings(size=dim),
+        collection_name=name,
+        connection=database.engine,
+        use_jsonb=True,
+        pre_delete_collection=True,
+    )
+    logger.info(f"Inserting {size} synthetic chunks into '{name}'...")
+    for start in range(0, size, batch_size):
+        count = min(batch_size, size - start)
+        vectors = random_vectors(rng, count, dim)
+        metadatas = [
+            {
+                "beer_id": str((start + i) // 8),
+                "style": STYLES[(start + i) % len(STYLES)],
+                "abv": round(float(rng.uniform(3, 12)), 1),
+                "section": "Flavor Balance",
+            }
+            for i in range(count)
+        ]
+        store.add_embeddings(
+            texts=[f"Synthetic chunk {start + i}" for i in range(count)],
+            embeddings=vectors.tolist(),
+            metadatas=metadatas,
+        )
+    return store
+
+
+def time_queries(search, queries: np.ndarray, filter: dict | None) -> list[float]:
+    """Returns per-query latencies in milliseconds."""
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        search(query.tolist(), filter)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def run_benchmark(
+    database: DatabaseService,
+    sizes: list[int],
+    dim: int = 1024,
+    k: int = 10,
+    n_queries: int = 50,
+    warmup: int = 5,
+    keep: bool = False,
+) -> dict:
+    """Compares the PGVector query builder with the native SQL path per collection size."""
+    rng = np.random.default_rng(0)
+    native = PgSearchService(
+        database.pool, prepare=database.config.db_prepared_statements
+    )
+    filters = {
+        "no filter": None,
+        "style + abv": {"$and": [{"style": {"$in": STYLES[:2]}}, {"abv": {"$gt": 6}}]},
+    }
+
+    report = {}
+    for size in sizes:
+        name = f"bench_search_{size}"
+        store = build_collection(database, name, size, dim, rng)
+        paths = {
+            "pgvector": lambda emb, flt: store.similarity_search_with_score_by_vector(
+                emb, k=k, filter=flt
+            ),
+            "native": lambda emb, flt: native.search(name, emb, k=k, filter=flt),
+        }
+        queries = random_vectors(rng, n_queries, dim)
+        try:
+            for label, filter in filters.items():
+                for path, search in paths.items():
+                    # Warm up connections, prepared statements and caches
+                    time_queries(search, queries[:warmup], filter)
+                    latencies = time_queries(search, queries, filter)
+                    report.setdefault(str(size), {}).setdefault(label, {})[path] = {
+                        "mean_ms": statistics.mean(latencies),
+                        "p50_ms": percentile(latencies, 50),
+                        "p95_ms": percentile(latencies, 95),
+                    }
+        finally:
+            if not keep:
+                store.delete_collection()
+    return report
+
+
+def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    parser = argparse.ArgumentParser(
+        description="Benchmark per-query overhead of the PGVector and native SQL search paths"
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[1000, 10000, 50000],
+        help="Synthetic collection sizes (default: 1000 10000 50000)",
+    )
+    parser.add_argument(
+        "--dim", type=int, default=1024, help="Vector dimension (default: 1024)"
+    )
+    parser.add_argument(
+        "--k", type=int, default=10, help="Chunks retrieved per query (default: 10)"
+    )
+    parser.add_argument(
+        "--queries",
+        type=int,
+        default=50,
+        help="Timed queries per size, path and filter (default: 50)",
+    )
+    parser.add_argument(
+        "--keep",
+        action="store_true",
+        help="Keep the synthetic bench_search_* collections",
+    )
+    args = parser.parse_args()
+
+    database = DatabaseService(ConfigService())
+    try:
+        report = run_benchmark(
+            database,
+            args.sizes,
+            dim=args.dim,
+            k=args.k,
+            n_queries=args.queries,
+            keep=args.keep,
+        )
+    finally:
+        database.close()
+
+    print(
+        f"\n{'size':>7} {'filter':<12} {'path':<9} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9}"
+    )
+    for size, by_filter in report.items():
+        for label, by_path in by_filter.items():
+            for path, stats in by_path.items():
+                print(
+                    f"{size:>7} {label:<12} {path:<9} {stats['mean_ms']:>9.2f} "
+                    f"{stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+import argparse
+import json
+import logging
+import statistics
+import time
+
+from services.config_service import ConfigService
+from services.vector_store_service import VectorStoreService
+
+logger = logging.getLogger(__name__)
+
+
+def load_queries(queries_path: str) -> list[dict]:
+    """Loads labeled queries: [{"query": ..., "relevant_beer_ids": [...], "filter": {...}}]."""
+    with open(queries_path, "r", encoding="utf-8") as f:
+        queries = json.load(f)
+    for item in queries:
+        item["relevant_beer_ids"] = [str(bid) for bid in item["relevant_beer_ids"]]
+    return queries
+
+
+def top_recipes(results: list, n: int) -> list[str]:
+    """Returns the first n distinct beer_ids in ranking order."""
+    beer_ids = dict.fromkeys(
+        doc.metadata.get("beer_id") for doc, _ in results if doc.metadata.get("beer_id")
+    )
+    return list(beer_ids)[:n]
+
+
+def recall_at(results: list, relevant: list[str], n: int) -> float:
+    """Fraction of the relevant recipes found in the top n distinct recipes."""
+    if not relevant:
+        return 0.0
+    found = set(top_recipes(results, n)) & set(relevant)
+    return len(found) / len(relevant)
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def run_benchmark(
+    vector_store: VectorStoreService,
+    queries: list[dict],
+    k: int = 10,
+    recipe_k: int = 20,
+    repeat: int = 3,
+) -> dict:
+    """Compares flat and two-tier search on latency and recall@3."""
+    modes = {
+        "flat": lambda emb, flt: vector_store.similarity_search_by_vector(
+            emb, k=k, filter=flt
+        ),
+        "two_tier": lambda emb, flt: vector_store.two_tier_search_by_vector(
+            emb, k=k, filter=flt, recipe_k=recipe_k
+        ),
+    }
+    report = {}
+    for mode, search in modes.items():
+        latencies = []
+        recalls = []
+        for item in queries:
+            # Embedding is shared by both modes, so it is excluded from the timings
+            embedding = vector_store.embeddings.embed_query(item["query"])
+            for _ in range(repeat):
+                start = time.perf_counter()
+                results = search(embedding, item.get("filter"))
+                latencies.append((time.perf_counter() - start) * 1000)
+            recalls.append(recall_at(results, item["relevant_beer_ids"], 3))
+
+        report[mode] = {
+            "mean_ms": statistics.mean(latencies),
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "recall@3": statistics.mean(recalls),
+        }
+    return report
+
+
+def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    logging.getLogger("sentence_transformers").setLevel(logging.WARNING)
+    logging.getLogger("transformers").setLevel(logging.WARNING)
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark flat vs two-tier retrieval (latency and recall@3)"
+    )
+    parser.add_argument("queries_path", help="Path to the labeled queries JSON file")
+    parser.add_argument(
+        "--collection",
+        "-c",
+        default="beer_recipes",
+        help="Collection name (default: beer_recipes)",
+    )
+    parser.add_argument(
+        "--model",
+        "-m",
+        default="Qwen/Qwen3-Embedding-0.6B",
+        help="Embedding model to use (default: Qwen/Qwen3-Embedding-0.6B)",
+    )
+    parser.add_argument(
+        "--k", type=int, default=10, help="Chunks retrieved per query (default: 10)"
+    )
+    parser.add_argument(
+        "--recipe-k",
+        type=int,
+        default=20,
+        help="Candidate recipes selected by the coarse pass (default: 20)",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Timed repetitions per query (default: 3)",
+    )
+    args = parser.parse_args()
+
+    vector_store = VectorStoreService(
+        config=ConfigService(),
+        model_name=args.model,
+        collection_name=args.collection,
+        two_tier=True,
+    )
+    queries = load_queries(args.queries_path)
+    report = run_benchmark(
+        vector_store, queries, k=args.k, recipe_k=args.recipe_k, repeat=args.repeat
+    )
+
+    print(f"\n{'mode':<10} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'recall@3':>9}")
+    for mode, stats in report.items():
+        print(
+            f"{mode:<10} {stats['mean_ms']:>9.1f} {stats['p50_ms']:>9.1f} "
+            f"{stats['p95_ms']:>9.1f} {stats['recall@3']:>9.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import argparse
+import logging
+
+from services.collection_alias_service import CollectionAliasService
+from services.config_service import ConfigService
+
+logger = logging.getLogger(__name__)
+
+
+def list_command(aliases: CollectionAliasService, args: argparse.Namespace):
+    live = aliases.live_version(args.alias)
+    versions = aliases.versions(args.alias)
+    if not versions:
+        print(f"'{args.alias}' has no versions.")
+        return
+    for version, status in versions:
+        marker = " <- live" if version == live else ""
+        print(f"v{version:<6} {status:<9}{marker}")
+
+
+def switch_command(aliases: CollectionAliasService, args: argparse.Namespace):
+    aliases.switch(args.alias, args.version)
+
+
+def rollback_command(aliases: CollectionAliasService, args: argparse.Namespace):
+    name = aliases.rollback(args.alias)
+    logger.info(f"Rolled back '{args.alias}' to '{name}'.")
+
+
+def gc_command(aliases: CollectionAliasService, args: argparse.Namespace):
+    names = aliases.garbage_collect(args.alias, keep=args.keep, dry_run=args.dry_run)
+    if not names:
+        logger.info("Nothing to drop.")
+    elif args.dry_run:
+        logger.info(f"Dry run: would drop {', '.join(names)}.")
+
+
+def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    parser = argparse.ArgumentParser(
+        description="Manage blue/green versions of a collection behind its alias"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = subparsers.add_parser("list", help="List versions and the live one")
+    list_parser.set_defaults(func=list_command)
+
+    switch_parser = subparsers.add_parser(
+        "switch", help="Point the alias at a ready version"
+    )
+    switch_parser.add_argument("version", type=int, help="Version number, e.g. 42")
+    switch_parser.set_defaults(func=switch_command)
+
+    rollback_parser = subparsers.add_parser(
+        "rollback", help="Point the alias back at the previous ready version"
+    )
+    rollback_parser.set_defaults(func=rollback_command)
+
+    gc_parser = subparsers.add_parser(
+        "gc", help="Drop versions older than the live one"
+    )
+    gc_parser.add_argument(
+        "--keep",
+        type=int,
+        default=1,
+        help="Older ready versions to keep for rollback (default: 1)",
+    )
+    gc_parser.add_argument(
+        "--dry-run", action="store_true", help="Only list the versions to drop"
+    )
+    gc_parser.set_defaults(func=gc_command)
+
+    for subparser in (list_parser, switch_parser, rollback_parser, gc_parser):
+        subparser.add_argument(
+            "--alias",
+            "-a",
+            default="beer_recipes",
+            help="Collection alias (default: beer_recipes)",
+        )
+    args = parser.parse_args()
+
+    args.func(CollectionAliasService(ConfigService()), args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import argparse
+import logging
+
+import psycopg
+from langchain_core.documents import Document
+from psycopg.types.json import Jsonb
+
+from services.chunking_service import ChunkingService
+from services.config_service import ConfigService
+from services.recipe_store_service import RecipeStoreService
+
+logger = logging.getLogger(__name__)
+
+
+def compact_collection(
+    config: ConfigService,
+    collection_name: str,
+    batch_size: int = 1000,
+    dry_run: bool = False,
+):
+    """
+    Migrates an existing collection to the compact chunk layout in place.
+    Embeddings are left untouched: they were computed on the full contextual content,
+    which is exactly what the compact layout rebuilds on read.
+    """
+    chunking_service = ChunkingService()
+    recipe_store = RecipeStoreService(config, collection_name=collection_name)
+
+    with psycopg.connect(config.psycopg_connection_string) as conn:
+        row = conn.execute(
+            "SELECT uuid FROM langchain_pg_collection WHERE name = %s",
+            (collection_name,),
+        ).fetchone()
+        if not row:
+            logger.error(f"Collection '{collection_name}' not found.")
+            return
+        collection_id = row[0]
+
+        size_before = conn.execute(
+            "SELECT COALESCE(SUM(pg_column_size(document) + pg_column_size(cmetadata)), 0) "
+            "FROM langchain_pg_embedding WHERE collection_id = %s",
+            (collection_id,),
+        ).fetchone()[0]
+
+        # Only legacy chunks carry the recipe name in their metadata
+        rows = conn.execute(
+            "SELECT id, document, cmetadata FROM langchain_pg_embedding "
+            "WHERE collection_id = %s AND cmetadata ? 'name'",
+            (collection_id,),
+        ).fetchall()
+        logger.info(f"Found {len(rows)} chunks to compact in '{collection_name}'.")
+
+        recipes = {}
+        updates = []
+        for chunk_id, document, metadata in rows:
+            metadata = dict(metadata)
+            raw_content = metadata.pop("raw_content", None)
+            if "section" not in metadata:
+                section, _ = chunking_service._split_section_and_content(
+                    raw_content or ""
+                )
+                metadata["section"] = section
+
+            if metadata.get("beer_id"):
+                recipes[metadata["beer_id"]] = {
+                    key: value
+                    for key, value in metadata.items()
+                    if key not in ("section", "start_index")
+                }
+
+            compact = chunking_service.compact_chunk(
+                Document(page_content=document, metadata=metadata)
+            )
+            updates.append((compact.page_content, Jsonb(compact.metadata), chunk_id))
+
+        if dry_run:
+            logger.info(
+                f"Dry run: would store {len(recipes)} recipes and rewrite {len(updates)} "
+                f"chunks (currently {size_before / 1e6:.1f} MB of document + metadata)."
+            )
+            return
+
+        recipe_store.upsert(recipes)
+        with conn.cursor() as cur:
+            for i in range(0, len(updates), batch_size):
+                cur.executemany(
+                    "UPDATE langchain_pg_embedding SET document = %s, cmetadata = %s "
+                    "WHERE id = %s",
+                    updates[i : i + batch_size],
+                )
+                conn.commit()
+                logger.info(
+                    f"Compacted {min(i + batch_size, len(updates))}/{len(updates)} chunks."
+                )
+
+        size_after = conn.execute(
+            "SELECT COALESCE(SUM(pg_column_size(document) + pg_column_size(cmetadata)), 0) "
+            "FROM langchain_pg_embedding WHERE collection_id = %s",
+            (collection_id,),
+        ).fetchone()[0]
+
+    logger.info(
+        f"Migration complete: {size_before / 1e6:.1f} MB -> {size_after / 1e6:.1f} MB "
+        "of document + metadata. Run VACUUM FULL langchain_pg_embedding to reclaim space."
+    )
+
+
+def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    parser = argparse.ArgumentParser(
+        description="Migrate a PGVector collection to the compact chunk layout"
+    )
+    parser.add_argument(
+        "--collection",
+        "-c",
+        default="beer_recipes",
+        help="Collection name (default: beer_recipes)",
+    )
+    parser.add_argument(
+        "--batch_size",
+        "-b",
+        type=int,
+        default=1000,
+        help="Number of chunks updated per transaction (default: 1000)",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only report what would be migrated",
+    )
+    args = parser.parse_args()
+
+    compact_collection(
+        ConfigService(),
+        args.collection,
+        batch_size=args.batch_size,
+        dry_run=args.dry_run,
+    )
+
+
+if __name__ == "__main__":
+    main()
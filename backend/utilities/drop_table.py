@@ -1,17 +1,9 @@
 import argparse
 import logging
-import os
 
 import psycopg
 
-# Database connection configuration
-PG_HOST = os.getenv("POSTGRES_HOST", "localhost")
-PG_PORT = os.getenv("POSTGRES_PORT", "6543")
-PG_USER = os.getenv("POSTGRES_USER", "user")
-PG_PASS = os.getenv("POSTGRES_PASSWORD", "password")
-PG_DB = os.getenv("POSTGRES_DB", "beer_rag")
-
-connection_string = f"postgresql://{PG_USER}:{PG_PASS}@{PG_HOST}:{PG_PORT}/{PG_DB}"
+from services.config_service import ConfigService
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +11,7 @@ logger = logging.getLogger(__name__)
 def drop_table(table_name: str):
     logger.info(f"Connecting to database to drop table '{table_name}'...")
     try:
+        connection_string = ConfigService().psycopg_connection_string
         with psycopg.connect(connection_string) as conn:
             with conn.cursor() as cur:
                 # Use cascade to drop dependent objects if any
@@ -0,0 +1,184 @@
+import argparse
+import logging
+
+import numpy as np
+import psycopg
+from langchain_core.documents import Document
+from pgvector.psycopg import register_vector
+from psycopg import IsolationLevel
+
+from services.chunking_service import ChunkingService
+from services.config_service import ConfigService
+from services.mmap_store_service import DTYPES, SnapshotWriter
+from services.quantization import PREFILTERS
+from services.recipe_store_service import RecipeStoreService
+
+logger = logging.getLogger(__name__)
+
+ROWS_QUERY = """
+    SELECT e.document, e.cmetadata, e.embedding
+    FROM langchain_pg_embedding e
+    JOIN langchain_pg_collection c ON e.collection_id = c.uuid
+    WHERE c.name = %s
+    ORDER BY e.id
+"""
+
+COUNT_QUERY = """
+    SELECT count(*), max(vector_dims(e.embedding))
+    FROM langchain_pg_embedding e
+    JOIN langchain_pg_collection c ON e.collection_id = c.uuid
+    WHERE c.name = %s
+"""
+
+
+def export_index(
+    config: ConfigService,
+    collection_name: str,
+    root: str,
+    dtype: str = "float16",
+    batch_size: int = 2000,
+    dim: int | None = None,
+    prefilter: str | None = None,
+    prefilter_dim: int | None = None,
+) -> str | None:
+    """
+    Copies a PGVector collection (and its `_recipes` summaries, if any) into a new
+    memory-mapped snapshot under root and publishes it. Compact chunks are expanded
+    so the index serves full documents without the recipe metadata table. Vectors are
+    truncated to dim and a binary or int8 prefilter is added when requested.
+    """
+    chunking = ChunkingService()
+    recipe_store = RecipeStoreService(config, collection_name=collection_name)
+
+    with psycopg.connect(config.psycopg_connection_string) as conn:
+        # Counts and rows must come from the same snapshot of the tables
+        conn.isolation_level = IsolationLevel.REPEATABLE_READ
+        register_vector(conn)
+
+        collections = {
+            "chunks": collection_name,
+            "recipes": f"{collection_name}_recipes",
+        }
+        sizes = {
+            name: conn.execute(COUNT_QUERY, [collection]).fetchone()
+            for name, collection in collections.items()
+        }
+        count, stored_dim = sizes["chunks"]
+        if not count:
+            logger.error(f"Collection '{collection_name}' is empty or missing.")
+            return None
+
+        writer = SnapshotWriter(
+            root,
+            dim=min(dim or stored_dim, stored_dim),
+            dtype=dtype,
+            prefilter=prefilter,
+            prefilter_dim=prefilter_dim,
+        )
+        for name, collection in collections.items():
+            count, _ = sizes[name]
+            if not count:
+                continue
+            logger.info(f"Exporting {count} rows of '{collection}'...")
+            index = writer.index(name, count)
+            # Server-side cursor: the collection is streamed, not loaded at once
+            with conn.cursor(name=f"export_{name}", binary=True) as cur:
+                cur.execute(ROWS_QUERY, [collection])
+                while rows := cur.fetchmany(batch_size):
+                    documents = [
+                        Document(page_content=document, metadata=metadata)
+                        for document, metadata, _ in rows
+                    ]
+                    if name == "chunks":
+                        documents = _expand(documents, chunking, recipe_store)
+                    index.add(documents, np.stack([row[2] for row in rows]))
+        return writer.publish()
+
+
+def _expand(
+    documents: list[Document],
+    chunking: ChunkingService,
+    recipe_store: RecipeStoreService,
+) -> list[Document]:
+    compact_ids = [d.metadata["beer_id"] for d in documents if chunking.is_compact(d)]
+    if not compact_ids:
+        return documents
+    recipes = recipe_store.get_many(compact_ids)
+    return [
+        (
+            chunking.expand_chunk(d, recipes.get(d.metadata["beer_id"], {}))
+            if chunking.is_compact(d)
+            else d
+        )
+        for d in documents
+    ]
+
+
+def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    config = ConfigService()
+    parser = argparse.ArgumentParser(
+        description="Export a PGVector collection to a memory-mapped index snapshot"
+    )
+    parser.add_argument(
+        "--collection",
+        "-c",
+        default="beer_recipes",
+        help="Collection to export (default: beer_recipes)",
+    )
+    parser.add_argument(
+        "--output",
+        "-o",
+        default=config.mmap_index_dir,
+        help=f"Index directory (default: MMAP_INDEX_DIR or {config.mmap_index_dir})",
+    )
+    parser.add_argument(
+        "--dtype",
+        choices=DTYPES,
+        default="float16",
+        help="Vector storage type (default: float16)",
+    )
+    parser.add_argument(
+        "--dim",
+        type=int,
+        default=None,
+        help="Truncate vectors to this many dimensions (default: as stored)",
+    )
+    parser.add_argument(
+        "--prefilter",
+        choices=PREFILTERS,
+        default=None,
+        help="Add a quantized copy of the vectors scanned before exact rescoring",
+    )
+    parser.add_argument(
+        "--prefilter-dim",
+        type=int,
+        default=None,
+        help="Dimensions of the prefilter codes (default: --dim)",
+    )
+    parser.add_argument(
+        "--batch_size",
+        "-b",
+        type=int,
+        default=2000,
+        help="Rows fetched per round trip (default: 2000)",
+    )
+    args = parser.parse_args()
+
+    export_index(
+        config,
+        args.collection,
+        args.output,
+        dtype=args.dtype,
+        batch_size=args.batch_size,
+        dim=args.dim,
+        prefilter=args.prefilter,
+        prefilter_dim=args.prefilter_dim,
+    )
+
+
+if __name__ == "__main__":
+    main()
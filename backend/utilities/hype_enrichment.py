@@ -1,6 +1,7 @@
 import argparse
 import datetime
 import glob
+import hashlib
 import json
 import logging
 import os
@@ -14,16 +15,21 @@ from pydantic import Field, create_model
 
 from services.config_service import ConfigService
 from services.data_service import DataService
+from services.llm_cache_service import LLMCacheService, schema_hash
 
 # Load environment variables
 load_dotenv(find_dotenv())
 
 # Configuration
 MODEL_NAME = "gemini-2.5-flash-lite"
+TEMPERATURE = 0.1
 RECIPES_DIR = "recipes"
 MAX_RECIPES = 100
 QUESTIONS_FILE = "hype_questions.json"
 OUTPUT_LOG_FILE = "enrichment_log.txt"
+LLM_CACHE_FILE = "hype_llm_cache.sqlite"
+# Version of every answered field (JSON), to detect new and reworded questions
+VERSIONS_COLUMN = "hype_versions"
 
 logger = logging.getLogger(__name__)
 
@@ -40,7 +46,7 @@ def load_llm(config: ConfigService):
         llm = ChatGoogleGenerativeAI(
             model=MODEL_NAME,
             google_api_key=google_api_key,
-            temperature=0.1,
+            temperature=TEMPERATURE,
             max_output_tokens=2000,
         )
         return llm
@@ -116,28 +122,111 @@ def extract_metadata_and_text(filepath):
         }
 
 
-def create_dynamic_model():
+def load_questions() -> dict[str, str]:
+    """Question of every field, in questions file order."""
     with open(QUESTIONS_FILE, "r") as f:
         questions_data = json.load(f)
 
-    fields = {}
+    questions = {}
     for category in questions_data["questions"]:
         for item in category["items"]:
-            field_name = item["field"]
-            description = item["question"]
-            fields[field_name] = (str, Field(description=description))
+            questions[item["field"]] = item["question"]
+    return questions
 
-    BeerAnalysis = create_model("BeerAnalysis", **fields)
+
+def field_versions(questions: dict[str, str]) -> dict[str, str]:
+    """Version of every field: a hash of its question, which changes with the wording."""
+    return {
+        field: hashlib.sha256(question.encode("utf-8")).hexdigest()[:12]
+        for field, question in questions.items()
+    }
+
+
+def create_dynamic_model(fields: list[str] | None = None):
+    """Structured output model of all questions, or of the given fields only."""
+    questions = load_questions()
+    if fields is None:
+        fields = list(questions)
+
+    model_fields = {
+        field: (str, Field(description=questions[field])) for field in fields
+    }
+    BeerAnalysis = create_model("BeerAnalysis", **model_fields)
     return BeerAnalysis
 
 
-def process_recipes(output_csv, config: ConfigService, resume=False):
+def _has_answer(record: dict, field: str) -> bool:
+    value = record.get(field)
+    return isinstance(value, str) and bool(value.strip())
+
+
+def stored_versions(record: dict) -> dict[str, str] | None:
+    """Field versions stored with a record; None for records enriched before them."""
+    versions = record.get(VERSIONS_COLUMN)
+    if not isinstance(versions, str) or not versions:
+        return None
+    return json.loads(versions)
+
+
+def stale_fields(record: dict, versions: dict[str, str]) -> list[str]:
+    """
+    Fields of an enriched record to ask again: those without an answer or answered
+    to an older wording of their question. Records enriched before field versions
+    existed are assumed current for every field they answer.
+    """
+    stored = stored_versions(record)
+    return [
+        field
+        for field, version in versions.items()
+        if not _has_answer(record, field)
+        or (stored is not None and stored.get(field) != version)
+    ]
+
+
+def removed_fields(record: dict, versions: dict[str, str]) -> list[str]:
+    """Fields stored with an enriched record whose question was removed since."""
+    return [field for field in stored_versions(record) or {} if field not in versions]
+
+
+def build_story(record: dict, fields: list[str]) -> str:
+    """
+    enriched_story, one section per field in question order. Unchanged answers give
+    byte-identical sections, so their chunks keep their embeddings on re-population.
+    """
+    return "\n\n".join(
+        f"{field.replace('_', ' ').title()}: {record[field]}" for field in fields
+    )
+
+
+def apply_answers(record: dict, answers: dict, versions: dict[str, str]):
+    """
+    Merges answers into a record, drops the answers to removed questions, and
+    rebuilds its enriched_story and field versions.
+    """
+    for field in removed_fields(record, versions):
+        record.pop(field, None)
+    record.update(answers)
+    record["enriched_story"] = build_story(record, list(versions))
+    record[VERSIONS_COLUMN] = json.dumps(versions)
+
+
+def process_recipes(
+    output_csv, config: ConfigService, resume=False, cache_path: str | None = None
+):
+    """
+    Enriches the recipes into output_csv. With resume, recipes already in the file
+    are only asked the questions that are new or were reworded since they were
+    enriched, and their answers are merged into the stored record; answers to removed
+    questions are dropped without asking the LLM. With cache_path,
+    structured outputs are cached on disk, and prompts already answered with the
+    same schema are not sent.
+    """
     recipe_files = glob.glob(os.path.join(RECIPES_DIR, "*.html"))
     recipe_files.sort(key=os.path.getmtime)
     selected_files = recipe_files[:MAX_RECIPES]
 
     data_service = DataService(output_csv)
-    processed_ids = set()
+    existing = {}
     results = []
     log_mode = "w"
 
@@ -145,18 +234,21 @@ def process_recipes(output_csv, config: ConfigService, resume=False):
         logger.info(f"Resuming from {output_csv}...")
         df_existing = data_service.load()
         if not df_existing.empty:
-            processed_ids = set(df_existing["BeerID"].astype(str).tolist())
             results = df_existing.to_dict("records")
-            logger.info(f"Found {len(processed_ids)} already processed recipes.")
+            existing = {str(record["BeerID"]): record for record in results}
+            logger.info(f"Found {len(existing)} already processed recipes.")
             log_mode = "a"
 
     llm = load_llm(config)
     if not llm:
         return
 
-    BeerAnalysisModel = create_dynamic_model()
-    # Use with_structured_output for reliable JSON
-    structured_llm = llm.with_structured_output(BeerAnalysisModel)
+    versions = field_versions(load_questions())
+    all_fields = list(versions)
+    cache = LLMCacheService(cache_path) if cache_path else None
+    # Use with_structured_output for reliable JSON; one per set of requested fields
+    structured_llms = {}
+    counts = {"full": 0, "partial": 0, "pruned": 0, "current": 0}
 
     with open(OUTPUT_LOG_FILE, log_mode, encoding="utf-8") as log_f:
         if log_mode == "w":
@@ -171,12 +263,30 @@ def process_recipes(output_csv, config: ConfigService, resume=False):
         for i, filepath in enumerate(selected_files):
             recipe_name = os.path.basename(filepath)
             data = extract_metadata_and_text(filepath)
+            if not data:
+                continue
 
-            if not data or data["BeerID"] in processed_ids:
+            record = existing.get(str(data["BeerID"]))
+            fields = all_fields if record is None else stale_fields(record, versions)
+            removed = [] if record is None else removed_fields(record, versions)
+            if not fields and not removed:
+                counts["current"] += 1
+                continue
+            if not fields:
+                # Only questions were removed: no new answers are needed
+                log_f.write(
+                    f"--- Recipe {i+1}/{len(selected_files)}: {recipe_name} ---\n"
+                    f"Removing {len(removed)} fields: {', '.join(removed)}\n\n"
+                )
+                apply_answers(record, {}, versions)
+                data_service.save(pd.DataFrame(results))
+                counts["pruned"] += 1
                 continue
 
             logger.info(f"Processing recipe {i+1}/{len(selected_files)}: {recipe_name}")
             log_f.write(f"--- Recipe {i+1}/{len(selected_files)}: {recipe_name} ---\n")
+            if record is not None:
+                log_f.write(f"Updating {len(fields)} fields: {', '.join(fields)}\n")
 
             truncated_text = data["clean_text"][:30000]
 
@@ -187,24 +297,43 @@ def process_recipes(output_csv, config: ConfigService, resume=False):
                 f"{truncated_text}"
             )
 
-            try:
-                # Invoke with structured output
-                structured_data_obj = structured_llm.invoke(prompt)
+            key = tuple(fields)
+            if key not in structured_llms:
+                model = create_dynamic_model(fields)
+                structured_llms[key] = (
+                    llm.with_structured_output(model),
+                    schema_hash(model.model_json_schema()),
+                )
+            structured_llm, schema = structured_llms[key]
 
-                # Convert Pydantic model to dict
-                structured_data = structured_data_obj.model_dump()
+            try:
+                structured_data = None
+                if cache is not None:
+                    structured_data = cache.get(MODEL_NAME, TEMPERATURE, prompt, schema)
+                if structured_data is not None:
+                    log_f.write("(from the LLM cache)\n")
+                else:
+                    # Invoke with structured output
+                    structured_data_obj = structured_llm.invoke(prompt)
+
+                    # Convert Pydantic model to dict
+                    structured_data = structured_data_obj.model_dump()
+                    if cache is not None:
+                        cache.put(
+                            MODEL_NAME, TEMPERATURE, prompt, schema, structured_data
+                        )
 
                 log_f.write(json.dumps(structured_data, indent=2) + "\n\n")
 
-                story_parts = []
-                for field, value in structured_data.items():
-                    data[field] = value
-                    story_parts.append(f"{field.replace('_', ' ').title()}: {value}")
+                if record is None:
+                    record = data
+                    del record["clean_text"]
+                    results.append(record)
+                    counts["full"] += 1
+                else:
+                    counts["partial"] += 1
+                apply_answers(record, structured_data, versions)
 
-                data["enriched_story"] = "\n\n".join(story_parts)
-
-                del data["clean_text"]
-                results.append(data)
                 data_service.save(pd.DataFrame(results))
                 logger.info(f"Successfully processed {recipe_name}")
 
@@ -214,6 +343,18 @@ def process_recipes(output_csv, config: ConfigService, resume=False):
                 log_f.write(error_msg + "\n\n")
             log_f.flush()
 
+        summary = (
+            f"Recipes: {counts['full']} enriched, {counts['partial']} updated, "
+            f"{counts['pruned']} pruned, {counts['current']} already current"
+        )
+        log_f.write(summary + "\n")
+        logger.info(summary)
+        if cache is not None:
+            stats = f"LLM cache: {cache.stats()}"
+            log_f.write(stats + "\n")
+            logger.info(stats)
+            cache.close()
+
     logger.info(f"Enrichment completed. Log saved to {OUTPUT_LOG_FILE}")
 
 
@@ -228,16 +369,36 @@ def main():
     parser.add_argument(
         "--output_csv",
         "-o",
-        help="Path to save the enriched data as CSV",
+        help="Path to save the enriched data (.csv, .parquet or .arrow)",
         required=True,
     )
     parser.add_argument(
-        "--resume", "-r", action="store_true", help="Resume from existing CSV"
+        "--resume",
+        "-r",
+        action="store_true",
+        help="Resume from the existing output; enriched recipes are only asked new "
+        "or reworded questions",
+    )
+    parser.add_argument(
+        "--llm-cache",
+        default=LLM_CACHE_FILE,
+        help="SQLite cache of LLM outputs, keyed on model, temperature, prompt and "
+        f"schema (default: {LLM_CACHE_FILE})",
+    )
+    parser.add_argument(
+        "--no-llm-cache",
+        action="store_true",
+        help="Send every prompt to the LLM and do not cache the outputs",
     )
     args = parser.parse_args()
 
     config = ConfigService()
-    process_recipes(args.output_csv, config, args.resume)
+    process_recipes(
+        args.output_csv,
+        config,
+        args.resume,
+        cache_path=None if args.no_llm_cache else args.llm_cache,
+    )
 
 
 if __name__ == "__main__":
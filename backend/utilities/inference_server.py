@@ -0,0 +1,71 @@
+import argparse
+import logging
+
+from services.config_service import InferenceSettings
+from services.inference_service import InferenceServer, default_socket_path
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """Loads the models once and serves them to the API workers."""
+    # Not ConfigService: the server must start without chat credentials
+    config = InferenceSettings()
+    parser = argparse.ArgumentParser(
+        description="Shared embedding and reranker server for multi-worker deployments"
+    )
+    parser.add_argument(
+        "--socket",
+        "-s",
+        default=config.inference_socket or default_socket_path(),
+        help="Unix socket path (default: INFERENCE_SOCKET or "
+        "$XDG_RUNTIME_DIR/rag_on_tap/inference.sock)",
+    )
+    parser.add_argument(
+        "--model",
+        "-m",
+        default="Qwen/Qwen3-Embedding-0.6B",
+        help="Embedding model name to use (default: Qwen/Qwen3-Embedding-0.6B)",
+    )
+    parser.add_argument(
+        "--rerank_model",
+        "-r",
+        default="Qwen/Qwen3-Reranker-0.6B",
+        help="Reranker model name to use (default: Qwen/Qwen3-Reranker-0.6B)",
+    )
+    parser.add_argument(
+        "--num_threads",
+        "-t",
+        type=int,
+        default=2,
+        help="Number of CPU threads for the embedding model (default: 2)",
+    )
+    args = parser.parse_args()
+    # Read from the environment only, so the key never shows in the process list
+    if not config.inference_authkey:
+        parser.error("INFERENCE_AUTHKEY must be set (shared with the API workers)")
+
+    # Heavy imports only once the arguments are valid
+    from services.reranker_service import load_cross_encoder
+    from services.vector_store_service import load_embedding_model
+
+    server = InferenceServer(
+        args.socket,
+        embeddings=load_embedding_model(args.model, num_threads=args.num_threads),
+        cross_encoder=load_cross_encoder(
+            args.rerank_model, max_length=config.rerank_max_length
+        ),
+        authkey=config.inference_authkey,
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Inference server stopped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+import argparse
+import logging
+
+from services.collection_alias_service import CollectionAliasService
+from services.config_service import ConfigService
+from services.embedding_artifact import (
+    ArtifactEmbeddings,
+    EmbeddingArtifact,
+    load_artifact,
+)
+from services.file_dump_service import FileDumpService
+from services.mmap_store_service import DTYPES, write_snapshot
+from services.vector_store_service import VectorStoreService
+from utilities.populate_db import invalidate_answer_cache
+
+logger = logging.getLogger(__name__)
+
+
+def load_into_pgvector(args: argparse.Namespace, artifact: EmbeddingArtifact):
+    config = ConfigService()
+    aliases = None
+    collection_name = args.collection
+    if args.new_version:
+        aliases = CollectionAliasService(config)
+        collection_name = aliases.create_version(args.collection)
+    storage_service = VectorStoreService(
+        config=config,
+        model_name=artifact.model_name,
+        collection_name=collection_name,
+        two_tier=args.two_tier,
+        compact=args.compact,
+        dimensions=artifact.dimensions,
+        # Serves the stored vectors: the model is never loaded
+        embeddings=ArtifactEmbeddings([artifact]),
+    )
+    try:
+        load_artifact(artifact.path, storage_service, batch_size=args.batch_size)
+    except BaseException:
+        if aliases is not None:
+            aliases.mark_failed(collection_name)
+        raise
+    if aliases is not None:
+        aliases.publish(collection_name)
+    invalidate_answer_cache(storage_service)
+
+
+def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    parser = argparse.ArgumentParser(
+        description="Load an embedding artifact (from populate-db --embeddings-artifact) "
+        "into a store without running the embedding model"
+    )
+    parser.add_argument("artifact", help="Embedding artifact directory")
+    parser.add_argument(
+        "--target",
+        choices=("pgvector", "mmap", "dump"),
+        default="pgvector",
+        help="PGVector collection, memory-mapped index snapshot or JSONL dump "
+        "(default: pgvector)",
+    )
+    parser.add_argument(
+        "--collection",
+        "-c",
+        default="beer_recipes",
+        help="PGVector collection (default: beer_recipes)",
+    )
+    parser.add_argument(
+        "--new-version",
+        action="store_true",
+        help="Load into a new version of the collection and switch its alias to it",
+    )
+    parser.add_argument(
+        "--two-tier",
+        action="store_true",
+        help="Also load the recipe summaries of two-tier retrieval",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Store chunks in the compact layout",
+    )
+    parser.add_argument(
+        "--output",
+        "-o",
+        default=None,
+        help="Index directory (mmap, default: MMAP_INDEX_DIR) or JSONL file (dump)",
+    )
+    parser.add_argument(
+        "--dtype",
+        choices=DTYPES,
+        default="float16",
+        help="Vector storage type of the mmap snapshot (default: float16)",
+    )
+    parser.add_argument(
+        "--batch_size",
+        "-b",
+        type=int,
+        default=500,
+        help="Documents per insert (default: 500)",
+    )
+    args = parser.parse_args()
+
+    artifact = EmbeddingArtifact(args.artifact)
+    logger.info(
+        f"Artifact {args.artifact}: {artifact.counts} vectors of {artifact.model_name} "
+        f"({artifact.dim} dimensions)."
+    )
+    if args.target == "pgvector":
+        load_into_pgvector(args, artifact)
+    elif args.target == "mmap":
+        # Snapshots hold both indexes, so chunks and summaries are written together
+        write_snapshot(
+            args.output or ConfigService().mmap_index_dir,
+            artifact.documents("chunks"),
+            artifact.vectors("chunks"),
+            dtype=args.dtype,
+            recipe_documents=artifact.documents("recipes"),
+            recipe_vectors=artifact.vectors("recipes"),
+        )
+    else:
+        if args.output is None:
+            parser.error("--target dump requires --output")
+        load_artifact(args.artifact, FileDumpService(args.output))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,14 +2,30 @@ import argparse
 import logging
 from typing import List
 
+import pandas as pd
+import psycopg
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from transformers import AutoTokenizer
 
+from services.answer_cache_service import AnswerCacheService
+from services.bulk_embedding_service import BulkEmbeddingService
 from services.chunking_service import ChunkingService
+from services.collection_alias_service import (
+    CollectionAliasService,
+    parse_versioned_name,
+)
 from services.config_service import ConfigService
 from services.data_service import DataService
+from services.embedding_artifact import (
+    ArtifactEmbeddings,
+    reuse_artifact,
+    write_artifact,
+)
 from services.file_dump_service import FileDumpService
+from services.quantization import MatryoshkaEmbeddings
 from services.storage_service import StorageService
-from services.vector_store_service import VectorStoreService
+from services.vector_store_service import VectorStoreService, create_embeddings
 
 # Configure logging
 logging.basicConfig(
@@ -20,44 +36,57 @@ logger = logging.getLogger(__name__)
 COLLECTION_NAME_DEFAULT = "beer_recipes"
 
 
+# The only columns documents are built from; the HyPE answers are never read
+DOCUMENT_COLUMNS = ["BeerID", "Name", "Style", "ABV", "IBU", "enriched_story"]
+
+
+def _metadata_value(value):
+    return "" if pd.isna(value) else value
+
+
 def load_documents_from_csv(csv_path: str, limit: int | None = None) -> List[Document]:
-    """Loads enriched beer recipes from a CSV file and converts them to LangChain Documents."""
+    """
+    Loads enriched beer recipes from a CSV, Parquet or Arrow file and converts them
+    to LangChain Documents. Only DOCUMENT_COLUMNS are read, in batches.
+    """
     logger.info(f"Loading data from {csv_path}...")
     data_service = DataService(csv_path)
-    df = data_service.load()
 
-    if df.empty:
-        logger.warning(f"No data loaded from {csv_path}.")
-        return []
+    documents = []
+    rows = 0
+    for df in data_service.iter_batches(columns=DOCUMENT_COLUMNS):
+        if "enriched_story" not in df.columns:
+            raise ValueError(f"Column 'enriched_story' not found in {csv_path}")
+        if limit is not None:
+            df = df.head(limit - rows)
+        rows += len(df)
 
-    if limit is not None:
-        logger.info(f"Limiting to first {limit} rows.")
-        df = df.head(limit)
+        for row in df.to_dict("records"):
+            content = _metadata_value(row["enriched_story"])
+            if not content:
+                logger.warning(
+                    f"enriched_story is empty for beer {row['BeerID']} ({row['Name']}). Skipping."
+                )
+                continue
 
-    df = df.fillna("")
+            metadata = {
+                "beer_id": str(row["BeerID"]),
+                "name": _metadata_value(row["Name"]),
+                "style": _metadata_value(row["Style"]),
+                "abv": _metadata_value(row["ABV"]),
+                "ibu": _metadata_value(row["IBU"]),
+            }
 
-    if "enriched_story" not in df.columns:
-        raise ValueError(f"Column 'enriched_story' not found in {csv_path}")
+            doc = Document(page_content=content, metadata=metadata)
+            documents.append(doc)
 
-    documents = []
-    for _, row in df.iterrows():
-        content = row["enriched_story"]
-        if not content:
-            logger.warning(
-                f"enriched_story is empty for beer {row['BeerID']} ({row['Name']}). Skipping."
-            )
-            continue
-
-        metadata = {
-            "beer_id": str(row["BeerID"]),
-            "name": row["Name"],
-            "style": row["Style"],
-            "abv": row["ABV"],
-            "ibu": row["IBU"],
-        }
+        if limit is not None and rows >= limit:
+            logger.info(f"Limited to first {limit} rows.")
+            break
 
-        doc = Document(page_content=content, metadata=metadata)
-        documents.append(doc)
+    if rows == 0:
+        logger.warning(f"No data loaded from {csv_path}.")
+        return []
 
     logger.info(f"Loaded {len(documents)} documents.")
     return documents
@@ -68,8 +97,18 @@ def populate_db(
     limit: int | None,
     storage_service: StorageService,
     batch_size: int = 100,
+    max_chunk_tokens: int | None = None,
+    tokenizer=None,
+    artifact_path: str | None = None,
+    embeddings: Embeddings | None = None,
+    model_name: str | None = None,
+    dimensions: int | None = None,
 ):
-    """Orchestrates the loading, splitting, and storing process using dependency injection."""
+    """
+    Orchestrates the loading, splitting, and storing process using dependency injection.
+    With artifact_path, the documents are embedded here by `embeddings` (model_name,
+    truncated to dimensions), stored with their vectors and written to the artifact.
+    """
 
     documents = load_documents_from_csv(csv_path, limit)
     if not documents:
@@ -77,42 +116,191 @@ def populate_db(
         return
 
     # Chunking
-    chunking_service = ChunkingService()
+    if max_chunk_tokens is not None and tokenizer is None:
+        if not isinstance(storage_service, VectorStoreService):
+            raise ValueError("A tokenizer is required to enforce max_chunk_tokens.")
+        tokenizer = storage_service.tokenizer
+    chunking_service = ChunkingService(
+        tokenizer=tokenizer, max_chunk_tokens=max_chunk_tokens
+    )
     split_docs = chunking_service.split_documents(documents)
 
+    if artifact_path is not None:
+        store_with_artifact(
+            storage_service,
+            split_docs,
+            chunking_service.create_recipe_summaries(documents),
+            artifact_path,
+            embeddings,
+            model_name,
+            dimensions,
+            batch_size,
+        )
     # Storage via injected service
-    if isinstance(storage_service, VectorStoreService):
+    elif isinstance(storage_service, VectorStoreService):
         storage_service.add_documents(split_docs, batch_size=batch_size)
+        if storage_service.two_tier:
+            summaries = chunking_service.create_recipe_summaries(documents)
+            storage_service.add_recipe_summaries(summaries, batch_size=batch_size)
     else:
         storage_service.add_documents(split_docs)
 
+    if isinstance(storage_service, VectorStoreService):
+        # A new version is not live yet: its answers are dropped when it is published
+        if parse_versioned_name(storage_service.collection_name)[1] is None:
+            invalidate_answer_cache(storage_service)
+
+
+def store_with_artifact(
+    storage_service: StorageService,
+    chunks: list[Document],
+    summaries: list[Document],
+    artifact_path: str,
+    embeddings: Embeddings,
+    model_name: str,
+    dimensions: int | None,
+    batch_size: int,
+):
+    """
+    Embeds chunks (and recipe summaries for two-tier stores), reusing the vectors of
+    unchanged texts from a previous artifact, then stores them and rewrites the artifact.
+    """
+    embedder = reuse_artifact(artifact_path, model_name, dimensions, embeddings)
+    vectors = embedder.embed_documents([d.page_content for d in chunks])
+    storage_service.add_embeddings(chunks, vectors, batch_size=batch_size)
+
+    summary_vectors = None
+    if getattr(storage_service, "two_tier", False):
+        summary_vectors = embedder.embed_documents([d.page_content for d in summaries])
+        storage_service.add_recipe_summaries(
+            summaries, batch_size=batch_size, vectors=summary_vectors
+        )
+    else:
+        summaries = None
+
+    if isinstance(embedder, ArtifactEmbeddings):
+        logger.info(
+            f"Reused {embedder.hits} vectors from {artifact_path}, "
+            f"embedded {embedder.misses}."
+        )
+    write_artifact(
+        artifact_path,
+        model_name,
+        chunks,
+        vectors,
+        recipe_documents=summaries,
+        recipe_vectors=summary_vectors,
+        dimensions=dimensions,
+    )
+
+
+def invalidate_answer_cache(storage_service: VectorStoreService):
+    """Cached answers may cite recipes that changed, so drop them after ingestion."""
+    try:
+        # Answers are cached per alias, not per version
+        alias, _ = parse_versioned_name(storage_service.collection_name)
+        AnswerCacheService(storage_service.config, collection_name=alias).invalidate()
+    except psycopg.errors.UndefinedTable:
+        pass  # The answer cache was never enabled
+    except Exception as e:
+        logger.warning(f"Could not invalidate the answer cache: {e}")
+
 
 def run_population(args: argparse.Namespace):
     """Handles service selection and dependency injection based on arguments."""
+    tokenizer = None
+    bulk_embedder = bulk_embeddings = None
+    embeddings = None
+    aliases = None
+    collection_name = args.collection
     if args.dry_run:
         logger.info(f"Dry run enabled. Output will be saved to {args.dry_run}")
-        storage_service = FileDumpService(args.dry_run)
+        dimensions = args.dimensions
     else:
         config = ConfigService()
+        dimensions = args.dimensions or config.embedding_dimensions
+    # A dry run only loads the model to include vectors
+    with_vectors = args.with_vectors or args.embeddings_artifact is not None
+    if args.embed_workers and (not args.dry_run or with_vectors):
+        bulk_embedder = bulk_embeddings = BulkEmbeddingService(
+            args.model,
+            workers=args.embed_workers if args.embed_workers > 0 else None,
+            threads_per_worker=args.num_threads,
+            batch_tokens=args.batch_tokens,
+        )
+        if dimensions:
+            bulk_embeddings = MatryoshkaEmbeddings(bulk_embedder, dimensions)
+
+    if args.dry_run:
+        if with_vectors:
+            embeddings = bulk_embeddings or create_embeddings(
+                args.model, args.num_threads, dimensions=dimensions
+            )
+        storage_service = FileDumpService(
+            args.dry_run,
+            embeddings=embeddings,
+            shard_size=args.dump_shard_mb * 2**20 if args.dump_shard_mb else None,
+        )
+        if args.max_chunk_tokens is not None:
+            # Only the tokenizer is needed to apply the token budget without the model
+            tokenizer = AutoTokenizer.from_pretrained(args.model)
+    else:
+        if args.new_version:
+            # Built next to the live version, which keeps serving until the switch
+            aliases = CollectionAliasService(config)
+            collection_name = aliases.create_version(args.collection)
         storage_service = VectorStoreService(
             config=config,
             model_name=args.model,
-            collection_name=args.collection,
+            collection_name=collection_name,
             num_threads=args.num_threads,
+            two_tier=args.two_tier,
+            compact=args.compact,
+            dimensions=dimensions,
+            bulk_embeddings=bulk_embeddings,
+            # The pool workers hold the model: the parent process does not load it
+            embeddings=bulk_embeddings,
         )
+        embeddings = bulk_embeddings or storage_service.embeddings
 
-    populate_db(
-        csv_path=args.csv_path,
-        limit=args.limit,
-        storage_service=storage_service,
-        batch_size=args.batch_size,
-    )
+    try:
+        populate_db(
+            csv_path=args.csv_path,
+            limit=args.limit,
+            storage_service=storage_service,
+            batch_size=args.batch_size,
+            max_chunk_tokens=args.max_chunk_tokens,
+            tokenizer=tokenizer,
+            artifact_path=args.embeddings_artifact,
+            embeddings=embeddings,
+            model_name=args.model,
+            dimensions=dimensions,
+        )
+    except BaseException:
+        if aliases is not None:
+            aliases.mark_failed(collection_name)
+        raise
+    finally:
+        if bulk_embedder is not None:
+            bulk_embedder.close()
+
+    if aliases is not None:
+        aliases.publish(collection_name, switch=not args.no_switch)
+        if args.no_switch:
+            logger.info(
+                f"Built '{collection_name}'. Switch to it with: collection-versions "
+                f"switch {parse_versioned_name(collection_name)[1]} -a {args.collection}"
+            )
+        else:
+            invalidate_answer_cache(storage_service)
 
 
 def main():
     """Handles CLI argument parsing."""
     parser = argparse.ArgumentParser(description="Populate PGVector database from CSV")
-    parser.add_argument("csv_path", help="Path to the enriched recipes CSV")
+    parser.add_argument(
+        "csv_path", help="Path to the enriched recipes (.csv, .parquet or .arrow)"
+    )
     parser.add_argument(
         "--limit",
         "-l",
@@ -146,11 +334,79 @@ def main():
         default=2,
         help="Number of CPU threads for the embedding model (default: 2)",
     )
+    parser.add_argument(
+        "--max-chunk-tokens",
+        type=int,
+        default=None,
+        help="Truncate chunk text so header + text fit in this many embedding tokens",
+    )
+    parser.add_argument(
+        "--embed-workers",
+        type=int,
+        default=0,
+        help="Embed with this many processes of --num_threads threads each, on chunks "
+        "bucketed by token length (-1: one per --num_threads cores; default: 0, "
+        "embed in this process)",
+    )
+    parser.add_argument(
+        "--batch-tokens",
+        type=int,
+        default=8192,
+        help="Padded tokens per bucket with --embed-workers (default: 8192)",
+    )
+    parser.add_argument(
+        "--dimensions",
+        type=int,
+        default=None,
+        help="Store embeddings truncated to this many dimensions "
+        "(default: EMBEDDING_DIMENSIONS or the model's full size)",
+    )
+    parser.add_argument(
+        "--two-tier",
+        action="store_true",
+        help="Also build the recipe-level summary index used by two-tier retrieval",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Store chunks in the compact layout (recipe metadata stored once per recipe)",
+    )
+    parser.add_argument(
+        "--new-version",
+        action="store_true",
+        help="Build a new version of the collection (e.g. beer_recipes@v42) and "
+        "switch its alias to it once complete",
+    )
+    parser.add_argument(
+        "--no-switch",
+        action="store_true",
+        help="With --new-version, build the version without switching the alias to it",
+    )
+    parser.add_argument(
+        "--embeddings-artifact",
+        metavar="DIR",
+        default=None,
+        help="Also save the vectors to an embedding artifact in DIR (Parquet + .npy); "
+        "unchanged chunks reuse the vectors of a previous artifact of the same model",
+    )
+    parser.add_argument(
+        "--with-vectors",
+        action="store_true",
+        help="With --dry-run, embed the chunks and include their vectors in the dump",
+    )
     parser.add_argument(
         "--dry-run",
         type=str,
         metavar="FILE_PATH",
-        help="Do not populate DB; instead, dump chunks to this JSONL file path",
+        help="Do not populate DB; instead, dump chunks to this JSONL file path "
+        "(compressed if it ends in .gz or .zst)",
+    )
+    parser.add_argument(
+        "--dump-shard-mb",
+        type=int,
+        default=None,
+        help="With --dry-run, split the dump into shards of this many MB "
+        "(uncompressed) named <name>-00000.jsonl...",
     )
     args = parser.parse_args()
 
@@ -58,7 +58,10 @@ export default function App() {
     try {
       const response = await fetch("/api/chat", {
         method: "POST",
-        headers: { "Content-Type": "application/json" },
+        headers: {
+          "Content-Type": "application/json",
+          Accept: "text/event-stream",
+        },
         body: JSON.stringify({
           message: currentInput,
           session_id: sessionId,
@@ -70,13 +73,30 @@ export default function App() {
       const reader = response.body?.getReader();
       if (!reader) throw new Error("No readable stream");
 
+      const decoder = new TextDecoder();
       let assistantContent = "";
+      let buffer = "";
       while (true) {
         const { done, value } = await reader.read();
         if (done) break;
 
-        const chunk = new TextDecoder().decode(value);
-        assistantContent += chunk;
+        // SSE frames are separated by a blank line; keep any partial frame
+        buffer += decoder.decode(value, { stream: true });
+        const frames = buffer.split("\n\n");
+        buffer = frames.pop() ?? "";
+
+        for (const frame of frames) {
+          const event = frame.match(/^event: (.*)$/m)?.[1];
+          const data = frame.match(/^data: (.*)$/m)?.[1];
+          if (!event || !data) continue; // heartbeat comments
+
+          const payload = JSON.parse(data);
+          if (event === "token") {
+            assistantContent += payload.text;
+          } else if (event === "error") {
+            assistantContent += `\n[${payload.message}]`;
+          }
+        }
 
         // Update the last message in the list
         setMessages((prev) => {